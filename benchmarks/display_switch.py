@@ -0,0 +1,132 @@
+"""
+Print start/stop latency of the projector display: the old pygame.quit()/init()
+cycle against the persistent display.
+
+teardown       What PygameApp did for every print: pygame.quit() to release the
+               display at start; at stop, wait for the 100 ms poll, then
+               pygame.init(), set_mode() and the first GUI frame.
+in-process     The persistent display projecting the print itself: play() until
+               the first print frame is flipped, stop() until the next GUI frame is.
+yield          The persistent display stepping aside for cvlc/mpv: iconify() at
+               start; set_mode() on the existing window and a GUI frame at stop.
+
+Run on the printer with the projector attached (DISPLAY=:0):
+
+    python -m benchmarks.display_switch [--repeat 10]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+import pygame
+
+from opencal.hardware.projection import ArrayFrameSource, FramePlayer
+
+_POLL_S = 0.1
+
+
+def _gui_frame(screen: pygame.Surface) -> None:
+    _ = screen.fill((0, 0, 0))
+    pygame.display.flip()
+
+
+def _teardown(repeat: int) -> tuple[list[float], list[float]]:
+    start, stop = [], []
+    for _ in range(repeat):
+        _ = pygame.init()
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        _gui_frame(screen)
+
+        t0 = time.perf_counter()
+        pygame.quit()
+        start.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        # The print ends at a random point of the 100 ms poll.
+        time.sleep(random.uniform(0, _POLL_S))
+        _ = pygame.init()
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        _gui_frame(screen)
+        stop.append(time.perf_counter() - t0)
+        pygame.quit()
+    return start, stop
+
+
+def _in_process(
+    screen: pygame.Surface, player: FramePlayer, frame: np.ndarray, repeat: int
+) -> tuple[list[float], list[float]]:
+    start, stop = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        player.play(ArrayFrameSource(frame))
+        while not player.first_frame.is_set():
+            _ = screen.fill((0, 0, 0))
+            _ = player.render(screen)
+            pygame.display.flip()
+            player.presented()
+        start.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        player.stop()
+        _ = screen.fill((0, 0, 0))
+        if not player.render(screen):
+            pygame.display.flip()
+        stop.append(time.perf_counter() - t0)
+    return start, stop
+
+
+def _yield(screen: pygame.Surface, repeat: int) -> tuple[list[float], list[float]]:
+    start, stop = [], []
+    size = screen.get_size()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _ = pygame.display.iconify()
+        start.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        screen = pygame.display.set_mode(size, pygame.FULLSCREEN)
+        _gui_frame(screen)
+        stop.append(time.perf_counter() - t0)
+    return start, stop
+
+
+def _report(label: str, start: list[float], stop: list[float]) -> None:
+    def ms(samples: list[float]) -> str:
+        return f"median {statistics.median(samples) * 1000:7.1f} ms  max {max(samples) * 1000:7.1f} ms"
+
+    print(f"{label:<12} start {ms(start)}   stop {ms(stop)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DISPLAY", ":0")
+
+    teardown = _teardown(args.repeat)
+
+    _ = pygame.init()
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    w, h = screen.get_size()
+    frame = np.random.default_rng(0).integers(0, 256, (h, w, 3), dtype=np.uint8)
+    player = FramePlayer()
+    player.bind_display((w, h))
+    try:
+        in_process = _in_process(screen, player, frame, args.repeat)
+        yielded = _yield(screen, args.repeat)
+    finally:
+        player.unbind_display()
+        pygame.quit()
+
+    _report("teardown", *teardown)
+    _report("in-process", *in_process)
+    _report("yield", *yielded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Per-edge CPU cost and speed-estimate accuracy of the motor encoder decoders.
+
+Both decoders are fed the same simulated quadrature signal, so the numbers
+are the Python-side cost of an edge and do not need the motor:
+
+gpiozero       RotaryEncoder on gpiozero's MockFactory pins
+lgpio          QuadratureEncoder on fake_lgpio, whose drive() calls the
+               callback as lgpio's callback thread does
+
+The signal accelerates steadily through --rpm; the QuadratureEncoder's
+position/velocity/acceleration estimates are compared with the true motion
+at a few points, which is what the speed controller and angle_in_steps read.
+
+    python -m benchmarks.encoder_edges [--rpm 30] [--cpr 1000] [--seconds 2]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from opencal.hardware.stepper import fake_lgpio
+from opencal.hardware.stepper.encoder import QuadratureEncoder
+
+_A, _B = 12, 13
+# A leads B: the direction both decoders count up
+_SEQUENCE = ((1, 0), (1, 1), (0, 1), (0, 0))
+
+
+def _edges(rpm: float, cpr: int, seconds: float) -> np.ndarray:
+    """Edge times (s) for speed ramping linearly from rpm/2 to rpm."""
+    rate0, rate1 = rpm / 2 / 60 * cpr * 4, rpm / 60 * cpr * 4  # edges per second
+    accel = (rate1 - rate0) / seconds
+    # Edge k brings the count to k: solve k = rate0 t + accel t² / 2 for t
+    k = np.arange(1, int(rate0 * seconds + accel * seconds**2 / 2) + 1)
+    return (-rate0 + np.sqrt(rate0 * rate0 + 2 * accel * k)) / accel
+
+
+def _gpiozero_ns_per_edge(count: int) -> float:
+    from gpiozero import Device, RotaryEncoder
+    from gpiozero.pins.mock import MockFactory
+
+    Device.pin_factory = MockFactory()
+    encoder = RotaryEncoder(_A, _B, max_steps=0)
+    a, b = Device.pin_factory.pin(_A), Device.pin_factory.pin(_B)
+    t0 = time.process_time_ns()
+    for i in range(count):
+        level_a, level_b = _SEQUENCE[i % 4]
+        # Channels alternate: A changes on even edges, B on odd ones.
+        pin, level = (a, level_a) if i % 2 == 0 else (b, level_b)
+        if level:
+            pin.drive_high()
+        else:
+            pin.drive_low()
+    elapsed = time.process_time_ns() - t0
+    encoder.close()
+    return elapsed / count
+
+
+def _lgpio_ns_per_edge(edge_t: np.ndarray, cpr: int) -> tuple[float, QuadratureEncoder, int]:
+    encoder = QuadratureEncoder(_A, _B, cpr, backend="fake_lgpio")
+    base = time.monotonic_ns()
+    stamps = (base + edge_t * 1e9).astype(np.int64).tolist()
+    t0 = time.process_time_ns()
+    for i, stamp in enumerate(stamps):
+        level_a, level_b = _SEQUENCE[i % 4]
+        gpio, level = (_A, level_a) if i % 2 == 0 else (_B, level_b)
+        fake_lgpio.drive(gpio, level, stamp)
+    elapsed = time.process_time_ns() - t0
+    return elapsed / len(stamps), encoder, base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--rpm", type=float, default=30)
+    _ = parser.add_argument("--cpr", type=int, default=1000)
+    _ = parser.add_argument("--seconds", type=float, default=2)
+    _ = parser.add_argument("--window", type=float, default=0.5, help="Estimate window (s)")
+    args = parser.parse_args()
+
+    edge_t = _edges(args.rpm, args.cpr, args.seconds)
+    print(f"{len(edge_t)} edges, {args.rpm / 2:g} -> {args.rpm:g} RPM over {args.seconds:g} s")
+
+    lgpio_ns, encoder, base = _lgpio_ns_per_edge(edge_t, args.cpr)
+    try:
+        gpiozero = f"{_gpiozero_ns_per_edge(len(edge_t)) / 1000:6.1f} us"
+    except ImportError:
+        gpiozero = "n/a (gpiozero not installed)"
+    print(f"per edge     gpiozero {gpiozero}   lgpio {lgpio_ns / 1000:6.1f} us")
+    print(f"count        {encoder.count} of {len(edge_t)} edges, {encoder.errors} decode errors")
+
+    rpm0 = args.rpm / 2
+    accel = (args.rpm - rpm0) / args.seconds
+    for at in (args.window, args.seconds / 2, args.seconds):
+        est = encoder.estimate(args.window, at_ns=base + int(at * 1e9))
+        true_revs = (rpm0 * at + accel * at * at / 2) / 60
+        print(
+            f"t={at:5.2f} s     revs {est.revs:9.5f} (true {true_revs:9.5f})   "
+            f"rpm {est.rpm:8.4f} (true {rpm0 + accel * at:8.4f})   "
+            f"accel {est.rpm_per_s:7.3f} rpm/s (true {accel:7.3f})"
+        )
+    encoder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Time-to-first-frame: in-process FramePlayer vs. spawning mpv per file vs.
+swapping files in a persistent mpv over IPC.
+
+Run on the printer with the projector attached (DISPLAY=:0):
+
+    python -m benchmarks.first_frame path/to/print.mp4 [--image dark.png] [--repeat 5]
+
+The subprocess number is measured until mpv reports that playback started,
+which is a lower bound on when the first frame actually reaches the screen.
+The IPC number is measured until mpv sends `playback-restart`.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+import pygame
+
+from opencal.hardware.projection import FramePlayer, FrameSource, ImageFrameSource, VideoFrameSource
+from opencal.hardware.projection.mpv_ipc import MpvController
+
+_DARK_IMAGE = Path(__file__).parent.parent / "opencal" / "utils" / "calibration" / "dark.png"
+
+
+def _subprocess_first_frame(path: Path) -> float:
+    command = [
+        "/usr/bin/mpv",
+        "--fs",
+        "--no-audio",
+        "--loop-file=inf",
+        "--image-display-duration=inf",
+        "--term-playing-msg=FIRST_FRAME",
+        str(path),
+    ]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            if "FIRST_FRAME" in line:
+                return time.perf_counter() - t0
+        raise RuntimeError(f"mpv exited before playing {path}")
+    finally:
+        proc.terminate()
+        _ = proc.wait()
+
+
+def _in_process_first_frame(
+    player: FramePlayer, screen: pygame.Surface, make_source: "type[FrameSource]", path: Path
+) -> float:
+    t0 = time.perf_counter()
+    player.play(make_source(path))
+    while not player.first_frame.is_set():
+        _ = screen.fill((0, 0, 0))
+        _ = player.render(screen)
+        pygame.display.flip()
+        player.presented()
+    latency = time.perf_counter() - t0
+    player.stop()
+    _ = player.render(screen)
+    return latency
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<28} median {statistics.median(ms):8.1f} ms   max {max(ms):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--image", type=Path, default=_DARK_IMAGE)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DISPLAY", ":0")
+
+    sub_video = [_subprocess_first_frame(args.video) for _ in range(args.repeat)]
+    sub_image = [_subprocess_first_frame(args.image) for _ in range(args.repeat)]
+
+    mpv = MpvController()
+    mpv.start()
+    try:
+        ipc_video = [mpv.loadfile(args.video) for _ in range(args.repeat)]
+        ipc_image = [mpv.loadfile(args.image) for _ in range(args.repeat)]
+    finally:
+        mpv.close()
+
+    _ = pygame.init()
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    player = FramePlayer()
+    player.bind_display(screen.get_size())
+    try:
+        in_video = [
+            _in_process_first_frame(player, screen, VideoFrameSource, args.video)
+            for _ in range(args.repeat)
+        ]
+        in_image = [
+            _in_process_first_frame(player, screen, ImageFrameSource, args.image)
+            for _ in range(args.repeat)
+        ]
+    finally:
+        player.unbind_display()
+        pygame.quit()
+
+    _report("mpv subprocess, video", sub_video)
+    _report("mpv subprocess, image", sub_image)
+    _report("mpv IPC loadfile, video", ipc_video)
+    _report("mpv IPC loadfile, image", ipc_image)
+    _report("FramePlayer, video", in_video)
+    _report("FramePlayer, image", in_image)
+
+
+if __name__ == "__main__":
+    main()
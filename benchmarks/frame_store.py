@@ -0,0 +1,116 @@
+"""
+Frame store formats: bytes per frame and read throughput for the frame cache
+storing binary print frames as RGB, gray or bit-packed.
+
+Runs anywhere, no projector needed:
+
+    python -m benchmarks.frame_store [--size 1920x1080] [--frames 200]
+
+"Read" is the cost of getting one frame's pixels into memory ready to blit:
+copying the memory-mapped slice for RGB and gray (pygame touches every
+pixel anyway), unpacking into the reused display buffer for bits.
+
+Before timing, a short synthetic mp4 is round-tripped through FrameCache and
+every cached frame is compared with the same frame decoded on its own.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from opencal.hardware.projection.bitpack import BitUnpacker, pack
+from opencal.hardware.projection.frame_cache import CachedFrameSource, FrameCache
+from opencal.hardware.projection.rescale import FrameRescaler
+
+
+def _synthetic_frames(count: int, width: int, height: int) -> np.ndarray:
+    """Binary discs of varying radius, roughly like a tomographic print."""
+    ys, xs = np.ogrid[:height, :width]
+    r2 = (xs - width / 2) ** 2 + (ys - height / 2) ** 2
+    radii = np.linspace(0.1, 0.45, count) * height
+    return ((r2[None] < (radii**2)[:, None, None]) * 255).astype(np.uint8)
+
+
+def _check_video_cache(tmp: Path, count: int = 40, width: int = 64, height: int = 48) -> None:
+    """Cache a gradient mp4 (one gray level per frame) and compare it frame by frame."""
+    import cv2
+
+    video = tmp / "gradient.mp4"
+    writer = cv2.VideoWriter(str(video), cv2.VideoWriter.fourcc(*"mp4v"), 30, (width, height))
+    for i in range(count):
+        writer.write(np.full((height, width, 3), 40 + i * 5, dtype=np.uint8))
+    writer.release()
+
+    display, size = (width * 2, height * 2), 100
+    entry = FrameCache(tmp / "cache", 1 << 30).build(video, display, size)
+    assert entry is not None, "caching the synthetic video failed"
+    cached = CachedFrameSource(entry)
+    assert cached.frame_count == count, f"cached {cached.frame_count} of {count} frames"
+
+    rescaler = FrameRescaler((width, height), display, size)
+    capture = cv2.VideoCapture(str(video))
+    for i in range(count):
+        ok, bgr = capture.read()
+        assert ok, f"frame {i} did not decode"
+        expected = rescaler.apply(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        frame = cached.read(i)
+        if frame.ndim == 2:
+            expected = expected[..., 0]
+        assert np.array_equal(frame, expected), f"cached frame {i} differs from the decoded one"
+    capture.release()
+    cached.close()
+    print(f"FrameCache round trip: {count} frames of {video.name} match")
+
+
+def _time_reads(read, count: int, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for i in range(count):
+            _ = read(i)
+    return (time.perf_counter() - t0) / (count * repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--size", default="1920x1080")
+    _ = parser.add_argument("--frames", type=int, default=200)
+    _ = parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    width, height = map(int, args.size.split("x"))
+
+    gray = _synthetic_frames(args.frames, width, height)
+    stores = {
+        "rgb": np.repeat(gray[..., None], 3, axis=-1),
+        "gray": gray,
+        "bits": pack(gray),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _check_video_cache(Path(tmp))
+        unpacker = BitUnpacker(width, height)
+        print(f"{'format':<6} {'bytes/frame':>12} {'ratio':>7} {'read ms':>9} {'frames/s':>9}")
+        for name, frames in stores.items():
+            path = Path(tmp) / f"{name}.npy"
+            np.save(path, frames)
+            mapped = np.load(path, mmap_mode="r")
+            if name == "bits":
+                read = lambda i, m=mapped: unpacker.unpack(m[i])
+            else:
+                buffer = np.empty_like(frames[0])
+                read = lambda i, m=mapped, b=buffer: np.copyto(b, m[i])
+            # One untimed pass so every format is read from the page cache
+            _ = _time_reads(read, args.frames, 1)
+            per_frame = _time_reads(read, args.frames, args.repeat)
+            nbytes = frames[0].nbytes
+            ratio = stores["rgb"][0].nbytes / nbytes
+            print(f"{name:<6} {nbytes:>12,} {ratio:>6.0f}x {per_frame * 1e3:>9.2f} {1 / per_frame:>9.0f}")
+            del mapped
+
+        assert np.array_equal(unpacker.unpack(stores["bits"][-1]), gray[-1])
+
+
+if __name__ == "__main__":
+    main()
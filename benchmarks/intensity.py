@@ -0,0 +1,61 @@
+"""
+Intensity correction cost: gamma LUT and flat-field gain map applied in
+place to display-sized frames, against the projector's frame interval.
+
+    python -m benchmarks.intensity [--size 1920x1080] [--refresh 60] [--frames 200]
+
+Each frame is one add into a reused intp index buffer and one np.take from
+the 256 x 256 (gain level, value) table back into the frame.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from opencal.hardware.projection.intensity import IntensityCorrection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--size", default="1920x1080")
+    _ = parser.add_argument("--refresh", type=float, default=60.0, help="projector refresh rate in Hz")
+    _ = parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+    width, height = map(int, args.size.split("x"))
+    budget_ms = 1e3 / args.refresh
+
+    # Brightest in the middle, 20% dimmer in the corners, like a typical projector
+    ys, xs = np.mgrid[0:height, 0:width]
+    r2 = ((xs - width / 2) / width) ** 2 + ((ys - height / 2) / height) ** 2
+    gain = (0.8 / (1 - 0.4 * r2)).clip(0, 1).astype(np.float32)
+    cases = {
+        "gamma": IntensityCorrection(2.2, None, (width, height)),
+        "gamma+gain": IntensityCorrection(2.2, gain, (width, height)),
+    }
+
+    rng = np.random.default_rng(0)
+    frames = {
+        "rgb": rng.integers(0, 256, (height, width, 3), dtype=np.uint8),
+        "gray": rng.integers(0, 256, (height, width), dtype=np.uint8),
+    }
+    print(f"Frame interval at {args.refresh:.0f} Hz: {budget_ms:.2f} ms")
+    print(f"{'case':<11} {'frame':<5} {'median ms':>10} {'p99 ms':>8} {'fits':>5}")
+    for name, correction in cases.items():
+        for kind, template in frames.items():
+            frame = template.copy()
+            _ = correction.apply(frame)
+            ms = []
+            for _ in range(args.frames):
+                np.copyto(frame, template)
+                t0 = time.perf_counter()
+                _ = correction.apply(frame)
+                ms.append((time.perf_counter() - t0) * 1e3)
+            p99 = sorted(ms)[int(len(ms) * 0.99) - 1]
+            fits = "yes" if p99 < budget_ms else "NO"
+            print(f"{name:<11} {kind:<5} {statistics.median(ms):>10.2f} {p99:>8.2f} {fits:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Frame remap throughput: keystone + vial refraction lookup applied to
+display-sized frames, against the projector's frame interval.
+
+Runs anywhere; run it on the Pi 5 for the numbers that matter:
+
+    python -m benchmarks.remap [--size 1920x1080] [--refresh 60] [--frames 200]
+
+Both RGB frames (video, decoder) and single-channel frames (frame cache)
+are timed. Each frame is one np.take into a preallocated buffer, plus one
+in-place multiply when part of the display is masked dark.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from opencal.hardware.projection.remap import FrameRemap, RemapCalibration, build_lut
+
+
+def _time(remap: FrameRemap, frame: np.ndarray, out: np.ndarray, count: int) -> list[float]:
+    times = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        _ = remap.apply(frame, out)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--size", default="1920x1080")
+    _ = parser.add_argument("--refresh", type=float, default=60.0, help="projector refresh rate in Hz")
+    _ = parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+    width, height = map(int, args.size.split("x"))
+    budget_ms = 1e3 / args.refresh
+
+    # A mild keystone and a 1.49 index resin in a vial spanning 80% of the height
+    keystone = np.array([[1.0, 0.02, -10.0], [0.0, 1.01, -5.0], [0.0, 1e-5, 1.0]])
+    cases = {
+        "keystone": RemapCalibration(keystone),
+        "keystone+vial": RemapCalibration(keystone, 1.49, 0.4 * height),
+    }
+
+    t0 = time.perf_counter()
+    luts = {name: build_lut(cal, (width, height), (width, height), 100, True) for name, cal in cases.items()}
+    print(f"Built {len(luts)} lookup tables in {(time.perf_counter() - t0) * 1e3:.0f} ms")
+    print(f"Frame interval at {args.refresh:.0f} Hz: {budget_ms:.2f} ms")
+
+    rng = np.random.default_rng(0)
+    frames = {
+        "rgb": rng.integers(0, 256, (height, width, 3), dtype=np.uint8),
+        "gray": rng.integers(0, 256, (height, width), dtype=np.uint8),
+    }
+    print(f"{'case':<15} {'frame':<5} {'median ms':>10} {'p99 ms':>8} {'fits':>5}")
+    for name, (lut, mask) in luts.items():
+        remap = FrameRemap(lut, mask, (width, height))
+        for kind, frame in frames.items():
+            out = np.empty_like(frame)
+            _ = _time(remap, frame, out, 5)
+            ms = [t * 1e3 for t in _time(remap, frame, out, args.frames)]
+            p99 = sorted(ms)[int(len(ms) * 0.99) - 1]
+            median = statistics.median(ms)
+            fits = "yes" if p99 < budget_ms else "NO"
+            print(f"{name:<15} {kind:<5} {median:>10.2f} {p99:>8.2f} {fits:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Step-pulse jitter and CPU cost of StepDirStepperMotor: steps toggled by a
+Python thread against steps timed by lgpio tx_pwm().
+
+Each generator spins the motor at a constant speed for a while, optionally
+under a Python `--load` that competes for the GIL as the camera and GUI do.
+
+jitter   deviation of each step interval from 1 / step rate, from the rising
+         edges seen on a loopback input wired to the step pin (--loopback);
+         without one, only the software generator can be timed, from when
+         its thread calls step.on()
+cpu      process CPU time per second of wall time, the load excluded
+
+Run on the printer with the step/dir driver wired as in config.json:
+
+    python -m benchmarks.step_timing [--rpm 9] [--seconds 10] [--load] [--loopback PIN]
+
+--fake runs against fake_lgpio off the printer; its edges come from a Python
+thread, so it checks the plumbing, not the jitter.
+"""
+
+import argparse
+import copy
+import json
+import threading
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from opencal.hardware.stepper import fake_lgpio
+from opencal.hardware.stepper.step_dir import StepDirStepperMotor
+from opencal.utils.config import CFG_PATH, StepDirStepperConfig
+
+
+def _thread_cpu(thread: threading.Thread) -> float:
+    assert thread.ident is not None
+    return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+
+
+def _busy(stop: threading.Event) -> None:
+    # Pure-Python work holds the GIL, like frame decoding glue and GUI drawing.
+    while not stop.is_set():
+        _ = sum(i * i for i in range(20_000))
+
+
+def _loopback_edges(pin: int, chip: int) -> tuple[list[int], Callable[[], None]]:
+    import lgpio
+
+    edges: list[int] = []
+    handle = lgpio.gpiochip_open(chip)
+    _ = lgpio.gpio_claim_alert(handle, pin, lgpio.RISING_EDGE)
+    callback = lgpio.callback(handle, pin, lgpio.RISING_EDGE, lambda _c, _g, _l, ts: edges.append(ts))
+
+    def close() -> None:
+        callback.cancel()
+        _ = lgpio.gpiochip_close(handle)
+
+    return edges, close
+
+
+def _run(raw: dict, generator: str, args: argparse.Namespace) -> tuple[np.ndarray, float]:
+    """Step-interval errors (s) and CPU fraction for one generator."""
+    raw = copy.deepcopy(raw)
+    raw["step_dir"]["step_generator"] = generator
+    raw["default_rpm"] = args.rpm
+    config = StepDirStepperConfig(raw)
+    motor = StepDirStepperMotor(config)
+
+    edges: list[int] = []
+    close_loopback: Callable[[], None] | None = None
+    if args.loopback is not None:
+        edges, close_loopback = _loopback_edges(args.loopback, config.gpio_chip)
+    elif generator == "software":
+        step_on = motor.step.on
+
+        def timed_step_on() -> None:
+            edges.append(time.perf_counter_ns())
+            step_on()
+
+        motor.step.on = timed_step_on
+    elif generator == "fake_lgpio":
+        edges = fake_lgpio.edges.setdefault(config.step_pin, [])
+        edges.clear()
+
+    stop_load = threading.Event()
+    load = threading.Thread(target=_busy, args=(stop_load,), daemon=True)
+    if args.load:
+        load.start()
+
+    motor.start_rotation()
+    time.sleep(0.5)  # settle
+    edges.clear()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    load0 = _thread_cpu(load) if args.load else 0.0
+    time.sleep(args.seconds)
+    cpu = time.process_time() - cpu0
+    if args.load:
+        cpu -= _thread_cpu(load) - load0
+    wall = time.perf_counter() - wall0
+    motor.stop()
+    stop_load.set()
+    if close_loopback is not None:
+        close_loopback()
+
+    period = 60.0 / (args.rpm * config.steps_per_revolution)
+    errors = np.diff(np.array(edges, dtype=np.int64)) / 1e9 - period
+    return errors, cpu / wall
+
+
+def _report(label: str, errors: np.ndarray, cpu: float) -> None:
+    if len(errors) == 0:
+        print(f"{label:<12} jitter n/a (no edges; use --loopback)        cpu {cpu * 100:5.1f} %")
+        return
+    us = np.abs(errors) * 1e6
+    print(
+        f"{label:<12} jitter std {errors.std() * 1e6:7.1f} us  p99 {np.percentile(us, 99):7.1f} us"
+        f"  max {us.max():8.1f} us  ({len(errors)} steps)   cpu {cpu * 100:5.1f} %"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--rpm", type=float, default=9)
+    _ = parser.add_argument("--seconds", type=float, default=10)
+    _ = parser.add_argument("--load", action="store_true", help="Compete for the GIL while stepping")
+    _ = parser.add_argument("--loopback", type=int, help="Input GPIO wired to the step pin")
+    _ = parser.add_argument("--fake", action="store_true", help="Use fake_lgpio instead of lgpio")
+    args = parser.parse_args()
+
+    with open(CFG_PATH) as f:
+        raw = json.load(f)["stepper_motor"]
+
+    for generator in ("software", "fake_lgpio" if args.fake else "lgpio"):
+        _report(generator, *_run(raw, generator, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ Generate calibration and measurement images for the OpenCAL projector.
 Display each image fullscreen, measure with calipers, then use the known
 fractions to calculate the actual projected width and height in mm.
 
+The patterns come from opencal.hardware.projection.patterns, which the
+projector and the camera calibrations render in memory at the actual display
+resolution; these files are for viewing them elsewhere.
+
 Images generated
 ----------------
 dark.png               Solid black — used as a blank/reset
@@ -12,44 +16,45 @@ cal_2_checkerboard.png 4×4 checkerboard: one square = 25% of W × 25% of H
 cal_3_crosshair.png    Centre lines + corner squares: measure half-dimensions
 cal_4_grid_10pct.png   Grid lines every 10%: measure any span of N lines × 10% each
 
+The uniform grey levels of the flat-field calibration are not written: every
+file here is listed in the Calibration menu, and the calibration
+(python -m opencal.hardware.flat_field) renders them in memory.
+
 Usage
 -----
 python make_calibration.py
 """
 
 from pathlib import Path
-from PIL import Image, ImageDraw
+
+import numpy as np
+from PIL import Image
+
+from opencal.hardware.projection import patterns
 
 W, H = 1920, 1080
+SIZE = (W, H)
 OUT = Path("opencal/utils/calibration")
 OUT.mkdir(parents=True, exist_ok=True)
 
 
-def _save(img: Image.Image, name: str) -> None:
+def _save(frame: np.ndarray, name: str) -> None:
     path = OUT / name
-    img.save(path)
+    Image.fromarray(frame).convert("RGB").save(path)
     print(f"  {path}")
 
 
-def _black() -> tuple[Image.Image, ImageDraw.ImageDraw]:
-    img = Image.new("RGB", (W, H), "black")
-    return img, ImageDraw.Draw(img)
-
-
 # ── dark ─────────────────────────────────────────────────────────────────────
 
 def make_dark() -> None:
-    img, _ = _black()
-    _save(img, "dark.png")
+    _save(patterns.dark(SIZE), "dark.png")
 
 
 # ── 1: full extent ────────────────────────────────────────────────────────────
 
 def make_full_extent() -> None:
     """White 5px border outlining the exact edges of the projected frame."""
-    img, draw = _black()
-    draw.rectangle([0, 0, W - 1, H - 1], outline="white", width=5)
-    _save(img, "cal_1_full_extent.png")
+    _save(patterns.full_extent(SIZE), "cal_1_full_extent.png")
 
 
 # ── 2: 4×4 checkerboard ───────────────────────────────────────────────────────
@@ -60,16 +65,7 @@ def make_checkerboard() -> None:
     Each square is exactly W/4 × H/4 pixels.
     Measure one square with calipers → multiply by 4 for full projected size.
     """
-    img, draw = _black()
-    cw, ch = W // 4, H // 4
-    for r in range(4):
-        for c in range(4):
-            if (r + c) % 2 == 0:
-                draw.rectangle(
-                    [c * cw, r * ch, (c + 1) * cw - 1, (r + 1) * ch - 1],
-                    fill="white",
-                )
-    _save(img, "cal_2_checkerboard.png")
+    _save(patterns.checkerboard(SIZE, (W // 4, H // 4)), "cal_2_checkerboard.png")
 
 
 # ── 3: crosshair ─────────────────────────────────────────────────────────────
@@ -81,24 +77,7 @@ def make_crosshair() -> None:
       = half the projected width / height.
     - Corner squares are solid white, easy to locate with calipers.
     """
-    img, draw = _black()
-
-    # Centre lines
-    draw.line([(W // 2, 0), (W // 2, H - 1)], fill="white", width=3)
-    draw.line([(0, H // 2), (W - 1, H // 2)], fill="white", width=3)
-
-    # 50×50 corner squares at the four corners
-    s = 50
-    corners = [(0, 0), (W - s, 0), (0, H - s), (W - s, H - s)]
-    for x, y in corners:
-        draw.rectangle([x, y, x + s - 1, y + s - 1], fill="white")
-
-    # Small circle at dead centre
-    r = 15
-    cx, cy = W // 2, H // 2
-    draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill="white")
-
-    _save(img, "cal_3_crosshair.png")
+    _save(patterns.crosshair(SIZE), "cal_3_crosshair.png")
 
 
 # ── 4: 10% grid ──────────────────────────────────────────────────────────────
@@ -110,14 +89,7 @@ def make_grid_10pct() -> None:
     Measure the distance between any two adjacent lines to get 10% of the
     projected dimension, then multiply by 10 for the full size.
     """
-    img, draw = _black()
-    for i in range(11):
-        x = int(W * i / 10)
-        y = int(H * i / 10)
-        w = 3 if i == 5 else 1
-        draw.line([(x, 0), (x, H - 1)], fill="white", width=w)
-        draw.line([(0, y), (W - 1, y)], fill="white", width=w)
-    _save(img, "cal_4_grid_10pct.png")
+    _save(patterns.grid(SIZE), "cal_4_grid_10pct.png")
 
 
 # ── main ─────────────────────────────────────────────────────────────────────
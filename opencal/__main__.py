@@ -4,6 +4,7 @@ import threading
 import os
 
 from opencal.hardware import PrintController
+from opencal.hardware.projection import FramePlayer
 from opencal.gui.lcd_gui import LCDGui
 from opencal.gui.menus import build_menu_tree
 from opencal.gui.pygame_app import PygameApp
@@ -21,6 +22,12 @@ def main():
 
     conf = load_config()
     pc = PrintController(conf, video_playing=video_playing)
+
+    # Print frames and still images are drawn by PygameApp instead of cvlc/mpv.
+    player = FramePlayer() if conf.pygame.active else None
+    if player is not None:
+        pc.hardware.projector.attach_player(player)
+
     gui = LCDGui(pc=pc, input_q=input_q, pygame_q=pygame_q, stop_event=stop_event)
     root = build_menu_tree(pc, gui)
     gui.set_root(root)
@@ -34,9 +41,11 @@ def main():
     gui_thread = threading.Thread(target=gui.run, daemon=False)
     gui_thread.start()
 
+    projector = pc.hardware.projector
     pygame_app = PygameApp(
         config=conf.pygame, input_q=input_q, pygame_q=pygame_q, stop_event=stop_event, fps=30,
-        video_playing=video_playing,
+        video_playing=video_playing, player=player,
+        prefetch=[projector.calibration_dir_path / f for f in projector.get_calibration_file_names()],
     )
     try:
         pygame_app.run()
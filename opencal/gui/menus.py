@@ -6,7 +6,6 @@ Add new menus here by composing NavigationMenu / ActionItem / VariableMenu /
 MultiSelectMenu / PyGameMenu / DynamicNavigationMenu instances.
 """
 
-import re
 import shutil
 import threading
 from datetime import datetime
@@ -14,7 +13,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
 from opencal.hardware import PrintController
-from opencal.hardware.usb_manager import unique_path
+from opencal.hardware.usb_manager import parse_rpm, unique_path
 from opencal.gui.lcd_gui import (
     MenuBase,
     NavigationMenu,
@@ -33,19 +32,13 @@ if TYPE_CHECKING:
 _DARK_IMAGE = Path(__file__).parent.parent / "utils" / "calibration" / "dark.png"
 
 
-def _parse_rpm(filename: str) -> float | None:
-    """Extract RPM from filenames like 'part_15rpm.mp4' or 'part_10.5rpm.mp4'."""
-    match = re.search(r"_(\d+(?:\.\d+)?)rpm", filename, re.IGNORECASE)
-    return float(match.group(1)) if match else None
-
-
 # ---------------------------------------------------------------------------
 # Custom item types
 # ---------------------------------------------------------------------------
 
 
 class PrintLaunchItem(MenuBase):
-    """Represents a single .mp4 file in the 'Print from USB' menu."""
+    """Represents a single print file (.mp4 or .npy/.npz sinogram) in the 'Print from USB' menu."""
 
     def __init__(self, filename: str, pc: PrintController):
         self.title = filename
@@ -56,12 +49,21 @@ class PrintLaunchItem(MenuBase):
     def on_activate(self, gui: "LCDGui") -> None:
         self._gui_ref = gui
 
+        try:
+            full_path = self._pc.hardware.usb_device.get_full_path(self._filename)
+        except FileNotFoundError as e:
+            print(f"ERROR: {e}")
+            gui.splash("File not found")
+            return
+
         # Pre-set RPM from filename if it encodes one (e.g. part_15rpm.mp4)
-        parsed = _parse_rpm(self._filename)
+        parsed = parse_rpm(self._filename)
         if parsed is not None:
             self._pc.hardware.stepper.set_rpm(parsed)
 
         self._pc.hardware.projector.display_image(_DARK_IMAGE)
+        # Decode into the frame cache while the operator picks the RPM.
+        self._pc.hardware.projector.prepare_video(full_path)
         gui.push(
             VariableMenu(
                 title="RPM",
@@ -323,6 +325,56 @@ def build_menu_tree(pc: PrintController, gui: "LCDGui") -> NavigationMenu:
         success = pc.hardware.camera.capture_image(save_path)
         gui.splash(success_msg if success else "Image error")
 
+    def _flat_field_calibration() -> None:
+        from opencal.hardware import flat_field
+
+        projector = pc.hardware.projector
+
+        def _run() -> None:
+            gui.splash("Calibrating...")
+            try:
+                result = flat_field.calibrate(projector, pc.hardware.camera)
+            except Exception as e:
+                print(f"ERROR: Flat-field calibration failed: {e}")
+                gui.splash("Calibration failed")
+                return
+            _ = flat_field.save_result(result, projector)
+            gui.splash(f"Gamma {result.gamma:.2f}", duration=2.0)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _geometry_calibration() -> None:
+        from opencal.hardware import homography
+
+        def _run() -> None:
+            gui.splash("Calibrating...")
+            try:
+                result = homography.calibrate(pc.hardware.projector, pc.hardware.camera)
+                homography.save_result(result, pc.hardware.projector)
+            except Exception as e:
+                print(f"ERROR: Geometry calibration failed: {e}")
+                gui.splash("Calibration failed")
+                return
+            gui.splash(f"{result.corners} pts, {result.rms_px:.2f} px", duration=2.0)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _auto_vial_width() -> None:
+        from opencal.hardware.vial_width import measure_vial_width
+
+        def _run() -> None:
+            gui.splash("Measuring...")
+            try:
+                result = measure_vial_width(pc.hardware.projector, pc.hardware.camera)
+            except Exception as e:
+                print(f"ERROR: Vial width measurement failed: {e}")
+                gui.splash("Vial not found")
+                return
+            _vial_px[0] = pc.hardware.projector.vial_width
+            gui.splash(f"Vial: {result.width:.0f} px", duration=2.0)
+
+        threading.Thread(target=_run, daemon=True).start()
+
     def _toggle_usb_video_prompt() -> None:
         pc.ui_config.prompt_usb_video_save = not pc.ui_config.prompt_usb_video_save
         state = "On" if pc.ui_config.prompt_usb_video_save else "Off"
@@ -368,6 +420,8 @@ def build_menu_tree(pc: PrintController, gui: "LCDGui") -> NavigationMenu:
             ],
         ),
         ActionItem("USB video prompt", _toggle_usb_video_prompt),
+        ActionItem("Flat-field calib", _flat_field_calibration),
+        ActionItem("Geometry calib", _geometry_calibration),
         PyGameMenu(
             title="Find Vial Width",
             input_q=input_q,
@@ -381,6 +435,7 @@ def build_menu_tree(pc: PrintController, gui: "LCDGui") -> NavigationMenu:
                 "Click to return",
             ],
         ),
+        ActionItem("Auto vial width", _auto_vial_width),
     ]
 
     return NavigationMenu(
@@ -30,8 +30,8 @@ class AlignmentMode(BasePygameMode):
     @override
     def on_activate(self) -> None:
         self._y_offset = 0
-        raw = pygame.image.load(str(self._image_path)).convert()
-        self._surface = pygame.transform.scale(raw, (self.app.width, self.app.height))
+        self.invalidate()
+        self._surface = self.app.surfaces.get(self._image_path, (self.app.width, self.app.height))
 
     @override
     def on_deactivate(self) -> None:
@@ -40,6 +40,7 @@ class AlignmentMode(BasePygameMode):
     @override
     def on_encoder_delta(self, delta: int) -> None:
         self._y_offset += delta * _STEP_PX
+        self.invalidate()
 
     @override
     def on_button(self) -> None:
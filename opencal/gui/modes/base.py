@@ -18,10 +18,27 @@ class BasePygameMode(abc.ABC):
     Modes signal completion by calling self.app.signal_done(result), which puts
     ("done", result) on pygame_q and causes LCDGui to fire the exit callback and
     pop the PyGameMenu.
+
+    PygameApp only redraws when a mode asks for it: the whole display once on
+    activation, then whatever the mode passes to invalidate() when its picture
+    changes. Between invalidations nothing is drawn or presented.
     """
 
     def __init__(self, app: "PygameApp") -> None:
         self.app = app
+        self._dirty: list[pygame.Rect] | None = None  # None: the whole display
+
+    def invalidate(self, rect: pygame.Rect | None = None) -> None:
+        """Ask for a redraw of `rect`, or of the whole display if None."""
+        if rect is None:
+            self._dirty = None
+        elif self._dirty is not None:
+            self._dirty.append(rect)
+
+    def take_dirty(self) -> list[pygame.Rect] | None:
+        """Areas invalidated since the last call: None for the whole display, [] for nothing."""
+        dirty, self._dirty = self._dirty, []
+        return dirty
 
     def on_activate(self) -> None:
         """Called once when this mode becomes the active mode. Reset per-run state here."""
@@ -41,5 +58,5 @@ class BasePygameMode(abc.ABC):
 
     @abc.abstractmethod
     def on_frame(self, surf: pygame.Surface) -> None:
-        """Called once per frame after the surface is cleared to black. Draw here."""
+        """Draw the whole picture on `surf`, cleared to black, after an invalidate()."""
         ...
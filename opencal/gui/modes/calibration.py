@@ -25,8 +25,8 @@ class CalibrationMode(BasePygameMode):
 
     @override
     def on_activate(self) -> None:
-        raw = pygame.image.load(str(self._image_path)).convert()
-        self._surface = pygame.transform.scale(raw, (self.app.width, self.app.height))
+        self._surface = self.app.surfaces.get(self._image_path, (self.app.width, self.app.height))
+        self.invalidate()
 
     @override
     def on_deactivate(self) -> None:
@@ -22,6 +22,7 @@ class VialWidthMode(BasePygameMode):
 
     SCROLL_RATIO = 2
     INITIAL_WIDTH = 200
+    _LABEL_POS = (10, 10)
 
     def __init__(
         self,
@@ -31,12 +32,14 @@ class VialWidthMode(BasePygameMode):
         super().__init__(app)
         self.rect_width: int = self.INITIAL_WIDTH
         self._font: pygame.font.Font | None = None
+        self._label_w = 0
         self._on_width_change = on_width_change
 
     @override
     def on_activate(self) -> None:
         self.rect_width = self.INITIAL_WIDTH
         self._font = pygame.font.Font(None, 60)
+        self.invalidate()
         if self._on_width_change:
             self._on_width_change(self.rect_width)
 
@@ -47,10 +50,21 @@ class VialWidthMode(BasePygameMode):
     @override
     def on_encoder_delta(self, delta: int) -> None:
         phys_w = min(self.app.width, self.app.height)
+        old = self._bar_rect(self.rect_width)
         self.rect_width = max(0, min(phys_w, self.rect_width + delta * self.SCROLL_RATIO))
+        # Only the bar edges and the label change.
+        self.invalidate(old.union(self._bar_rect(self.rect_width)))
+        if self._font:
+            label_w, label_h = self._font.size(f"{self.rect_width} px")
+            self.invalidate(pygame.Rect(self._LABEL_POS, (max(label_w, self._label_w), label_h)))
         if self._on_width_change:
             self._on_width_change(self.rect_width)
 
+    def _bar_rect(self, width: int) -> pygame.Rect:
+        # Physical width is the shorter dimension — correct for a rotated projector
+        phys_w = min(self.app.width, self.app.height)
+        return pygame.Rect(self.app.width // 2 - width // 2, 0, width, phys_w)
+
     @override
     def on_button(self) -> None:
         self.app.signal_done({"vial_width": self.rect_width})
@@ -58,14 +72,9 @@ class VialWidthMode(BasePygameMode):
     @override
     def on_frame(self, surf: pygame.Surface) -> None:
         surf.fill((0, 0, 0))
-        w, h = surf.get_size()
-
-        # Physical width is the shorter dimension — correct for a rotated projector
-        phys_w = min(w, h)
-        left = w // 2 - self.rect_width // 2
-        pygame.draw.rect(surf, "white", (left, 0, self.rect_width, phys_w))
+        pygame.draw.rect(surf, "white", self._bar_rect(self.rect_width))
 
         # Pixel count overlay (yellow so it's visible against the white bar)
         if self._font:
             label = self._font.render(f"{self.rect_width} px", True, (255, 255, 0))
-            surf.blit(label, (10, 10))
+            self._label_w = surf.blit(label, self._LABEL_POS).width
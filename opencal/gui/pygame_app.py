@@ -1,6 +1,6 @@
 import queue
 import threading
-import time
+from pathlib import Path
 from typing import Any, final
 
 import pygame
@@ -10,9 +10,15 @@ from opencal.gui.modes.base import BasePygameMode
 from opencal.gui.modes.vial_width import VialWidthMode
 from opencal.gui.modes.calibration import CalibrationMode
 from opencal.gui.modes.alignment import AlignmentMode
+from opencal.gui.surface_cache import SurfaceCache
+from opencal.hardware.projection import FramePlayer
 from opencal.utils.config import PygameConfig
 
 
+# Sentinel for a display whose contents are unknown, e.g. after handing it to cvlc
+_NOTHING_DRAWN = object()
+
+
 @final
 class PygameApp:
     def __init__(
@@ -23,6 +29,8 @@ class PygameApp:
         stop_event: threading.Event,
         video_playing: threading.Event,
         fps: int = 30,
+        player: FramePlayer | None = None,
+        prefetch: list[Path] | None = None,
     ):
         self.active = config.active
         self.input_q: queue.Queue[InputEvent] = input_q
@@ -30,6 +38,10 @@ class PygameApp:
         self.stop_event = stop_event
         self.video_playing = video_playing
         self.fps = fps
+        self.player = player
+        # Scaled images for the modes; `prefetch` is loaded into it once the display is up.
+        self.surfaces = SurfaceCache(int(config.surface_cache_mb * 2**20))
+        self._prefetch = prefetch or []
         self._running = False
         self.width = 1920
         self.height = 1080
@@ -45,48 +57,106 @@ class PygameApp:
             print("WARNING: PyGame deactivated from config, skipping PyGame init.")
             return
 
-        while not self.stop_event.is_set():
-            _ = pygame.init()
-            try:
-                screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-            except Exception as e:
-                print(f"WARNING: PyGame display init failed ({e}), running LCD-only.")
-                return
-            pygame.mouse.set_visible(False)
-            self.width, self.height = screen.get_size()
-            clock = pygame.time.Clock()
-            self._running = True
-
+        # One display for the life of the process: GUI modes and print projection
+        # share it, and it is only stepped aside (not torn down) for cvlc/mpv.
+        _ = pygame.init()
+        try:
+            screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        except Exception as e:
+            print(f"WARNING: PyGame display init failed ({e}), running LCD-only.")
+            return
+        pygame.mouse.set_visible(False)
+        self.width, self.height = screen.get_size()
+        if self.player is not None:
+            self.player.bind_display((self.width, self.height))
+        if self._prefetch:
+            self.surfaces.prefetch(self._prefetch, (self.width, self.height))
+        clock = pygame.time.Clock()
+        self._running = True
+        # What the display currently shows: the player, a mode, or None for black
+        on_screen: object = _NOTHING_DRAWN
+
+        try:
             while self._running and not self.stop_event.is_set():
                 if self.video_playing.is_set():
-                    break
+                    screen = self._yield_display(screen)
+                    on_screen = _NOTHING_DRAWN
+                    continue
 
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         self._running = False
 
-                while not self.input_q.empty():
-                    try:
-                        msg = self.input_q.get_nowait()
-                        self._dispatch(msg)
-                    except queue.Empty:
-                        break
-
-                _ = screen.fill((0, 0, 0))
-                if self._active_mode is not None:
-                    self._active_mode.on_frame(screen)
-                pygame.display.flip()
+                self._drain_input()
+
+                # The in-process projector takes precedence over any GUI mode.
+                player = self.player
+                if player is not None:
+                    if on_screen is player and player.unchanged:
+                        _ = clock.tick(self.fps)
+                        continue
+                    cleared = player.active
+                    if cleared:
+                        _ = screen.fill((0, 0, 0))
+                    # Also applies a pending stop(), drawing nothing.
+                    if player.render(screen):
+                        if cleared:
+                            pygame.display.flip()
+                            player.presented()
+                            on_screen = player
+                        else:
+                            # play() raced the check above onto an uncleared screen; redo it.
+                            on_screen = _NOTHING_DRAWN
+                        _ = clock.tick(max(self.fps, player.fps))
+                        continue
+
+                # Modes are redrawn only where they invalidated, or fully when they take over.
+                mode = self._active_mode
+                dirty = mode.take_dirty() if mode is not None else []
+                if on_screen is not mode:
+                    dirty = None
+                if dirty is None or dirty:
+                    _ = screen.fill((0, 0, 0))
+                    if mode is not None:
+                        mode.on_frame(screen)
+                    if dirty is None:
+                        pygame.display.flip()
+                    else:
+                        pygame.display.update(dirty)
+                on_screen = mode
                 _ = clock.tick(self.fps)
-
+        finally:
+            if self.player is not None:
+                self.player.unbind_display()
             pygame.quit()
 
-            if not self._running or self.stop_event.is_set():
+    def _drain_input(self) -> None:
+        while not self.input_q.empty():
+            try:
+                msg = self.input_q.get_nowait()
+                self._dispatch(msg)
+            except queue.Empty:
                 break
 
-            while self.video_playing.is_set():
-                if self.stop_event.is_set():
-                    return
-                time.sleep(0.1)
+    def _yield_display(self, screen: pygame.Surface) -> pygame.Surface:
+        """Minimise the window while cvlc/mpv owns the projector, then take it back.
+
+        The pygame window, its surfaces and the modes' fonts stay alive, so
+        handing back costs one set_mode() on the existing window instead of a
+        full pygame.init().
+        """
+        if self.player is not None:
+            self.player.unbind_display()
+        _ = pygame.display.iconify()
+        while self.video_playing.is_set() and not self.stop_event.is_set():
+            # Keep the window responsive and input flowing; nothing is drawn.
+            _ = pygame.event.get()
+            self._drain_input()
+            _ = self.stop_event.wait(0.05)
+        screen = pygame.display.set_mode((self.width, self.height), pygame.FULLSCREEN)
+        if self.player is not None:
+            self.player.bind_display((self.width, self.height))
+        return screen
 
     def _dispatch(self, msg: InputEvent) -> None:
         match msg:
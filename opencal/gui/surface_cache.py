@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import final
+
+import pygame
+
+_Key = tuple[str, int, tuple[int, int]]
+
+
+def _load(path: Path, size: tuple[int, int]) -> pygame.Surface:
+    raw = pygame.image.load(str(path))
+    if pygame.display.get_surface() is not None:
+        raw = raw.convert()
+    if raw.get_size() == size:
+        return raw
+    return pygame.transform.scale(raw, size)
+
+
+@final
+class SurfaceCache:
+    """Images loaded and scaled for the display, shared by the pygame modes.
+
+    Entries are keyed by path, modification time and display size, so an edited
+    file is reloaded, and are evicted least recently used first once their
+    pixels exceed `budget_bytes`. Safe to use from any thread.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[_Key, pygame.Surface] = OrderedDict()
+        self._bytes = 0
+        self._prefetch_thread: threading.Thread | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, path: Path, size: tuple[int, int]) -> pygame.Surface:
+        """`path` scaled to `size`, loading it if it is not cached. Do not draw on the result."""
+        key = self._key(path, size)
+        with self._lock:
+            surface = self._entries.get(key)
+            if surface is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return surface
+            self.misses += 1
+        surface = _load(path, size)
+        _ = self._insert(key, surface)
+        return surface
+
+    def prefetch(self, paths: list[Path], size: tuple[int, int]) -> None:
+        """Load `paths` in a background thread, stopping before anything would be evicted."""
+        self._prefetch_thread = threading.Thread(
+            target=self._prefetch, args=(list(paths), size), daemon=True
+        )
+        self._prefetch_thread.start()
+
+    def _prefetch(self, paths: list[Path], size: tuple[int, int]) -> None:
+        for path in paths:
+            try:
+                key = self._key(path, size)
+                with self._lock:
+                    if key in self._entries:
+                        continue
+                if not self._insert(key, _load(path, size), evict=False):
+                    return
+            except (OSError, pygame.error) as e:
+                print(f"WARNING: Could not prefetch {path}: {e}")
+
+    @staticmethod
+    def _key(path: Path, size: tuple[int, int]) -> _Key:
+        return str(path), path.stat().st_mtime_ns, size
+
+    def _insert(self, key: _Key, surface: pygame.Surface, evict: bool = True) -> bool:
+        """Cache `surface`; False if it does not fit (without evicting, when `evict` is False)."""
+        nbytes = surface.get_pitch() * surface.get_height()
+        if nbytes > self.budget_bytes:
+            return False
+        path, _, size = key
+        with self._lock:
+            if not evict and self._bytes + nbytes > self.budget_bytes:
+                return False
+            # An older version of the same file at the same size is dead weight.
+            for stale in [k for k in self._entries if k[0] == path and k[2] == size and k != key]:
+                self._drop(stale)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = surface
+            self._bytes += nbytes
+            while self._bytes > self.budget_bytes:
+                self._drop(next(iter(self._entries)))
+        return True
+
+    def _drop(self, key: _Key) -> None:
+        surface = self._entries.pop(key)
+        self._bytes -= surface.get_pitch() * surface.get_height()
@@ -1,6 +1,8 @@
 import time
 from typing import final
 from pathlib import Path
+
+import numpy as np
 from picamera2 import Picamera2, Preview
 from picamera2.encoders import H264Encoder
 from libcamera import controls  # pyright: ignore
@@ -17,6 +19,10 @@ class CameraController:
         self.cam_type = config.type
         self.camera_index = config.index
         self.save_path = Path(config.save_path)
+        self.mm_per_px = config.mm_per_px
+        self.plane_homography = None
+        if config.plane_homography is not None:
+            self.plane_homography = np.asarray(config.plane_homography, dtype=float)
 
         self.capture = None
         self._stream_thread = None
@@ -77,6 +83,39 @@ class CameraController:
             print(f"ERROR: Image capture failed: {e}")
             return False
 
+    def capture_array(self) -> np.ndarray | None:
+        """Capture one frame of the still stream as an (h, w, c) uint8 array, or None."""
+        if not self.picam:
+            print("WARNING: No camera connected, cannot capture image.")
+            return None
+        try:
+            if not self.picam.started:
+                self.start_camera()
+            return self.picam.capture_array("main")
+        except Exception as e:
+            print(f"ERROR: Image capture failed: {e}")
+            return None
+
+    def set_exposure(self, exposure_us: int | None, analogue_gain: float = 1.0):
+        """Fix exposure time and gain (and white balance) so captures are comparable.
+
+        None returns to automatic exposure.
+        """
+        if not self.picam:
+            print("WARNING: No camera connected, cannot start camera.")
+            return
+        if exposure_us is None:
+            self.picam.set_controls({"AeEnable": True, "AwbEnable": True})
+            return
+        self.picam.set_controls(
+            {
+                "AeEnable": False,
+                "AwbEnable": False,
+                "ExposureTime": exposure_us,
+                "AnalogueGain": analogue_gain,
+            }
+        )
+
     def set_focus(self, diopters: float):
         """Turns off autofocus and sets a manual focal distance in diopters (m^-1)"""
         if not self.picam:
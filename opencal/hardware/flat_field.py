@@ -0,0 +1,230 @@
+"""
+flat_field.py — Measure the projector's response and brightness map with the camera.
+
+The projector shows the dark, full-extent and uniform flat-level patterns
+(rendered in memory at the display resolution) while the camera, at fixed
+exposure, captures each one. Every capture is reduced to a coarse grid of
+display cells, located in the camera image through the projector-camera
+homography (Projector.camera_homography, from opencal.hardware.homography)
+when there is one, otherwise by splitting the bounding box of the full-extent
+border, and the response of each cell is fitted as
+
+    signal = amplitude * (level / 255) ** gamma
+
+by linear least squares on the logs, solved in closed form for all cells at
+once. The gain map is the dimmest cell's amplitude over each cell's amplitude,
+saved as a small uint8 array that IntensityCorrection stretches to the display.
+save_result() stores it with the gamma in config.json.
+
+Capture and fit are pipelined: while a capture is reduced on a worker thread
+the next level is already being projected and left to settle.
+
+Run from the command line on the printer:
+
+    python -m opencal.hardware.flat_field [--exposure 20000] [--grid 96x54]
+"""
+
+import argparse
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .camera_controller import CameraController
+from .projection import patterns
+from .projector_controller import Projector
+
+# Cells below this fraction of the brightest signal are treated as noise for that level
+_NOISE_FLOOR = 0.02
+
+
+@dataclass
+class FlatFieldResult:
+    gain: np.ndarray  # (grid h, grid w) uint8, 255 = full drive
+    gamma: float  # median fitted exponent
+    gamma_map: np.ndarray  # per cell exponent
+    amplitude: np.ndarray  # per cell signal at level 255, camera units
+    frame_box: tuple[int, int, int, int]  # x0, y0, x1, y1 of the projected frame in the camera
+
+
+def _gray(capture: np.ndarray) -> np.ndarray:
+    capture = capture.astype(np.float32)
+    return capture[..., :3].mean(axis=2) if capture.ndim == 3 else capture
+
+
+def find_frame_box(extent: np.ndarray, dark: np.ndarray) -> tuple[int, int, int, int]:
+    """Bounding box of the projected border in the camera image."""
+    signal = extent - dark
+    bright = signal > 0.5 * np.percentile(signal, 99.9)
+    rows = np.flatnonzero(bright.any(axis=1))
+    cols = np.flatnonzero(bright.any(axis=0))
+    if len(rows) < 2 or len(cols) < 2:
+        raise RuntimeError("Projected frame not found in the camera image")
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def reduce_to_grid(
+    image: np.ndarray, dark: np.ndarray, box: tuple[int, int, int, int], grid: tuple[int, int]
+) -> np.ndarray:
+    """Dark-subtracted mean of `image` over a (gh, gw) grid of cells covering `box`."""
+    x0, y0, x1, y1 = box
+    gw, gh = grid
+    signal = image[y0:y1, x0:x1] - dark[y0:y1, x0:x1]
+    # Trim so the crop divides evenly into cells, then average each block.
+    ch, cw = signal.shape[0] // gh, signal.shape[1] // gw
+    signal = signal[: ch * gh, : cw * gw]
+    return signal.reshape(gh, ch, gw, cw).mean(axis=(1, 3))
+
+
+def sample_grid(
+    image: np.ndarray,
+    dark: np.ndarray,
+    h: np.ndarray,
+    display_size: tuple[int, int],
+    grid: tuple[int, int],
+    samples: int = 8,
+) -> np.ndarray:
+    """Dark-subtracted mean of `image` over a (gh, gw) grid of display cells.
+
+    Each cell is sampled at `samples` x `samples` points, taken to camera
+    pixels through the display -> camera homography `h`.
+    """
+    dw, dh = display_size
+    gw, gh = grid
+    xs = (np.arange(gw * samples) + 0.5) * (dw / (gw * samples))
+    ys = (np.arange(gh * samples) + 0.5) * (dh / (gh * samples))
+    px, py = np.meshgrid(xs, ys)
+    w = h[2, 0] * px + h[2, 1] * py + h[2, 2]
+    u = (h[0, 0] * px + h[0, 1] * py + h[0, 2]) / w
+    v = (h[1, 0] * px + h[1, 1] * py + h[1, 2]) / w
+    cols = np.clip(np.rint(u).astype(np.intp), 0, image.shape[1] - 1)
+    rows = np.clip(np.rint(v).astype(np.intp), 0, image.shape[0] - 1)
+    signal = image[rows, cols] - dark[rows, cols]
+    return signal.reshape(gh, samples, gw, samples).mean(axis=(1, 3))
+
+
+def fit_response(levels: np.ndarray, signals: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Per-cell (amplitude, gamma) of signal = amplitude * (level / 255) ** gamma.
+
+    `signals` is (n_levels, ...). Weighted least squares of log(signal) on
+    log(level / 255), ignoring samples in the noise floor, solved with the
+    closed-form 2x2 normal equations so every cell is fitted at once.
+    """
+    x = np.log(levels / 255.0).reshape(-1, *([1] * (signals.ndim - 1)))
+    w = (signals > _NOISE_FLOOR * signals.max()).astype(np.float64)
+    y = np.log(np.maximum(signals, 1e-6))
+
+    s0, s1, s2 = w.sum(0), (w * x).sum(0), (w * x * x).sum(0)
+    t0, t1 = (w * y).sum(0), (w * x * y).sum(0)
+    det = s0 * s2 - s1 * s1
+    ok = det > 1e-12
+    det = np.where(ok, det, 1.0)
+    gamma = np.where(ok, (s0 * t1 - s1 * t0) / det, np.nan)
+    log_amp = np.where(ok, (t0 - gamma * s1) / np.maximum(s0, 1), -np.inf)
+    return np.exp(log_amp), gamma
+
+
+def gain_from_amplitude(amplitude: np.ndarray, reference_percentile: float = 2.0) -> np.ndarray:
+    """uint8 gain that brings every cell down to the dimmest (robust) cell."""
+    valid = np.isfinite(amplitude) & (amplitude > 0)
+    reference = np.percentile(amplitude[valid], reference_percentile)
+    gain = np.where(valid, reference / np.where(valid, amplitude, 1.0), 1.0)
+    return np.round(np.clip(gain, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+def calibrate(
+    projector: Projector,
+    camera: CameraController,
+    exposure_us: int = 20000,
+    grid: tuple[int, int] = (96, 54),
+    settle_s: float = 0.5,
+) -> FlatFieldResult:
+    """Project the calibration levels, capture them and fit the response and gain map.
+
+    With the projector's camera_homography, each gain cell is the display cell
+    it stands for, wherever the camera sees it. Without one, the grid splits
+    the camera's axis-aligned bounding box of the projected frame, which
+    assumes the camera sees the frame square-on, upright and unmirrored.
+    """
+    display_size = projector.display_size
+    h = projector.camera_homography
+    levels = np.array(patterns.FLAT_LEVELS, dtype=np.float64)
+
+    def show_and_capture(frame: np.ndarray) -> np.ndarray:
+        projector.display_frame(frame)
+        time.sleep(settle_s)
+        capture = camera.capture_array()
+        if capture is None:
+            raise RuntimeError("Camera capture failed")
+        return capture
+
+    camera.start_camera()
+    camera.set_exposure(exposure_us)
+    try:
+        dark = _gray(show_and_capture(patterns.dark(display_size)))
+        box = find_frame_box(_gray(show_and_capture(patterns.full_extent(display_size))), dark)
+        print(f"INFO: Projected frame at {box} in the camera image")
+        if h is None:
+            print("WARNING: No camera homography; assuming camera and display axes line up.")
+
+        def reduce(capture: np.ndarray) -> np.ndarray:
+            if h is None:
+                return reduce_to_grid(_gray(capture), dark, box, grid)
+            return sample_grid(_gray(capture), dark, h, display_size, grid)
+
+        # Reduce capture i on the worker while level i + 1 is shown and settles.
+        signals: list[Future[np.ndarray]] = []
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            for level in patterns.FLAT_LEVELS:
+                capture = show_and_capture(patterns.flat(display_size, level))
+                signals.append(pool.submit(reduce, capture))
+            stack = np.stack([f.result() for f in signals])
+    finally:
+        camera.set_exposure(None)
+        projector.display_frame(patterns.dark(display_size))
+
+    amplitude, gamma_map = fit_response(levels, stack)
+    gamma = float(np.nanmedian(gamma_map))
+    return FlatFieldResult(gain_from_amplitude(amplitude), gamma, gamma_map, amplitude, box)
+
+
+def save_result(result: FlatFieldResult, projector: Projector, path: Path | None = None) -> Path:
+    """Save the gain map, store it and the gamma in config.json and apply both to `projector`.
+
+    `path` defaults to the configured gain map, else gain_map.npy in the calibration folder.
+    Returns where the gain map was saved.
+    """
+    from opencal.utils.config import update_config
+
+    path = path or projector.gain_map_path or projector.calibration_dir_path / "gain_map.npy"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, result.gain)
+    update_config("projector", {"gamma": result.gamma, "gain_map_path": str(path)})
+    projector.set_intensity_calibration(result.gamma, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--exposure", type=int, default=20000, help="camera exposure in us")
+    _ = parser.add_argument("--grid", default="96x54", help="gain map cells, WxH")
+    _ = parser.add_argument("--settle", type=float, default=0.5, help="seconds per pattern")
+    _ = parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+    gw, gh = map(int, args.grid.split("x"))
+
+    from opencal.utils.config import Config
+
+    cfg = Config()
+    projector = Projector(cfg.projector)
+    camera = CameraController(cfg.camera)
+    result = calibrate(projector, camera, args.exposure, (gw, gh), args.settle)
+    out = save_result(result, projector, args.out)
+    print(f"Gamma {result.gamma:.3f}; gain {result.gain.min()}..{result.gain.max()} saved to {out}")
+    print("Saved gamma and gain_map_path to config.json")
+
+
+if __name__ == "__main__":
+    main()
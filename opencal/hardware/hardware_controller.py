@@ -69,6 +69,9 @@ class HardwareController:
             self.errors.append(f"USB device failed: {e}")
             self.healthy = False
 
+        if hasattr(self, "projector") and hasattr(self, "usb_device"):
+            self.projector.attach_media(self.usb_device)
+
         try:
             self.camera = CameraController(config.camera)
         except Exception as e:
@@ -0,0 +1,474 @@
+"""
+homography.py — Projector-camera homography and pixel pitch from projected checkerboards.
+
+Replaces measuring cal_2_checkerboard.png and cal_4_grid_10pct.png with
+calipers. With a flat target (e.g. a white card) where the vial stands, the
+projector shows a checkerboard and its inverse while the camera, at fixed
+exposure, captures both. Their difference is positive on one colour of square
+and negative on the other, so every inner corner is a saddle point; after a
+box-filter blur the corner response
+
+    R = Dxy ** 2 - Dxx * Dyy
+
+peaks there and nowhere along the edges. Corners are not searched for over the
+whole image: the four lit quadrants give a rough homography that predicts
+where each corner must be, and the response peak in a window around every
+prediction is gathered in one indexing operation and refined to subpixel by a
+parabola fit. The homography from display to camera pixels is then fitted to
+all corners by normalised DLT, twice, the second time with narrower windows
+around the refined predictions.
+
+The homography maps display pixels to camera pixels, so it holds the
+camera's own viewing angle as well as the projector's. Separating the two
+needs the camera's geometry, CameraConfig.plane_homography: camera pixels to
+mm on the target, measured once from a printed checkerboard of known square
+size (calibrate_camera_plane()). With it:
+
+keystone     the display -> target homography divided by its closest
+             similarity (scale, rotation, shift and possibly mirroring),
+             i.e. the projector's projective distortion alone, in display
+             pixel units, as RemapCalibration expects it.
+pixel pitch  mm per display pixel at the display centre, from the same
+             display -> target homography.
+
+Without it there is no keystone, and the pixel pitch is camera mm per pixel
+(CameraConfig.mm_per_px) times camera pixels per display pixel, which is
+only right for a camera square-on to the target.
+
+save_result() stores the homography and pixel pitch. The keystone changes
+every later print, so it is stored only on request (save_keystone(), or
+--save-keystone), after checking how far from square the frame lands.
+
+Run from the command line on the printer:
+
+    python -m opencal.hardware.homography --camera-board 9x6 --camera-square 10 [--save]
+    python -m opencal.hardware.homography [--square 120] [--exposure 20000] [--save] [--save-keystone]
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .camera_controller import CameraController
+from .projection import patterns
+from .projector_controller import Projector
+
+# Corners whose response is below this fraction of the median corner response are dropped
+_MIN_RESPONSE = 0.2
+# Captures are binned down to about this many pixels on the long side before fitting
+_WORK_SIZE = 1600
+
+
+@dataclass
+class HomographyResult:
+    homography: np.ndarray  # 3x3, display pixels -> camera pixels
+    keystone: np.ndarray | None  # 3x3, display pixels -> undistorted display pixels
+    pixel_pitch_mm: float | None  # None without CameraConfig.mm_per_px or plane_homography
+    corners: int  # corners used in the fit
+    rms_px: float  # reprojection error in camera pixels
+    # Largest deviation from 90 degrees of the projected frame's corners on the target;
+    # None without CameraConfig.plane_homography
+    skew_deg: float | None = None
+
+
+def inner_corners(display_size: tuple[int, int], square_px: int) -> np.ndarray:
+    """(n, 2) display x, y of the corners where four squares of patterns.checkerboard() meet."""
+    dw, dh = display_size
+    ox, oy = (dw % square_px) // 2, (dh % square_px) // 2
+    xs = np.arange(ox + square_px, dw - square_px // 2, square_px, dtype=np.float64)
+    ys = np.arange(oy + square_px, dh - square_px // 2, square_px, dtype=np.float64)
+    gx, gy = np.meshgrid(xs, ys)
+    return np.stack([gx.ravel(), gy.ravel()], axis=1)
+
+
+def quadrant_centres(display_size: tuple[int, int]) -> np.ndarray:
+    """Display centres of patterns.quadrant() 0..3."""
+    dw, dh = display_size
+    return np.array([[dw / 4, dh / 4], [3 * dw / 4, dh / 4], [3 * dw / 4, 3 * dh / 4], [dw / 4, 3 * dh / 4]])
+
+
+def apply_homography(h: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Map (n, 2) points through a 3x3 homography."""
+    q = points @ h[:, :2].T + h[:, 2]
+    return q[:, :2] / q[:, 2:]
+
+
+def _normaliser(points: np.ndarray) -> np.ndarray:
+    """Similarity moving `points` to zero mean and mean distance sqrt(2)."""
+    mean = points.mean(axis=0)
+    scale = math.sqrt(2) / max(float(np.linalg.norm(points - mean, axis=1).mean()), 1e-12)
+    return np.array([[scale, 0, -scale * mean[0]], [0, scale, -scale * mean[1]], [0, 0, 1]])
+
+
+def fit_homography(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Least-squares homography taking (n >= 4, 2) `src` to `dst` (normalised DLT)."""
+    ts, td = _normaliser(src), _normaliser(dst)
+    s = apply_homography(ts, src)
+    d = apply_homography(td, dst)
+    n = len(s)
+    a = np.zeros((2 * n, 9))
+    a[0::2, 0:2], a[0::2, 2] = s, 1
+    a[0::2, 6:8], a[0::2, 8] = -d[:, :1] * s, -d[:, 0]
+    a[1::2, 3:5], a[1::2, 5] = s, 1
+    a[1::2, 6:8], a[1::2, 8] = -d[:, 1:] * s, -d[:, 1]
+    h = np.linalg.svd(a)[2][-1].reshape(3, 3)
+    h = np.linalg.inv(td) @ h @ ts
+    return h / h[2, 2]
+
+
+def fit_similarity(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Closest scale + rotation + shift (mirrored if that fits better) taking `src` to `dst`."""
+    zs = src[:, 0] + 1j * src[:, 1]
+    zd = dst[:, 0] + 1j * dst[:, 1]
+    zs0, zd0 = zs - zs.mean(), zd - zd.mean()
+    best = None
+    for mirror in (False, True):
+        z = np.conj(zs0) if mirror else zs0
+        a = np.vdot(z, zd0) / np.vdot(z, z)
+        err = float(np.abs(a * z - zd0).sum())
+        if best is None or err < best[0]:
+            best = (err, a, mirror)
+    assert best is not None
+    _, a, mirror = best
+    m = np.array([[a.real, -a.imag], [a.imag, a.real]])
+    if mirror:
+        m = m @ np.diag([1.0, -1.0])
+    t = np.array([zd.mean().real, zd.mean().imag]) - m @ np.array([zs.mean().real, zs.mean().imag])
+    return np.array([[m[0, 0], m[0, 1], t[0]], [m[1, 0], m[1, 1], t[1]], [0, 0, 1]])
+
+
+def keystone_from_homography(h: np.ndarray, display_size: tuple[int, int], square_px: int) -> np.ndarray:
+    """Projective part of `h`: its closest similarity, over the corner grid, divided out."""
+    corners = inner_corners(display_size, square_px)
+    similarity = fit_similarity(corners, apply_homography(h, corners))
+    k = np.linalg.inv(similarity) @ h
+    return k / k[2, 2]
+
+
+def corner_skew_deg(h: np.ndarray, display_size: tuple[int, int]) -> float:
+    """Largest deviation from a right angle of the display's corners mapped through `h`."""
+    dw, dh = display_size
+    quad = apply_homography(h, np.array([[0, 0], [dw, 0], [dw, dh], [0, dh]], dtype=np.float64))
+    worst = 0.0
+    for i in range(4):
+        a, b = quad[i - 1] - quad[i], quad[(i + 1) % 4] - quad[i]
+        cos = float(a @ b) / float(np.linalg.norm(a) * np.linalg.norm(b))
+        worst = max(worst, abs(90 - math.degrees(math.acos(min(max(cos, -1.0), 1.0)))))
+    return worst
+
+
+def camera_px_per_display_px(h: np.ndarray, at: tuple[float, float]) -> float:
+    """Linear magnification of `h` around display point `at` (root of the local area ratio)."""
+    x, y = at
+    p = apply_homography(h, np.array([[x, y], [x + 1, y], [x, y + 1]]))
+    du, dv = p[1] - p[0], p[2] - p[0]
+    return math.sqrt(abs(du[0] * dv[1] - du[1] * dv[0]))
+
+
+def _box_blur(image: np.ndarray, radius: int) -> np.ndarray:
+    """Separable (2r + 1)^2 mean filter from cumulative sums, edges clamped."""
+    out = image
+    for axis in (0, 1):
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (radius + 1, radius)
+        c = np.cumsum(np.pad(out, pad, mode="edge"), axis=axis, dtype=np.float64)
+        n = out.shape[axis]
+        hi = np.take(c, np.arange(2 * radius + 1, n + 2 * radius + 1), axis=axis)
+        lo = np.take(c, np.arange(0, n), axis=axis)
+        out = ((hi - lo) / (2 * radius + 1)).astype(np.float32)
+    return out
+
+
+def corner_response(diff: np.ndarray, radius: int) -> np.ndarray:
+    """Saddle response of a checkerboard difference image, blurred twice by `radius` boxes."""
+    d = _box_blur(_box_blur(diff, radius), radius)
+    dy, dx = np.gradient(d)
+    dyy, dyx = np.gradient(dy)
+    dxy, dxx = np.gradient(dx)
+    return (dxy * dyx) - dxx * dyy
+
+
+def locate_corners(
+    response: np.ndarray, predicted: np.ndarray, radius: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Subpixel response peak within `radius` of each predicted (x, y), and its strength.
+
+    All windows are gathered at once as an (n, 2r + 1, 2r + 1) array. Windows
+    that leave the image, or whose peak sits on the window border, get NaN.
+    """
+    h, w = response.shape
+    centre = np.round(predicted).astype(np.intp)
+    offsets = np.arange(-radius, radius + 1)
+    rows = centre[:, 1, None, None] + offsets[None, :, None]
+    cols = centre[:, 0, None, None] + offsets[None, None, :]
+    inside = (
+        (centre[:, 0] - radius >= 1) & (centre[:, 0] + radius < w - 1)
+        & (centre[:, 1] - radius >= 1) & (centre[:, 1] + radius < h - 1)
+    )
+    windows = response[rows.clip(0, h - 1), cols.clip(0, w - 1)]
+
+    n, size = len(predicted), 2 * radius + 1
+    flat = windows.reshape(n, -1).argmax(axis=1)
+    iy, ix = np.divmod(flat, size)
+    ok = inside & (iy > 0) & (iy < size - 1) & (ix > 0) & (ix < size - 1)
+    iy, ix = iy.clip(1, size - 2), ix.clip(1, size - 2)
+    k = np.arange(n)
+    peak = windows[k, iy, ix]
+
+    # Vertex of the parabola through the peak and its two neighbours, per axis.
+    def vertex(before: np.ndarray, after: np.ndarray) -> np.ndarray:
+        curve = before - 2 * peak + after
+        return np.where(curve < 0, 0.5 * (before - after) / np.where(curve < 0, curve, -1), 0.0)
+
+    sx = vertex(windows[k, iy, ix - 1], windows[k, iy, ix + 1])
+    sy = vertex(windows[k, iy - 1, ix], windows[k, iy + 1, ix])
+    found = np.stack([centre[:, 0] + ix - radius + sx, centre[:, 1] + iy - radius + sy], axis=1)
+    found[~ok] = np.nan
+    return found, np.where(ok, peak, np.nan)
+
+
+def _gray(capture: np.ndarray, factor: int) -> np.ndarray:
+    """Grayscale capture averaged over factor x factor blocks."""
+    capture = capture.astype(np.float32)
+    gray = capture[..., :3].mean(axis=2) if capture.ndim == 3 else capture
+    h, w = gray.shape[0] // factor, gray.shape[1] // factor
+    return gray[: h * factor, : w * factor].reshape(h, factor, w, factor).mean(axis=(1, 3))
+
+
+def _centroid(signal: np.ndarray) -> np.ndarray:
+    weight = np.maximum(signal - 0.5 * np.percentile(signal, 99.5), 0)
+    total = weight.sum()
+    if total <= 0:
+        raise RuntimeError("Projected quadrant not found in the camera image")
+    ys, xs = np.indices(signal.shape, sparse=True)
+    return np.array([(weight * xs).sum() / total, (weight * ys).sum() / total])
+
+
+def fit_from_captures(
+    display_size: tuple[int, int],
+    square_px: int,
+    dark: np.ndarray,
+    quadrants: list[np.ndarray],
+    board: np.ndarray,
+    inverse: np.ndarray,
+) -> tuple[np.ndarray, int, float]:
+    """Homography, corners used and rms error (camera px) from grayscale captures."""
+    # Quadrant centroids are only approximately the mapped centres, good enough to search from.
+    centroids = np.stack([_centroid(q - dark) for q in quadrants])
+    h = fit_homography(quadrant_centres(display_size), centroids)
+
+    square_cam = square_px * camera_px_per_display_px(h, (display_size[0] / 2, display_size[1] / 2))
+    if square_cam < 8:
+        raise RuntimeError(f"Checkerboard squares are {square_cam:.1f} camera px; use larger squares")
+    response = corner_response(board - inverse, max(1, int(square_cam / 10)))
+
+    corners = inner_corners(display_size, square_px)
+    used = np.zeros(len(corners), dtype=bool)
+    found = corners
+    for radius in (int(square_cam * 0.4), max(2, int(square_cam * 0.15))):
+        found, strength = locate_corners(response, apply_homography(h, corners), radius)
+        used = np.isfinite(strength)
+        if used.sum() < 4:
+            raise RuntimeError("Too few checkerboard corners found")
+        used &= strength >= _MIN_RESPONSE * np.median(strength[used])
+        h = fit_homography(corners[used], found[used])
+
+    residual = apply_homography(h, corners[used]) - found[used]
+    rms = float(np.sqrt((residual**2).sum(axis=1).mean()))
+    return h, int(used.sum()), rms
+
+
+def calibrate(
+    projector: Projector,
+    camera: CameraController,
+    exposure_us: int = 20000,
+    square_px: int = 120,
+    settle_s: float = 0.25,
+) -> HomographyResult:
+    """Project the patterns, capture them and fit the homography, keystone and pixel pitch.
+
+    The keystone and skew are only found when the camera's plane_homography is set.
+    """
+    display_size = projector.display_size
+
+    factor = 1
+
+    def show_and_capture(frame: np.ndarray) -> np.ndarray:
+        nonlocal factor
+        projector.display_frame(frame)
+        time.sleep(settle_s)
+        capture = camera.capture_array()
+        if capture is None:
+            raise RuntimeError("Camera capture failed")
+        if factor == 1:
+            factor = max(1, -(-max(capture.shape[:2]) // _WORK_SIZE))
+        return _gray(capture, factor)
+
+    dw, dh = display_size
+    camera.start_camera()
+    camera.set_exposure(exposure_us)
+    try:
+        dark = show_and_capture(patterns.dark(display_size))
+        quadrants = [show_and_capture(patterns.quadrant(display_size, q)) for q in range(4)]
+        cell = (square_px, square_px)
+        board = show_and_capture(patterns.checkerboard(display_size, cell))
+        inverse = show_and_capture(patterns.checkerboard(display_size, cell, invert=True))
+    finally:
+        camera.set_exposure(None)
+        projector.display_frame(patterns.dark(display_size))
+
+    h, used, rms = fit_from_captures(display_size, square_px, dark, quadrants, board, inverse)
+    # Back from binned to full camera pixels (bin i is centred on pixel factor * i + (factor - 1) / 2).
+    offset = (factor - 1) / 2
+    h = np.array([[factor, 0, offset], [0, factor, offset], [0, 0, 1]]) @ h
+    rms *= factor
+    keystone = skew = pitch = None
+    if camera.plane_homography is not None:
+        to_target = camera.plane_homography @ h
+        keystone = keystone_from_homography(to_target, display_size, square_px)
+        skew = corner_skew_deg(to_target, display_size)
+        pitch = camera_px_per_display_px(to_target, (dw / 2, dh / 2))
+    elif camera.mm_per_px is not None:
+        pitch = camera.mm_per_px * camera_px_per_display_px(h, (dw / 2, dh / 2))
+    print(f"INFO: Homography from {used} corners, rms error {rms:.2f} camera px")
+    return HomographyResult(h, keystone, pitch, used, rms, skew)
+
+
+def calibrate_camera_plane(
+    projector: Projector,
+    camera: CameraController,
+    board: tuple[int, int],
+    square_mm: float,
+    exposure_us: int = 20000,
+    settle_s: float = 0.25,
+) -> tuple[np.ndarray, float]:
+    """Homography from camera pixels to mm on a printed checkerboard where the vial stands.
+
+    `board` is the number of inner corners (columns, rows) and `square_mm` the
+    printed square size; the projector lights the card white. Returns the
+    homography and its rms error in mm.
+    """
+    import cv2
+
+    display_size = projector.display_size
+    camera.start_camera()
+    camera.set_exposure(exposure_us)
+    try:
+        projector.display_frame(patterns.flat(display_size, 255))
+        time.sleep(settle_s)
+        capture = camera.capture_array()
+    finally:
+        camera.set_exposure(None)
+        projector.display_frame(patterns.dark(display_size))
+    if capture is None:
+        raise RuntimeError("Camera capture failed")
+
+    gray = np.ascontiguousarray(np.clip(_gray(capture, 1), 0, 255).astype(np.uint8))
+    found, found_corners = cv2.findChessboardCorners(gray, board)
+    if not found:
+        raise RuntimeError(f"Printed {board[0]}x{board[1]} checkerboard not found in the camera image")
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+    found_corners = cv2.cornerSubPix(gray, found_corners, (5, 5), (-1, -1), criteria)
+    image = found_corners.reshape(-1, 2).astype(np.float64)
+    # findChessboardCorners lists the corners row by row
+    cols, rows = board
+    target = np.stack(np.meshgrid(np.arange(cols), np.arange(rows)), axis=-1).reshape(-1, 2) * square_mm
+    h = fit_homography(image, target.astype(np.float64))
+    rms = float(np.sqrt(np.mean(np.sum((apply_homography(h, image) - target) ** 2, axis=1))))
+    print(f"INFO: Camera plane from {len(image)} corners, rms error {rms:.3f} mm")
+    return h, rms
+
+
+def save_camera_plane(h: np.ndarray, camera: CameraController) -> None:
+    """Store the camera plane homography in config.json and apply it to `camera`."""
+    from opencal.utils.config import update_config
+
+    update_config("camera", {"plane_homography": h.tolist()})
+    camera.plane_homography = h
+
+
+def save_result(result: HomographyResult, projector: Projector) -> None:
+    """Store the homography and pixel pitch in config.json and apply them to `projector`.
+
+    The keystone is left alone; see save_keystone().
+    """
+    from opencal.utils.config import update_config
+
+    values: dict[str, object] = {"camera_homography": result.homography.tolist()}
+    if result.pixel_pitch_mm is not None:
+        values["pixel_pitch_mm"] = result.pixel_pitch_mm
+    update_config("projector", values)
+    projector.set_geometry_calibration(result.homography, result.pixel_pitch_mm)
+
+
+def save_keystone(result: HomographyResult, projector: Projector) -> None:
+    """Store the keystone in config.json and apply it to every later print on `projector`."""
+    from opencal.utils.config import update_config
+
+    if result.keystone is None:
+        raise ValueError("No keystone without the camera's plane_homography; run --camera-board first")
+    print(f"INFO: Saving keystone; frame corners were up to {result.skew_deg:.2f} deg off square")
+    update_config("projector", {"keystone": result.keystone.tolist()})
+    projector.set_keystone(result.keystone)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--square", type=int, default=120, help="checkerboard square, display px")
+    _ = parser.add_argument("--exposure", type=int, default=20000, help="camera exposure in us")
+    _ = parser.add_argument("--settle", type=float, default=0.25, help="seconds per pattern")
+    _ = parser.add_argument("--save", action="store_true", help="write the result to config.json")
+    _ = parser.add_argument(
+        "--save-keystone", action="store_true", help="also write the keystone, applied to every print"
+    )
+    _ = parser.add_argument(
+        "--camera-board", help="measure the camera plane from a printed board of COLSxROWS inner corners"
+    )
+    _ = parser.add_argument("--camera-square", type=float, help="printed board square, mm")
+    args = parser.parse_args()
+
+    from opencal.utils.config import Config
+
+    cfg = Config()
+    projector = Projector(cfg.projector)
+    camera = CameraController(cfg.camera)
+
+    if args.camera_board:
+        if args.camera_square is None:
+            parser.error("--camera-board needs --camera-square")
+        cols, rows = map(int, args.camera_board.split("x"))
+        h, _rms = calibrate_camera_plane(projector, camera, (cols, rows), args.camera_square, args.exposure)
+        print("Camera plane (camera px -> target mm):")
+        print(np.array2string(h, precision=6, suppress_small=True))
+        if args.save:
+            save_camera_plane(h, camera)
+            print("Saved to config.json")
+        return
+
+    t0 = time.perf_counter()
+    result = calibrate(projector, camera, args.exposure, args.square, args.settle)
+    print(f"Calibrated in {time.perf_counter() - t0:.1f} s")
+    print("Homography (display -> camera):")
+    print(np.array2string(result.homography, precision=6, suppress_small=True))
+    if result.keystone is None:
+        print('No keystone: measure the camera plane first with --camera-board')
+    else:
+        print(f"Keystone (frame corners up to {result.skew_deg:.2f} deg off square):")
+        print(np.array2string(result.keystone, precision=6, suppress_small=True))
+    if result.pixel_pitch_mm is None:
+        print('Pixel pitch unknown: set "mm_per_px" in the camera section of config.json')
+    else:
+        print(f"Pixel pitch {result.pixel_pitch_mm * 1000:.1f} um")
+    if args.save:
+        save_result(result, projector)
+        print("Saved to config.json")
+    if args.save_keystone:
+        save_keystone(result, projector)
+        print("Keystone saved to config.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from pathlib import Path
 
 from opencal.utils.config import Config
 from .hardware_controller import HardwareController
+from .projection.scheduler import AnglePhase, CommandedPhase, EncoderPhase, FrameScheduler
+from .usb_manager import parse_rpm
 
 _RECORDING_DIR = Path.home() / "OpenCAL/output/videos"
 
@@ -19,7 +21,12 @@ class PrintController:
         self.running = False
         self.ui_config = config.ui
         self.recording_path: Path | None = None
+        # Frame timing log (.npy records + .json summary) saved beside the recording
+        self.timing_path: Path | None = None
+        # Stepper speed tracking log, saved the same way when speed control is enabled
+        self.speed_path: Path | None = None
         self.vial_width_px: int = 200
+        self.scheduler: FrameScheduler | None = None
 
     def start_print_job(self, video_file: Path):
         """Start the print job in a new thread."""
@@ -31,12 +38,23 @@ class PrintController:
 
         self.recording_path = _RECORDING_DIR / f"{video_file.stem}_recording.h264"
         self.recording_path.parent.mkdir(parents=True, exist_ok=True)
+        self.timing_path = _RECORDING_DIR / f"{video_file.stem}_frames"
+        self.speed_path = _RECORDING_DIR / f"{video_file.stem}_speed"
 
-        self.hardware.stepper.start_rotation("CCW")
+        direction = "CCW"
+        if self.hardware.stepper.speed_controller is not None:
+            self.hardware.stepper.speed_controller.log.reset()
+        self.hardware.stepper.start_rotation(direction)
         self.hardware.led_manager.set_led((0, 240, 0, 0))
 
-        self.video_playing.set()
-        self.hardware.projector.play_video_with_vlc(video_file)
+        # PygameApp only has to hand the display over when cvlc owns the projector.
+        if not self.hardware.projector.in_process:
+            self.video_playing.set()
+        # Frames map to angles at the RPM the video was rendered for, not the dialled one.
+        rpm = parse_rpm(video_file.name) or self.hardware.stepper.speed_rpm
+        self.scheduler = self.hardware.projector.play_video(
+            video_file, phase=self._make_phase(direction), rpm=rpm
+        )
         self.hardware.camera.start_recording(self.recording_path)
 
         try:
@@ -48,6 +66,14 @@ class PrintController:
             self.stop()
             print("Print job complete.")
 
+    def _make_phase(self, direction: str) -> AnglePhase:
+        stepper = self.hardware.stepper
+        if stepper.has_encoder:
+            # The encoder counts down while the vial turns CCW.
+            sign = -1 if direction == "CCW" else 1
+            return EncoderPhase(stepper.angle_in_steps, stepper.encoder_cpr, sign)
+        return CommandedPhase(lambda: stepper.speed_rpm, stepper.encoder_cpr)
+
     def stop(self):
         if not self.running:
             return
@@ -55,11 +81,54 @@ class PrintController:
         self.running = False
 
         self.hardware.stepper.stop()
+        self._report_speed_tracking()
         self.hardware.led_manager.clear_leds()
 
         self.hardware.projector.stop_video()
+        self._report_frame_timing()
         self.video_playing.clear()
         self.hardware.camera.stop_recording()
         self.hardware.camera.stop_camera()
 
         print("Print job stopped and cleanup complete.")
+
+    def _report_frame_timing(self):
+        """Summarise the presented frames and save the log next to the camera recording."""
+        timing = self.scheduler.timing if self.scheduler is not None else None
+        if timing is None or self.timing_path is None:
+            return
+        try:
+            stats = timing.save(self.timing_path)
+        except OSError as e:
+            print(f"WARNING: Could not save frame timing log: {e}")
+            stats = timing.summary()
+        if "jitter_ms" not in stats:
+            return
+        print(
+            f"INFO: Projected {stats['presents']:.0f} frames, "
+            f"interval {stats['interval_ms']:.2f} ms, jitter {stats['jitter_ms']:.2f} ms, "
+            f"dropped {stats['dropped']:.0f}, repeated {stats['repeated']:.0f}"
+        )
+        if "error_rms_deg" in stats:
+            print(
+                f"INFO: Projection angle error: mean {stats['error_mean_deg']:.3f} deg, "
+                f"rms {stats['error_rms_deg']:.3f} deg, max {stats['error_max_abs_deg']:.3f} deg"
+            )
+
+    def _report_speed_tracking(self):
+        """Summarise how closely the stepper held its speed and save the log beside the recording."""
+        controller = self.hardware.stepper.speed_controller
+        if controller is None or self.speed_path is None:
+            return
+        try:
+            stats = controller.log.save(self.speed_path)
+        except OSError as e:
+            print(f"WARNING: Could not save speed tracking log: {e}")
+            stats = controller.log.summary()
+        if "error_rms_rpm" not in stats:
+            return
+        print(
+            f"INFO: Stepper speed error: mean {stats['error_mean_rpm']:+.4f} rpm, "
+            f"rms {stats['error_rms_rpm']:.4f} rpm ({stats['error_rms_pct']:.2f} %), "
+            f"max {stats['error_max_abs_rpm']:.4f} rpm, correction {stats['correction_mean_pct']:+.2f} %"
+        )
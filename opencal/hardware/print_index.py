@@ -0,0 +1,211 @@
+"""
+print_index.py — Persistent metadata index of the print files on a USB drive.
+
+One JSON file per drive under ~/.cache/opencal/index remembers, for every
+print file (.mp4 or sinogram array) keyed by its path relative to the drive
+root, the size and mtime it was indexed at plus its dimensions, fps, frame
+count, duration, RPM parsed from the name and (once known) its SHA-256.
+Refreshing only stats the tree; files whose size and mtime are unchanged keep
+their entry, new or changed files are probed in-process with OpenCV on a
+background thread, so listing the drive never waits on ffprobe.
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, final
+
+from .projection.frame_cache import file_hash
+from .projection.sinogram import SINOGRAM_SUFFIXES, SinogramFrameSource, is_sinogram
+
+_INDEX_DIR = Path.home() / ".cache/opencal/index"
+_INDEX_VERSION = 1
+
+# Files offered in "Print from USB": encoded videos and raw sinogram arrays
+PRINT_SUFFIXES = (".mp4",) + SINOGRAM_SUFFIXES
+
+
+def parse_rpm(filename: str) -> float | None:
+    """Extract RPM from filenames like 'part_15rpm.mp4' or 'part_10.5rpm.mp4'."""
+    match = re.search(r"_(\d+(?:\.\d+)?)rpm", filename, re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+
+@dataclass
+class PrintFileInfo:
+    path: str  # relative to the drive root
+    size: int
+    mtime: float
+    width: int | None = None
+    height: int | None = None
+    fps: float | None = None
+    frame_count: int | None = None
+    duration: float | None = None
+    rpm: float | None = None
+    sha256: str | None = None
+
+    @property
+    def probed(self) -> bool:
+        return self.width is not None
+
+
+def probe(path: Path) -> dict[str, Any]:
+    """Read stream properties from the container without spawning ffprobe."""
+    if is_sinogram(path):
+        source = SinogramFrameSource(path, rpm=60)
+        source.close()
+        return {
+            "width": source.width,
+            "height": source.height,
+            "frame_count": source.frame_count,
+        }
+
+    import cv2
+
+    cap = cv2.VideoCapture(str(path))
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Unable to open video {path}")
+        fps = float(cap.get(cv2.CAP_PROP_FPS)) or 30.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": fps,
+            "frame_count": frame_count,
+            "duration": frame_count / fps,
+        }
+    finally:
+        cap.release()
+
+
+@final
+class PrintIndex:
+    def __init__(self, drive: Path, index_dir: Path = _INDEX_DIR):
+        self.drive = drive
+        self.index_path = index_dir / f"{drive.name}.json"
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._files: dict[str, PrintFileInfo] = {}
+        self._worker: threading.Thread | None = None
+        self._load()
+
+    # ── Persistence ─────────────────────────────────────────────────────────
+
+    def _load(self) -> None:
+        try:
+            raw = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return
+        if raw.get("version") != _INDEX_VERSION:
+            return
+        self._files = {k: PrintFileInfo(**v) for k, v in raw["files"].items()}
+
+    def save(self) -> None:
+        with self._lock:
+            files = {k: asdict(v) for k, v in self._files.items()}
+            raw = {"version": _INDEX_VERSION, "files": files}
+        with self._save_lock:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(raw))
+            tmp.replace(self.index_path)
+
+    # ── Refresh ─────────────────────────────────────────────────────────────
+
+    def refresh(self) -> list[Path]:
+        """Re-stat the drive, drop vanished files and queue new or changed ones for probing."""
+        seen: dict[str, os.stat_result] = {}
+        self._scan(self.drive, seen)
+
+        with self._lock:
+            changed = len(seen) != len(self._files)
+            for rel, st in seen.items():
+                entry = self._files.get(rel)
+                if entry is None or entry.size != st.st_size or entry.mtime != st.st_mtime:
+                    self._files[rel] = PrintFileInfo(
+                        rel, st.st_size, st.st_mtime, rpm=parse_rpm(Path(rel).name)
+                    )
+                    changed = True
+            for rel in list(self._files):
+                if rel not in seen:
+                    del self._files[rel]
+            paths = sorted(self.drive / rel for rel in self._files)
+
+        if changed:
+            self.save()
+        self._start_worker()
+        return paths
+
+    def _scan(self, directory: Path, seen: dict[str, os.stat_result]) -> None:
+        try:
+            it = os.scandir(directory)
+        except OSError:
+            return
+        with it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    self._scan(Path(entry.path), seen)
+                elif entry.name.lower().endswith(PRINT_SUFFIXES):
+                    rel = os.path.relpath(entry.path, self.drive)
+                    seen[rel] = entry.stat()
+
+    def _start_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._probe_pending, daemon=True)
+        self._worker.start()
+
+    def _probe_pending(self) -> None:
+        with self._lock:
+            pending = [rel for rel, info in self._files.items() if not info.probed]
+        for rel in pending:
+            _ = self._probe(rel)
+        if pending:
+            self.save()
+
+    def _probe(self, rel: str) -> PrintFileInfo | None:
+        try:
+            props = probe(self.drive / rel)
+        except Exception as e:
+            print(f"WARNING: Unable to probe {rel}: {e}")
+            return None
+        with self._lock:
+            info = self._files.get(rel)
+            if info is None:
+                return None
+            for key, value in props.items():
+                setattr(info, key, value)
+            return info
+
+    # ── Lookup ──────────────────────────────────────────────────────────────
+
+    def _rel(self, path: Path) -> str:
+        return os.path.relpath(path, self.drive)
+
+    def get(self, path: Path) -> PrintFileInfo | None:
+        """Metadata for `path`, probing it right away if the worker hasn't got to it yet."""
+        rel = self._rel(path)
+        with self._lock:
+            info = self._files.get(rel)
+        if info is None:
+            return None
+        if not info.probed:
+            info = self._probe(rel)
+            self.save()
+        return info
+
+    def ensure_hash(self, path: Path) -> str | None:
+        """SHA-256 of `path`, computed and stored the first time it is asked for."""
+        info = self.get(path)
+        if info is None:
+            return None
+        if info.sha256 is None:
+            info.sha256 = file_hash(path)
+            self.save()
+        return info.sha256
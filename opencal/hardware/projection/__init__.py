@@ -0,0 +1,9 @@
+from .decoder import DecodedFrameSource as DecodedFrameSource
+from .frame_source import ArrayFrameSource as ArrayFrameSource
+from .frame_source import FrameSource as FrameSource
+from .frame_source import ImageFrameSource as ImageFrameSource
+from .frame_source import VideoFrameSource as VideoFrameSource
+from .player import FramePlayer as FramePlayer
+from .scheduler import AngleScheduler as AngleScheduler
+from .scheduler import FrameScheduler as FrameScheduler
+from .scheduler import WallClockScheduler as WallClockScheduler
@@ -0,0 +1,47 @@
+from typing import final
+
+import numpy as np
+
+# Row i holds the 8 bits of byte i, most significant first (np.packbits order).
+_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+
+
+def is_binary(frames: np.ndarray) -> tuple[bool, int]:
+    """Whether `frames` only holds 0 and one other level, and that level (255 if all dark)."""
+    # bincount is a single pass; np.unique would sort the whole block
+    levels = np.flatnonzero(np.bincount(frames.ravel(), minlength=256)[1:]) + 1
+    if len(levels) > 1:
+        return False, 0
+    return True, int(levels[0]) if len(levels) else 255
+
+
+def pack(frames: np.ndarray) -> np.ndarray:
+    """Pack (..., h, w) binary frames to (..., h, ceil(w / 8)) bytes, one bit per pixel."""
+    return np.packbits(frames != 0, axis=-1)
+
+
+@final
+class BitUnpacker:
+    """Expands packed rows back to 8-bit gray in a reused buffer, without allocating.
+
+    Each packed byte indexes an (256, 8) table of output pixels, so unpacking a
+    frame is a single np.take straight into the display buffer.
+    """
+
+    def __init__(self, width: int, height: int, level: int = 255):
+        self.width = width
+        self.height = height
+        row_bytes = (width + 7) // 8
+        self._lut = (_BITS * np.uint8(level)).astype(np.uint8)
+        self._padded = np.empty((height, row_bytes, 8), dtype=np.uint8)
+        if width % 8 == 0:
+            self._out = self._padded.reshape(height, width)
+        else:
+            self._out = np.empty((height, width), dtype=np.uint8)
+
+    def unpack(self, packed: np.ndarray) -> np.ndarray:
+        """Unpack one (height, ceil(width / 8)) frame. The result is overwritten next call."""
+        _ = np.take(self._lut, packed, axis=0, out=self._padded)
+        if self._out.base is not self._padded:
+            self._out[...] = self._padded.reshape(self.height, -1)[:, : self.width]
+        return self._out
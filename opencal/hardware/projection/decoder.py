@@ -0,0 +1,271 @@
+"""
+decoder.py — Decode print files in a worker process into a shared-memory ring.
+
+Decoding (and rescaling) on the pygame thread competes for the GIL with the
+stepper and GUI threads, which shows up as frame jitter. DecodedFrameSource
+moves that work to a separate process that fills a ring of frame slots in
+multiprocessing.shared_memory; the display loop only wraps the slot it needs
+with pygame.image.frombuffer, without copying.
+
+Ring protocol
+-------------
+The producer publishes frames with an ever increasing sequence number; frame
+`seq` lives in slot `seq % slots`. Each side owns the counters it writes:
+
+    head     producer   frames published so far
+    tail     consumer   oldest sequence still in use; slots before it are free
+    seek     consumer   generation and frame the producer should restart from
+
+The producer waits while `head - tail == slots` (backpressure), so it never
+overwrites a frame the display still holds. Frames are decoded in order and
+wrap at the end of the file; when the display asks for a frame that is behind,
+or too far ahead to be decoded soon, it requests a seek. A frame only a little
+ahead of the newest one frees the whole ring instead, so a full ring cannot
+stall the producer short of it.
+
+Counters
+--------
+underruns   frames the display wanted before the decoder had produced them;
+            the previous frame stays up instead
+overruns    decoded frames released without ever being shown, because the
+            display skipped ahead past them or a seek flushed them
+"""
+
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import final, override
+
+import numpy as np
+
+from .frame_source import FrameSource, VideoFrameSource
+from .rescale import FrameRescaler
+from .sinogram import SinogramFrameSource, is_sinogram
+
+_POLL_S = 0.001
+_START_TIMEOUT_S = 20.0
+
+# Control words, each written by one side only
+_HEAD = 0  # producer
+_TAIL = 1  # consumer
+_SEEK_GEN = 2  # consumer
+_SEEK_FRAME = 3  # consumer
+_STOP = 4  # consumer
+_FRAME_COUNT = 5  # producer
+_STATE = 6  # producer: 0 starting, 1 running, -1 failed
+_CONTROL_WORDS = 8
+
+
+def open_print_file(path: Path) -> FrameSource:
+    """The in-thread FrameSource for a print file: a sinogram array or a video."""
+    if is_sinogram(path):
+        return SinogramFrameSource(path)
+    return VideoFrameSource(path)
+
+
+def _layout(slots: int, frame_shape: tuple[int, ...]) -> tuple[int, int, int]:
+    """Byte offsets of the slot tables and frame data, and the total size."""
+    tables = (_CONTROL_WORDS + 2 * slots) * 8
+    frame_bytes = int(np.prod(frame_shape))
+    data = (tables + 63) // 64 * 64
+    return tables, data, data + slots * frame_bytes
+
+
+def _views(
+    buf: memoryview, slots: int, frame_shape: tuple[int, ...]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    _, data, _ = _layout(slots, frame_shape)
+    control = np.ndarray((_CONTROL_WORDS,), np.int64, buf)
+    slot_frame = np.ndarray((slots,), np.int64, buf, offset=_CONTROL_WORDS * 8)
+    slot_gen = np.ndarray((slots,), np.int64, buf, offset=(_CONTROL_WORDS + slots) * 8)
+    frames = np.ndarray((slots, *frame_shape), np.uint8, buf, offset=data)
+    return control, slot_frame, slot_gen, frames
+
+
+def _decode(
+    shm_name: str,
+    path: str,
+    display_size: tuple[int, int],
+    size: int,
+    slots: int,
+    frame_shape: tuple[int, ...],
+) -> None:
+    """Worker process: decode `path` into the ring until told to stop."""
+    # Spawned children share the parent's resource tracker, so attaching here
+    # does not hand ownership over; the parent unlinks the segment in close().
+    shm = shared_memory.SharedMemory(shm_name)
+    control, slot_frame, slot_gen, frames = _views(shm.buf, slots, frame_shape)
+    try:
+        source = open_print_file(Path(path))
+        rescaler = FrameRescaler((source.width, source.height), display_size, size)
+    except Exception as e:
+        print(f"ERROR: Decoder failed to open {path}: {e}")
+        control[_STATE] = -1
+        del control, slot_frame, slot_gen, frames
+        shm.close()
+        return
+
+    control[_FRAME_COUNT] = source.frame_count
+    control[_STATE] = 1
+    gen = 0
+    frame = 0
+    try:
+        while not control[_STOP]:
+            if control[_SEEK_GEN] != gen:
+                gen = int(control[_SEEK_GEN])
+                frame = int(control[_SEEK_FRAME])
+            head = int(control[_HEAD])
+            if head - control[_TAIL] >= slots:
+                time.sleep(_POLL_S)
+                continue
+            slot = head % slots
+            rgb = source.read(frame)
+            _ = rescaler.apply(rgb, out=frames[slot])
+            slot_frame[slot] = frame
+            slot_gen[slot] = gen
+            # Video sources learn their true length while decoding.
+            control[_FRAME_COUNT] = source.frame_count
+            control[_HEAD] = head + 1
+            frame = (frame + 1) % source.frame_count
+    finally:
+        source.close()
+        del control, slot_frame, slot_gen, frames
+        shm.close()
+
+
+@final
+class DecodedFrameSource(FrameSource):
+    """A print file decoded and rescaled to the display by a worker process.
+
+    Frames come back already at their projected size (prescaled) as views into
+    shared memory. A returned frame stays valid until the next read().
+    """
+
+    def __init__(self, path: Path, display_size: tuple[int, int], size: int, slots: int = 16):
+        probe = open_print_file(path)
+        try:
+            channels = probe.read(0).shape[2:]
+            rescaler = FrameRescaler((probe.width, probe.height), display_size, size)
+            self.fps = probe.fps
+            self.frame_count = probe.frame_count
+            self.frames_per_rev = probe.frames_per_rev
+        finally:
+            probe.close()
+        self.width, self.height = rescaler.out_size
+        self.prescaled = True
+        self.underruns = 0
+        self.overruns = 0
+
+        frame_shape = (self.height, self.width, *channels)
+        self._slots = slots
+        nbytes = _layout(slots, frame_shape)[2]
+        self._shm: shared_memory.SharedMemory | None = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._control, self._slot_frame, self._slot_gen, self._frames = _views(
+            self._shm.buf, slots, frame_shape
+        )
+        self._control[:] = 0
+        self._tail = 0
+        self._gen = 0
+        # Frame the producer decodes next, for when the ring is empty
+        self._next_frame = 0
+        self._current_seq = -1
+        # Shown while the decoder catches up after a seek, which frees every slot
+        self._hold = np.zeros(frame_shape, dtype=np.uint8)
+
+        # spawn, not fork: the parent has pygame and hardware threads running.
+        ctx = mp.get_context("spawn")
+        self._process = ctx.Process(
+            target=_decode,
+            args=(self._shm.name, str(path), display_size, size, slots, frame_shape),
+            name=f"decode-{path.name}",
+            daemon=True,
+        )
+        self._process.start()
+        self._wait_first_frame()
+
+    def _wait_first_frame(self) -> None:
+        deadline = time.perf_counter() + _START_TIMEOUT_S
+        while self._control[_HEAD] == 0:
+            if self._control[_STATE] < 0 or not self._process.is_alive():
+                self.close()
+                raise RuntimeError("Decoder process failed to start")
+            if time.perf_counter() > deadline:
+                self.close()
+                raise TimeoutError("Decoder process produced no frame in time")
+            time.sleep(_POLL_S)
+
+    def _release_to(self, seq: int) -> None:
+        """Free every slot before `seq`, counting frames that were never shown."""
+        skipped = seq - self._tail - (1 if self._tail <= self._current_seq < seq else 0)
+        self.overruns += max(skipped, 0)
+        self._tail = seq
+        self._control[_TAIL] = seq
+
+    def _flush(self, seq: int) -> None:
+        """Free every slot before `seq`, keeping the frame on screen in _hold."""
+        if self._current_seq >= 0:
+            self._hold[...] = self._frames[self._current_seq % self._slots]
+        self._release_to(seq)
+        self._current_seq = -1
+
+    def _seek(self, index: int) -> None:
+        self._gen += 1
+        self._next_frame = index
+        self._control[_SEEK_FRAME] = index
+        self._control[_SEEK_GEN] = self._gen
+        self._flush(int(self._control[_HEAD]))
+
+    @override
+    def read(self, index: int) -> np.ndarray:
+        self.frame_count = max(int(self._control[_FRAME_COUNT]), 1)
+        index %= self.frame_count
+        head = int(self._control[_HEAD])
+
+        # Skip frames left over from before the last seek.
+        tail = self._tail
+        while tail < head and self._slot_gen[tail % self._slots] != self._gen:
+            tail += 1
+        if tail != self._tail:
+            self._release_to(tail)
+
+        if tail < head:
+            oldest = int(self._slot_frame[tail % self._slots])
+            ahead = (index - oldest) % self.frame_count
+            if ahead < head - tail:
+                seq = tail + ahead
+                self._release_to(seq)
+                self._current_seq = seq
+                self.pending = False
+                return self._frames[seq % self._slots]
+            expected = (int(self._slot_frame[(head - 1) % self._slots]) + 1) % self.frame_count
+        else:
+            expected = self._next_frame
+
+        if (index - expected) % self.frame_count >= self._slots:
+            self._seek(index)
+        elif tail < head:
+            # Every decoded frame is before `index`; free them or a full ring never reaches it.
+            self._next_frame = expected
+            self._flush(head)
+        self.underruns += 1
+        self.pending = True
+        if self._current_seq >= 0:
+            return self._frames[self._current_seq % self._slots]
+        return self._hold
+
+    @override
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._control[_STOP] = 1
+        self._process.join(timeout=2)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        if self.underruns or self.overruns:
+            print(f"INFO: Decoder underruns {self.underruns}, overruns {self.overruns}")
+        del self._control, self._slot_frame, self._slot_gen, self._frames
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
@@ -0,0 +1,100 @@
+"""
+fake_mpv.py — Stand-in for mpv that only speaks the JSON IPC protocol.
+
+Accepts the same command line MpvController passes to mpv, opens no window,
+and answers `loadfile`, `stop`, `get_property` and `quit` with the replies and
+events real mpv sends. Point MpvController at it to exercise IPC, swapping and
+crash recovery without a display:
+
+    MpvController(command=[sys.executable, "-m", "opencal.hardware.projection.fake_mpv"])
+
+`--fake-load-delay=SECONDS` simulates decode time before `playback-restart`.
+"""
+
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+
+def _send(conn: socket.socket, msg: dict[str, Any]) -> None:
+    conn.sendall((json.dumps(msg) + "\n").encode())
+
+
+def _handle(conn: socket.socket, msg: dict[str, Any], state: dict[str, Any], delay: float) -> bool:
+    """Answer one command. Returns False once mpv should exit."""
+    cmd = msg.get("command", [])
+    request_id = msg.get("request_id", 0)
+    name = cmd[0] if cmd else None
+
+    if name == "loadfile":
+        _send(conn, {"data": None, "request_id": request_id, "error": "success"})
+        if not Path(cmd[1]).exists():
+            _send(conn, {"event": "end-file", "reason": "error"})
+            return True
+        state["path"] = cmd[1]
+        _send(conn, {"event": "start-file"})
+        time.sleep(delay)
+        _send(conn, {"event": "file-loaded"})
+        _send(conn, {"event": "playback-restart"})
+    elif name == "stop":
+        state["path"] = None
+        _send(conn, {"data": None, "request_id": request_id, "error": "success"})
+        _send(conn, {"event": "end-file", "reason": "stop"})
+        _send(conn, {"event": "idle"})
+    elif name == "get_property":
+        prop = cmd[1]
+        if prop == "path":
+            _send(conn, {"data": state["path"], "request_id": request_id, "error": "success"})
+        elif prop == "idle-active":
+            idle = state["path"] is None
+            _send(conn, {"data": idle, "request_id": request_id, "error": "success"})
+        else:
+            _send(conn, {"request_id": request_id, "error": "property not found"})
+    elif name == "quit":
+        _send(conn, {"data": None, "request_id": request_id, "error": "success"})
+        return False
+    else:
+        _send(conn, {"request_id": request_id, "error": "invalid parameter"})
+    return True
+
+
+def serve(socket_path: Path, delay: float = 0.0) -> None:
+    socket_path.unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(socket_path))
+    server.listen(1)
+    state: dict[str, Any] = {"path": None}
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                buf = b""
+                while chunk := conn.recv(4096):
+                    buf += chunk
+                    while b"\n" in buf:
+                        line, buf = buf.split(b"\n", 1)
+                        if line.strip() and not _handle(conn, json.loads(line), state, delay):
+                            return
+    finally:
+        server.close()
+        socket_path.unlink(missing_ok=True)
+
+
+def main():
+    socket_path: Path | None = None
+    delay = 0.0
+    for arg in sys.argv[1:]:
+        if arg.startswith("--input-ipc-server="):
+            socket_path = Path(arg.split("=", 1)[1])
+        elif arg.startswith("--fake-load-delay="):
+            delay = float(arg.split("=", 1)[1])
+    if socket_path is None:
+        sys.exit("fake_mpv: --input-ipc-server=PATH is required")
+    serve(socket_path, delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+frame_cache.py — Decode-once store of print frames on local disk.
+
+Each entry is the whole print file (video or sinogram) decoded and cropped,
+scaled and centred for one display size and print size by FrameRescaler,
+saved as a raw uint8 .npy that is memory-mapped for playback. Entries are
+keyed by the SHA-256 of the file contents plus the display and print size and
+are evicted least-recently-used to keep the store under a disk budget.
+
+Frames are stored in the most compact of three formats that holds them
+exactly: "bits" (binary masks, one bit per pixel), "gray" (one byte per
+pixel) or "rgb". Binary patterns are the common case for tomographic prints
+and take 1/24th of the RGB size.
+
+Pre-build entries from the command line:
+
+    python -m opencal.hardware.projection.frame_cache WIDTHxHEIGHT SIZE print.mp4 [...]
+"""
+
+import hashlib
+import json
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import final, override
+
+import numpy as np
+
+from .bitpack import BitUnpacker, is_binary, pack
+from .decoder import open_print_file
+from .frame_source import FrameSource
+from .rescale import FrameRescaler
+
+_CHUNK = 1 << 20
+_BLOCK_FRAMES = 32
+_FRAMES_FILE = "frames.npy"
+_META_FILE = "meta.json"
+# Storage formats, most compact first
+_FORMATS = ("bits", "gray", "rgb")
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of the file contents, hex encoded."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@final
+class CachedFrameSource(FrameSource):
+    """Frames read straight from a memory-mapped cache entry; no decoding."""
+
+    def __init__(self, entry: Path):
+        meta = json.loads((entry / _META_FILE).read_text())
+        self._frames = np.load(entry / _FRAMES_FILE, mmap_mode="r")
+        self.frame_count = int(meta["frame_count"])
+        self.fps = float(meta["fps"])
+        self.frames_per_rev = meta.get("frames_per_rev")
+        self.format = meta.get("format", "rgb")
+        self.height = self._frames.shape[1]
+        self.width = int(meta.get("width", self._frames.shape[2]))
+        self.prescaled = True
+        self._unpacker = None
+        if self.format == "bits":
+            self._unpacker = BitUnpacker(self.width, self.height, int(meta["level"]))
+
+    @override
+    def read(self, index: int) -> np.ndarray:
+        frame = self._frames[index % self.frame_count]
+        if self._unpacker is not None:
+            return self._unpacker.unpack(frame)
+        return frame
+
+    @override
+    def close(self) -> None:
+        del self._frames
+
+
+@final
+class _FrameStore:
+    """Writes rescaled RGB blocks to a .npy in the most compact format that fits.
+
+    Starts as "bits" and moves to "gray" or "rgb" the first time a block needs
+    it, converting the frames already written.
+    """
+
+    def __init__(self, path: Path, frame_count: int, width: int, height: int):
+        self._path = path
+        self._frame_count = frame_count
+        self._width = width
+        self._height = height
+        self.format = _FORMATS[0]
+        self.level: int | None = None
+        self._written = 0
+        self._frames = self._open(self.format)
+
+    def _shape(self, fmt: str) -> tuple[int, ...]:
+        if fmt == "bits":
+            return (self._frame_count, self._height, (self._width + 7) // 8)
+        if fmt == "gray":
+            return (self._frame_count, self._height, self._width)
+        return (self._frame_count, self._height, self._width, 3)
+
+    def _open(self, fmt: str, path: Path | None = None) -> np.memmap:
+        return np.lib.format.open_memmap(
+            path or self._path, mode="w+", dtype=np.uint8, shape=self._shape(fmt)
+        )
+
+    def _needed(self, block: np.ndarray) -> tuple[str, np.ndarray]:
+        """The most compact format able to hold `block`, and the block as gray if it is."""
+        gray = block[..., 0]
+        if not (np.array_equal(gray, block[..., 1]) and np.array_equal(gray, block[..., 2])):
+            return "rgb", block
+        binary, level = is_binary(gray)
+        if not binary:
+            return "gray", gray
+        if self.format == "bits" and self.level is None and gray.any():
+            self.level = level
+        return ("bits" if level == (self.level or level) else "gray"), gray
+
+    def write(self, start: int, block: np.ndarray) -> None:
+        fmt, data = self._needed(block)
+        if _FORMATS.index(fmt) > _FORMATS.index(self.format):
+            self._upgrade(fmt)
+        stop = start + len(block)
+        if self.format == "bits":
+            self._frames[start:stop] = pack(data)
+        elif self.format == "gray":
+            self._frames[start:stop] = data
+        else:
+            self._frames[start:stop] = block
+        self._written = max(self._written, stop)
+
+    def _upgrade(self, fmt: str) -> None:
+        """Rewrite the frames stored so far in the larger format `fmt`."""
+        tmp = self._path.with_name(self._path.name + ".upgrade")
+        frames = self._open(fmt, tmp)
+        unpacker = BitUnpacker(self._width, self._height, self.level or 255)
+        for i in range(self._written):
+            frame = self._frames[i]
+            if self.format == "bits":
+                frame = unpacker.unpack(frame)
+            frames[i] = frame if fmt == "gray" else frame[..., None]
+        frames.flush()
+        del self._frames
+        _ = tmp.replace(self._path)
+        self._frames = frames
+        self.format = fmt
+        if fmt != "bits":
+            self.level = None
+
+    def close(self) -> None:
+        self._frames.flush()
+        del self._frames
+        if self.format == "bits" and self.level is None:
+            self.level = 255
+
+
+@final
+class FrameCache:
+    """LRU store of decoded print files under `root`, bounded by `budget_bytes`."""
+
+    def __init__(self, root: Path, budget_bytes: int):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._building: set[str] = set()
+        # (path, size, mtime) -> content hash, so lookups never re-read the file
+        self._hashes: dict[tuple[str, int, float], str] = {}
+
+    # ── Keys ────────────────────────────────────────────────────────────────
+
+    def content_hash(self, video_path: Path, compute: bool = True) -> str | None:
+        st = video_path.stat()
+        memo_key = (str(video_path), st.st_size, st.st_mtime)
+        digest = self._hashes.get(memo_key)
+        if digest is None and compute:
+            digest = file_hash(video_path)
+            self._hashes[memo_key] = digest
+        return digest
+
+    def remember_hash(self, video_path: Path, digest: str) -> None:
+        """Seed the hash memo from an external index so lookups stay cheap."""
+        st = video_path.stat()
+        self._hashes[(str(video_path), st.st_size, st.st_mtime)] = digest
+
+    def _entry(self, digest: str, display_size: tuple[int, int], size: int) -> Path:
+        return self.root / f"{digest}_{display_size[0]}x{display_size[1]}_{size}pct"
+
+    # ── Lookup / build ──────────────────────────────────────────────────────
+
+    def lookup(
+        self, video_path: Path, display_size: tuple[int, int], size: int
+    ) -> CachedFrameSource | None:
+        """Return the cached frames for `video_path` on `display_size` at `size`%, or None.
+
+        Never hashes the file; call build() first so the hash is known.
+        """
+        digest = self.content_hash(video_path, compute=False)
+        if digest is None:
+            return None
+        entry = self._entry(digest, display_size, size)
+        if not (entry / _META_FILE).exists():
+            return None
+        self._touch(entry)
+        return CachedFrameSource(entry)
+
+    def build(
+        self,
+        video_path: Path,
+        display_size: tuple[int, int],
+        size: int,
+        cancel: threading.Event | None = None,
+    ) -> Path | None:
+        """Decode and rescale `video_path` once into a cache entry. Returns the entry path.
+
+        Setting `cancel` stops the build within a frame and discards it (returns None).
+        """
+        digest = self.content_hash(video_path)
+        assert digest is not None
+        entry = self._entry(digest, display_size, size)
+        with self._lock:
+            if (entry / _META_FILE).exists():
+                self._touch(entry)
+                return entry
+            if entry.name in self._building:
+                return None
+            self._building.add(entry.name)
+
+        tmp = entry.with_name(entry.name + ".partial")
+        try:
+            source = open_print_file(video_path)
+            rescaler = FrameRescaler((source.width, source.height), display_size, size)
+            width, height = rescaler.out_size
+            # Reserve for the worst case; most entries end up far smaller.
+            nbytes = source.frame_count * height * width * 3
+            if not self._make_room(nbytes):
+                print(f"WARNING: {video_path.name} does not fit in the frame cache budget.")
+                source.close()
+                return None
+
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            store = _FrameStore(tmp / _FRAMES_FILE, source.frame_count, width, height)
+            rgb = np.empty((_BLOCK_FRAMES, height, width, 3), dtype=np.uint8)
+            t0 = time.perf_counter()
+            count = 0
+            for start in range(0, source.frame_count, _BLOCK_FRAMES):
+                stop = min(start + _BLOCK_FRAMES, source.frame_count)
+                block = source.read_block(start, stop, cancel)
+                if cancel is not None and cancel.is_set():
+                    print(f"INFO: Caching {video_path.name} cancelled.")
+                    store.close()
+                    source.close()
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    return None
+                # A video may find its real end early if the container over-reported it.
+                stop = min(stop, source.frame_count)
+                if stop <= start:
+                    break
+                out = rescaler.apply(block[: stop - start], out=rgb[: stop - start])
+                store.write(start, out)
+                count = stop
+            store.close()
+            meta = {
+                "source": video_path.name,
+                "fps": source.fps,
+                "frames_per_rev": source.frames_per_rev,
+                "frame_count": count,
+                "format": store.format,
+                "level": store.level,
+                "width": width,
+                "last_used": time.time(),
+            }
+            source.close()
+            (tmp / _META_FILE).write_text(json.dumps(meta))
+            tmp.rename(entry)
+            print(
+                f"INFO: Cached {count} frames of {video_path.name} as {store.format} "
+                + f"in {time.perf_counter() - t0:.1f} s"
+            )
+            return entry
+        except Exception as e:
+            print(f"ERROR: Failed to cache {video_path.name}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return None
+        finally:
+            with self._lock:
+                self._building.discard(entry.name)
+
+    # ── LRU bookkeeping ─────────────────────────────────────────────────────
+
+    def _touch(self, entry: Path) -> None:
+        meta_path = entry / _META_FILE
+        meta = json.loads(meta_path.read_text())
+        meta["last_used"] = time.time()
+        meta_path.write_text(json.dumps(meta))
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        """(last_used, bytes, path) for every complete entry."""
+        if not self.root.exists():
+            return []
+        entries = []
+        for entry in self.root.iterdir():
+            meta_path = entry / _META_FILE
+            if not meta_path.exists():
+                continue
+            last_used = json.loads(meta_path.read_text())["last_used"]
+            nbytes = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((last_used, nbytes, entry))
+        return entries
+
+    def _make_room(self, nbytes: int) -> bool:
+        """Evict least recently used entries until `nbytes` more fit in the budget."""
+        if nbytes > self.budget_bytes:
+            return False
+        with self._lock:
+            entries = sorted(self._entries())
+            used = sum(n for _, n, _ in entries)
+            for _, n, entry in entries:
+                if used + nbytes <= self.budget_bytes:
+                    break
+                print(f"INFO: Evicting {entry.name} from the frame cache")
+                shutil.rmtree(entry, ignore_errors=True)
+                used -= n
+        return True
+
+
+def main():
+    width, height = map(int, sys.argv[1].split("x"))
+    size = int(sys.argv[2])
+    from opencal.utils.config import Config
+
+    cfg = Config()
+    cache = FrameCache(
+        Path(cfg.projector.frame_cache_dir).expanduser(),
+        int(cfg.projector.frame_cache_budget_gb * 1e9),
+    )
+    for arg in sys.argv[3:]:
+        _ = cache.build(Path(arg), (width, height), size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import final, override
+
+import numpy as np
+from PIL import Image
+
+
+class FrameSource(ABC):
+    """Random-access sequence of RGB frames for the in-process projector.
+
+    Frames are returned as C-contiguous (height, width, 3) uint8 arrays, or
+    (height, width) for single-channel sources, so they can be handed to pygame
+    without a copy.
+    """
+
+    width: int
+    height: int
+    fps: float
+    frame_count: int
+    # True if frames are already at their projected size and are only centred
+    prescaled: bool = False
+    # Frames in one revolution when the source defines it (sinograms); None for video
+    frames_per_rev: float | None = None
+    # True when the last read() returned a stand-in because the frame was not ready yet
+    pending: bool = False
+
+    @abstractmethod
+    def read(self, index: int) -> np.ndarray: ...
+
+    def read_block(self, start: int, stop: int, cancel: threading.Event | None = None) -> np.ndarray:
+        """Frames [start, stop) as one (n, height, width[, 3]) array.
+
+        Each frame is copied out as it is read, since read() may return the
+        same buffer every time (VideoFrameSource does). Once `cancel` is set,
+        returns the frames read so far.
+        """
+        first = self.read(start)
+        block = np.empty((stop - start, *first.shape), dtype=first.dtype)
+        block[0] = first
+        for i in range(start + 1, stop):
+            if cancel is not None and cancel.is_set():
+                return block[: i - start]
+            block[i - start] = self.read(i)
+        return block
+
+    def close(self) -> None:
+        """Release any file handles held by the source."""
+        pass
+
+
+@final
+class ImageFrameSource(FrameSource):
+    """A single still image, e.g. dark.png or a calibration pattern."""
+
+    def __init__(self, image_path: Path):
+        with Image.open(image_path) as im:
+            self._frame = np.ascontiguousarray(np.asarray(im.convert("RGB")))
+        self.height, self.width = self._frame.shape[:2]
+        self.fps = 0.0
+        self.frame_count = 1
+
+    @override
+    def read(self, index: int) -> np.ndarray:
+        return self._frame
+
+
+@final
+class ArrayFrameSource(FrameSource):
+    """A single frame generated in memory, shown without a round trip through a file."""
+
+    def __init__(self, frame: np.ndarray):
+        self._frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        self.height, self.width = self._frame.shape[:2]
+        self.fps = 0.0
+        self.frame_count = 1
+
+    @override
+    def read(self, index: int) -> np.ndarray:
+        return self._frame
+
+
+@final
+class VideoFrameSource(FrameSource):
+    """Decodes an mp4 print file with OpenCV.
+
+    Sequential reads decode the next frame; anything else seeks first. The last
+    decoded frame is kept so repeated reads of the same index are free.
+    """
+
+    def __init__(self, video_path: Path):
+        import cv2
+
+        self._cv2 = cv2
+        self._cap = cv2.VideoCapture(str(video_path))
+        if not self._cap.isOpened():
+            raise FileNotFoundError(f"Unable to open video {video_path}")
+
+        self.width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = float(self._cap.get(cv2.CAP_PROP_FPS)) or 30.0
+        self.frame_count = max(int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT)), 1)
+
+        self._next_index = 0
+        self._last_index = -1
+        self._last_frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+    @override
+    def read(self, index: int) -> np.ndarray:
+        index %= self.frame_count
+        if index == self._last_index:
+            return self._last_frame
+
+        if index != self._next_index:
+            _ = self._cap.set(self._cv2.CAP_PROP_POS_FRAMES, index)
+
+        ok, bgr = self._cap.read()
+        if not ok:
+            # Some containers over-report CAP_PROP_FRAME_COUNT; clamp to what decodes.
+            self.frame_count = max(index, 1)
+            _ = self._cap.set(self._cv2.CAP_PROP_POS_FRAMES, 0)
+            self._next_index = 0
+            return self._last_frame
+
+        self._cv2.cvtColor(bgr, self._cv2.COLOR_BGR2RGB, dst=self._last_frame)
+        self._last_index = index
+        self._next_index = index + 1
+        return self._last_frame
+
+    @override
+    def close(self) -> None:
+        self._cap.release()
@@ -0,0 +1,219 @@
+"""
+mpv_ipc.py — A long-lived mpv driven over its JSON IPC socket.
+
+Instead of spawning mpv for every still image, one idle mpv window is kept
+open and files are swapped with `loadfile`. If mpv dies unexpectedly it is
+restarted and the last file is loaded again.
+
+See https://mpv.io/manual/stable/#json-ipc for the protocol.
+"""
+
+import atexit
+import collections
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, final
+
+_DEFAULT_SOCKET = Path("/tmp/opencal-mpv.sock")
+_CONNECT_TIMEOUT = 5.0
+_REPLY_TIMEOUT = 2.0
+
+
+class MpvError(RuntimeError):
+    pass
+
+
+@final
+class MpvController:
+    """Owns one `mpv --idle` process and talks to it over a Unix socket.
+
+    `command` is the mpv executable and any extra arguments; the IPC and idle
+    flags are appended. Tests point it at `opencal.hardware.projection.fake_mpv`.
+    """
+
+    def __init__(
+        self,
+        command: list[str] | None = None,
+        socket_path: Path = _DEFAULT_SOCKET,
+    ):
+        self.command = command or [
+            "/usr/bin/mpv",
+            "--fs",
+            "--no-audio",
+            "--loop-file=inf",
+            "--image-display-duration=inf",
+        ]
+        self.socket_path = socket_path
+        self.swap_latencies: collections.deque[float] = collections.deque(maxlen=100)
+        self.restarts = 0
+
+        self._lock = threading.RLock()
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._sock: socket.socket | None = None
+        self._closing = False
+        self._current: Path | None = None
+
+        self._next_id = 1
+        self._replies: dict[int, dict[str, Any]] = {}
+        self._events: collections.deque[dict[str, Any]] = collections.deque(maxlen=64)
+        self._cond = threading.Condition()
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            self._closing = False
+            self._spawn()
+            atexit.register(self.close)
+
+    def loadfile(self, path: Path) -> float:
+        """Show `path` and wait until mpv has presented it. Returns the swap latency."""
+        with self._lock:
+            self.start()
+            self._current = path
+            t0 = time.perf_counter()
+            with self._cond:
+                self._events.clear()
+            _ = self.command_sync("loadfile", str(path), "replace")
+            self._wait_event("playback-restart")
+            latency = time.perf_counter() - t0
+        self.swap_latencies.append(latency)
+        print(f"INFO: mpv swapped to {path.name} in {latency * 1000:.1f} ms")
+        return latency
+
+    def stop(self) -> None:
+        """Unload the current file; mpv stays open and idle."""
+        with self._lock:
+            self._current = None
+            if self.running:
+                _ = self.command_sync("stop")
+
+    def close(self) -> None:
+        """Quit mpv for good."""
+        with self._lock:
+            self._closing = True
+            self._current = None
+            if self.running:
+                try:
+                    _ = self.command_sync("quit")
+                    assert self._proc is not None
+                    _ = self._proc.wait(timeout=_REPLY_TIMEOUT)
+                except Exception:
+                    if self._proc is not None:
+                        self._proc.kill()
+            self._disconnect()
+
+    def command_sync(self, *args: Any) -> Any:
+        """Send one command and return its `data`. Raises MpvError on failure."""
+        with self._cond:
+            request_id = self._next_id
+            self._next_id += 1
+        msg = json.dumps({"command": list(args), "request_id": request_id}) + "\n"
+        try:
+            assert self._sock is not None
+            self._sock.sendall(msg.encode())
+        except (OSError, AssertionError) as e:
+            raise MpvError(f"mpv IPC send failed: {e}") from e
+
+        deadline = time.monotonic() + _REPLY_TIMEOUT
+        with self._cond:
+            while request_id not in self._replies:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise MpvError(f"mpv did not answer {args[0]!r}")
+            reply = self._replies.pop(request_id)
+        if reply.get("error") != "success":
+            raise MpvError(f"mpv {args[0]!r} failed: {reply.get('error')}")
+        return reply.get("data")
+
+    # ── Process / socket management ──────────────────────────────────────────
+
+    def _spawn(self) -> None:
+        self.socket_path.unlink(missing_ok=True)
+        env = os.environ.copy()
+        env["DISPLAY"] = ":0"
+        args = self.command + [
+            "--idle=yes",
+            "--force-window=yes",
+            f"--input-ipc-server={self.socket_path}",
+        ]
+        self._proc = subprocess.Popen(args, env=env)
+        self._connect()
+        threading.Thread(target=self._watch, args=(self._proc,), daemon=True).start()
+
+    def _connect(self) -> None:
+        deadline = time.monotonic() + _CONNECT_TIMEOUT
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(str(self.socket_path))
+                break
+            except OSError:
+                sock.close()
+                if time.monotonic() > deadline:
+                    raise MpvError(f"mpv IPC socket {self.socket_path} never appeared")
+                time.sleep(0.02)
+        self._sock = sock
+        threading.Thread(target=self._read_loop, args=(sock,), daemon=True).start()
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _watch(self, proc: subprocess.Popen[bytes]) -> None:
+        """Restart mpv if it exits without close() being called."""
+        code = proc.wait()
+        with self._lock:
+            if self._closing or proc is not self._proc:
+                return
+            print(f"WARNING: mpv exited with code {code}, restarting.")
+            self.restarts += 1
+            self._disconnect()
+            try:
+                self._spawn()
+                if self._current is not None:
+                    _ = self.loadfile(self._current)
+            except Exception as e:
+                print(f"ERROR: Failed to restart mpv: {e}")
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        buf = b""
+        while True:
+            try:
+                chunk = sock.recv(4096)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if not line.strip():
+                    continue
+                msg: dict[str, Any] = json.loads(line)
+                with self._cond:
+                    if "request_id" in msg and "event" not in msg:
+                        self._replies[msg["request_id"]] = msg
+                    elif "event" in msg:
+                        self._events.append(msg)
+                    self._cond.notify_all()
+
+    def _wait_event(self, name: str) -> None:
+        deadline = time.monotonic() + _REPLY_TIMEOUT
+        with self._cond:
+            while not any(e["event"] == name for e in self._events):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise MpvError(f"mpv never sent {name!r}")
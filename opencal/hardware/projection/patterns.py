@@ -0,0 +1,160 @@
+"""
+patterns.py — Calibration patterns rendered in memory at the display resolution.
+
+Every pattern is a single-channel (height, width) uint8 frame, ready for
+Projector.display_frame() or an ArrayFrameSource, and is built with a few
+NumPy slice assignments instead of being drawn, saved as a PNG and read back.
+Results are memoized by their arguments, least recently used first out of a
+shared memory budget, and returned read-only, so showing the same pattern
+again costs nothing and callers cannot change the cached copy; use
+np.array(pattern) for a writable one.
+
+make_calibration.py writes the caliper patterns to disk for viewers other than
+the projector.
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+import pygame
+
+# Uniform grey levels projected by the flat-field calibration
+FLAT_LEVELS = (32, 64, 96, 128, 160, 192, 224, 255)
+
+# A bar sweep renders ~100 distinct 2 MB frames; keep the recent ones, not all of them.
+_CACHE_BYTES = 64 << 20
+_GRAY_PALETTE = [(i, i, i) for i in range(256)]
+
+Size = tuple[int, int]
+
+_cache: OrderedDict[tuple[Any, ...], np.ndarray] = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def _memoized(render: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+    @functools.wraps(render)
+    def cached(*args: Any, **kwargs: Any) -> np.ndarray:
+        global _cache_bytes
+        key = (render.__name__, args, tuple(sorted(kwargs.items())))
+        with _cache_lock:
+            frame = _cache.get(key)
+            if frame is not None:
+                _cache.move_to_end(key)
+                return frame
+        frame = render(*args, **kwargs)
+        frame.setflags(write=False)
+        with _cache_lock:
+            if key not in _cache:
+                _cache[key] = frame
+                _cache_bytes += frame.nbytes
+            while _cache_bytes > _CACHE_BYTES and len(_cache) > 1:
+                _cache_bytes -= _cache.popitem(last=False)[1].nbytes
+        return frame
+
+    return cached
+
+
+def _black(display_size: Size) -> np.ndarray:
+    dw, dh = display_size
+    return np.zeros((dh, dw), dtype=np.uint8)
+
+
+@_memoized
+def dark(display_size: Size) -> np.ndarray:
+    """Solid black."""
+    return _black(display_size)
+
+
+@_memoized
+def flat(display_size: Size, level: int) -> np.ndarray:
+    """Uniform grey at `level`."""
+    dw, dh = display_size
+    return np.full((dh, dw), level, dtype=np.uint8)
+
+
+@_memoized
+def full_extent(display_size: Size, border: int = 5) -> np.ndarray:
+    """White border outlining the exact edges of the projected frame."""
+    frame = _black(display_size)
+    frame[:border] = frame[-border:] = 255
+    frame[:, :border] = frame[:, -border:] = 255
+    return frame
+
+
+@_memoized
+def checkerboard(display_size: Size, cell: Size, invert: bool = False) -> np.ndarray:
+    """Checkerboard of (width, height) `cell` squares centred on the display, white top left."""
+    dw, dh = display_size
+    cw, ch = cell
+    cols = (np.arange(dw) - (dw % cw) // 2) // cw
+    rows = (np.arange(dh) - (dh % ch) // 2) // ch
+    white = ((rows[:, None] + cols[None, :]) % 2 == 0) != invert
+    return white.astype(np.uint8) * 255
+
+
+@_memoized
+def crosshair(display_size: Size, line: int = 3, corner: int = 50, dot_radius: int = 15) -> np.ndarray:
+    """Centre lines, solid `corner` px squares in the corners and a dot in the middle."""
+    dw, dh = display_size
+    frame = _black(display_size)
+    cx, cy = dw // 2, dh // 2
+    frame[:, cx - line // 2 : cx - line // 2 + line] = 255
+    frame[cy - line // 2 : cy - line // 2 + line] = 255
+    for rows in (slice(0, corner), slice(dh - corner, dh)):
+        for cols in (slice(0, corner), slice(dw - corner, dw)):
+            frame[rows, cols] = 255
+    y, x = np.ogrid[-dot_radius : dot_radius + 1, -dot_radius : dot_radius + 1]
+    dot = frame[cy - dot_radius : cy + dot_radius + 1, cx - dot_radius : cx + dot_radius + 1]
+    dot[x * x + y * y <= dot_radius * dot_radius] = 255
+    return frame
+
+
+@_memoized
+def grid(display_size: Size, divisions: int = 10, line: int = 1, centre_line: int = 3) -> np.ndarray:
+    """Lines at every 1/`divisions` of width and height, the centre lines drawn thicker.
+
+    The last line falls just off the display, as in cal_4_grid_10pct.png.
+    """
+    dw, dh = display_size
+    frame = _black(display_size)
+    for i in range(divisions + 1):
+        width = centre_line if 2 * i == divisions else line
+        x = dw * i // divisions - width // 2
+        y = dh * i // divisions - width // 2
+        frame[:, max(x, 0) : max(x + width, 0)] = 255
+        frame[max(y, 0) : max(y + width, 0)] = 255
+    return frame
+
+
+@_memoized
+def box(display_size: Size, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+    """White rectangle [x0, x1) x [y0, y1), clipped to the display."""
+    frame = _black(display_size)
+    frame[max(y0, 0) : max(y1, 0), max(x0, 0) : max(x1, 0)] = 255
+    return frame
+
+
+def bar(display_size: Size, centre: float, width: int) -> np.ndarray:
+    """Full-height white bar `width` px wide centred at display x `centre`."""
+    x0 = int(round(centre - width / 2))
+    return box(display_size, x0, 0, x0 + width, display_size[1])
+
+
+def quadrant(display_size: Size, index: int) -> np.ndarray:
+    """One lit quadrant: 0 top left, 1 top right, 2 bottom right, 3 bottom left."""
+    dw, dh = display_size
+    x0 = dw // 2 if index in (1, 2) else 0
+    y0 = dh // 2 if index in (2, 3) else 0
+    return box(display_size, x0, y0, x0 + dw // 2, y0 + dh // 2)
+
+
+def to_surface(frame: np.ndarray) -> pygame.Surface:
+    """Wrap a pattern as an 8-bit grey pygame surface sharing its memory. Do not draw on it."""
+    h, w = frame.shape
+    surface = pygame.image.frombuffer(frame.data, (w, h), "P")
+    surface.set_palette(_GRAY_PALETTE)
+    return surface
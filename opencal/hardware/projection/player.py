@@ -0,0 +1,197 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import final
+
+import pygame
+
+from .frame_source import FrameSource
+from .scheduler import FrameScheduler, WallClockScheduler
+
+_GRAY_PALETTE = [(i, i, i) for i in range(256)]
+
+
+def fit_size(display: tuple[int, int], source: tuple[int, int], size: int) -> tuple[int, int]:
+    """Fit `source` to `display` keeping its aspect ratio, then scale by `size` percent."""
+    (dw, dh), (sw, sh) = display, source
+    fit = min(dw / sw, dh / sh) * size / 100
+    return max(1, round(sw * fit)), max(1, round(sh * fit))
+
+
+@dataclass(frozen=True)
+class _Job:
+    source: FrameSource
+    size: int
+    scheduler: FrameScheduler
+
+
+@final
+class FramePlayer:
+    """Projects frames from a FrameSource on the pygame display owned by PygameApp.
+
+    Any thread may call play(), show() or stop(); the request is picked up on the
+    next call to render() from the pygame thread, so switching what is projected
+    costs one frame instead of a process launch. All decoding and blitting happens
+    on the pygame thread, which also owns the source once it is adopted.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: _Job | None = None
+        self._swap_requested = False
+        self._job: _Job | None = None
+        self._display_size: tuple[int, int] | None = None
+
+        self._t_request = 0.0
+        self._awaiting_first = False
+        self._shown_index = -1
+        # True once a still frame has been presented and can stay on screen as is
+        self._still_on_screen = False
+        self._frame: pygame.Surface | None = None
+        self._scaled: pygame.Surface | None = None
+        self._dest = pygame.Rect(0, 0, 0, 0)
+
+        self.first_frame = threading.Event()
+        self.first_frame_latency: float | None = None
+
+    # ── Control (any thread) ─────────────────────────────────────────────────
+
+    @property
+    def display_size(self) -> tuple[int, int] | None:
+        return self._display_size
+
+    @property
+    def available(self) -> bool:
+        """True while PygameApp has a display this player can draw on."""
+        return self._display_size is not None
+
+    @property
+    def active(self) -> bool:
+        """True while something is being (or is about to be) projected."""
+        with self._lock:
+            return self._pending is not None if self._swap_requested else self._job is not None
+
+    @property
+    def unchanged(self) -> bool:
+        """True while the display already shows the current still frame, so nothing needs drawing."""
+        with self._lock:
+            return self._still_on_screen and not self._swap_requested
+
+    def play(
+        self,
+        source: FrameSource,
+        size: int = 100,
+        loop: bool = True,
+        scheduler: FrameScheduler | None = None,
+    ) -> None:
+        """Start projecting `source` at `size` percent of the fitted display size.
+
+        Frames are picked by `scheduler`, or by wall clock at the source fps if None.
+        """
+        if scheduler is None:
+            scheduler = WallClockScheduler(source.fps, source.frame_count, loop)
+        with self._lock:
+            self._pending = _Job(source, size, scheduler)
+            self._swap_requested = True
+            self._t_request = time.perf_counter()
+            self._awaiting_first = True
+            self.first_frame.clear()
+
+    def show(self, source: FrameSource) -> None:
+        """Project a single still frame fullscreen until stop() or the next play()."""
+        self.play(source, size=100, loop=False)
+
+    def stop(self) -> None:
+        with self._lock:
+            self._pending = None
+            self._swap_requested = True
+            self._awaiting_first = False
+
+    # ── Display side (pygame thread) ─────────────────────────────────────────
+
+    def bind_display(self, size: tuple[int, int]) -> None:
+        self._display_size = size
+        self._still_on_screen = False
+        self._frame = None
+        self._scaled = None
+
+    def unbind_display(self) -> None:
+        with self._lock:
+            self._display_size = None
+            self._adopt(None)
+
+    def render(self, surf: pygame.Surface) -> bool:
+        """Draw the current frame onto the cleared `surf`. Returns False if nothing is playing."""
+        with self._lock:
+            if self._swap_requested:
+                self._swap_requested = False
+                self._adopt(self._pending)
+                self._pending = None
+            job = self._job
+
+        if job is None:
+            return False
+
+        source = job.source
+        index = job.scheduler.frame_index()
+        if index != self._shown_index or self._frame is None or source.pending:
+            frame = source.read(index)
+            size = (source.width, source.height)
+            if frame.ndim == 2:
+                # Single-channel frames (gray or unpacked bit frames) go in as 8-bit palette.
+                raw = pygame.image.frombuffer(frame.data, size, "P")
+                raw.set_palette(_GRAY_PALETTE)
+            else:
+                raw = pygame.image.frombuffer(frame.data, size, "RGB")
+            if raw.get_size() == self._dest.size:
+                # Pre-scaled sources (e.g. the frame cache) are blitted as they are.
+                self._frame = raw
+            else:
+                if self._scaled is None or self._scaled.get_bitsize() != raw.get_bitsize():
+                    self._scaled = pygame.Surface(self._dest.size, 0, raw)
+                    if frame.ndim == 2:
+                        self._scaled.set_palette(_GRAY_PALETTE)
+                self._frame = pygame.transform.scale(raw, self._dest.size, self._scaled)
+            self._shown_index = index
+
+        _ = surf.blit(self._frame, self._dest)
+        return True
+
+    def presented(self) -> None:
+        """Called by PygameApp right after the display flip that showed render()'s output."""
+        job = self._job
+        if job is None:
+            return
+        job.scheduler.presented(self._shown_index)
+        self._still_on_screen = job.source.frame_count == 1 and not job.source.pending
+        if self._awaiting_first:
+            self._awaiting_first = False
+            self.first_frame_latency = time.perf_counter() - self._t_request
+            self.first_frame.set()
+
+    @property
+    def fps(self) -> float:
+        job = self._job
+        return job.source.fps if job is not None else 0.0
+
+    def _adopt(self, job: _Job | None) -> None:
+        # Drop surfaces first: they may wrap memory owned by the outgoing source.
+        self._frame = None
+        self._scaled = None
+        if self._job is not None and (job is None or job.source is not self._job.source):
+            self._job.source.close()
+        self._job = job
+        self._shown_index = -1
+        self._still_on_screen = False
+        if job is None or self._display_size is None:
+            return
+        self._dest = self._fit(job)
+        job.scheduler.start()
+
+    def _fit(self, job: _Job) -> pygame.Rect:
+        assert self._display_size is not None
+        dw, dh = self._display_size
+        w, h = job.source.width, job.source.height
+        if not job.source.prescaled:
+            w, h = fit_size(self._display_size, (w, h), job.size)
+        return pygame.Rect((dw - w) // 2, (dh - h) // 2, w, h)
@@ -0,0 +1,159 @@
+"""
+remap.py — Calibration-driven per-pixel remap of frames onto the display.
+
+Two optical errors are corrected by looking up, for every display pixel,
+which source pixel it should show:
+
+keystone    `keystone` is a 3x3 homography from display pixels to the
+            undistorted image plane (in display pixel units), as measured
+            with the camera. Identity when the projector is square-on.
+refraction  The vial is a cylindrical lens. A ray entering at distance u
+            from the axis travels inside resin of index n at distance u / n
+            from it, so display column u must show the sinogram column r = u / n.
+            Columns that miss the vial (|u| > radius) stay dark.
+
+The table is built once per display size, print size and source size and
+applied with np.take into a preallocated buffer, so a frame costs one gather
+and no allocation. Output frames always cover the whole display.
+"""
+
+from dataclasses import dataclass
+from typing import final, override
+
+import numpy as np
+
+from .frame_source import FrameSource
+from .intensity import IntensityCorrection
+from .player import fit_size
+
+
+@dataclass(frozen=True)
+class RemapCalibration:
+    keystone: np.ndarray | None = None
+    refractive_index: float = 1.0
+    # Vial radius in display pixels; None leaves columns outside the vial alone
+    vial_radius: float | None = None
+    # Display column of the rotation axis; None is the display centre
+    axis_x: float | None = None
+
+    @property
+    def is_identity(self) -> bool:
+        keystone = self.keystone is None or np.allclose(self.keystone, np.eye(3))
+        return keystone and self.refractive_index == 1.0 and self.vial_radius is None
+
+
+def build_lut(
+    calibration: RemapCalibration,
+    display_size: tuple[int, int],
+    source_size: tuple[int, int],
+    size: int,
+    prescaled: bool = False,
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """Flat source index for every display pixel, and a 0/1 mask of pixels left dark.
+
+    The source is placed on the display as FramePlayer would (fitted and scaled
+    by `size` percent, or only centred if `prescaled`) before the corrections.
+    The mask is None when every display pixel lands on the source.
+    """
+    dw, dh = display_size
+    sw, sh = source_size
+    w, h = (sw, sh) if prescaled else fit_size(display_size, source_size, size)
+    x0, y0 = (dw - w) // 2, (dh - h) // 2
+
+    py, px = np.mgrid[0:dh, 0:dw].astype(np.float64) + 0.5
+    if calibration.keystone is not None:
+        k = np.asarray(calibration.keystone, dtype=np.float64)
+        qw = k[2, 0] * px + k[2, 1] * py + k[2, 2]
+        qx = (k[0, 0] * px + k[0, 1] * py + k[0, 2]) / qw
+        qy = (k[1, 0] * px + k[1, 1] * py + k[1, 2]) / qw
+    else:
+        qx, qy = px, py
+
+    valid = np.ones((dh, dw), dtype=bool)
+    axis = dw / 2 if calibration.axis_x is None else calibration.axis_x
+    u = qx - axis
+    if calibration.vial_radius is not None:
+        valid &= np.abs(u) <= calibration.vial_radius
+    qx = axis + u / calibration.refractive_index
+
+    sx = np.floor((qx - x0) * (sw / w)).astype(np.intp)
+    sy = np.floor((qy - y0) * (sh / h)).astype(np.intp)
+    valid &= (sx >= 0) & (sx < sw) & (sy >= 0) & (sy < sh)
+    lut = np.where(valid, sy.clip(0, sh - 1) * sw + sx.clip(0, sw - 1), 0).ravel()
+    if valid.all():
+        return lut, None
+    return lut, valid.astype(np.uint8)
+
+
+@final
+class FrameRemap:
+    """Applies a lookup table from build_lut() to frames of one shape."""
+
+    def __init__(self, lut: np.ndarray, mask: np.ndarray | None, display_size: tuple[int, int]):
+        self.display_size = display_size
+        self._lut = lut
+        self._mask = mask
+        # Mask repeated over the channels; a broadcast multiply is ~20x slower
+        self._masks: dict[tuple[int, ...], np.ndarray] = {}
+
+    def apply(self, frame: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Remap a (h, w[, c]) C-contiguous frame into `out`, shaped (display h, display w[, c])."""
+        channels = frame.shape[2:]
+        if channels:
+            # Gather whole pixels as opaque c-byte items rather than rows of a (n, c) array.
+            pixel = np.dtype(f"V{channels[0]}")
+            _ = np.take(frame.reshape(-1).view(pixel), self._lut, out=out.reshape(-1).view(pixel))
+        else:
+            _ = np.take(frame.reshape(-1), self._lut, out=out.reshape(-1))
+        if self._mask is not None:
+            mask = self._masks.get(channels)
+            if mask is None:
+                mask = np.repeat(self._mask[..., None], channels[0], axis=-1) if channels else self._mask
+                self._masks[channels] = mask
+            _ = np.multiply(out, mask, out=out)
+        return out
+
+
+@final
+class RemappedFrameSource(FrameSource):
+    """Wraps a source and returns its frames remapped to the full display.
+
+    An IntensityCorrection, if given, is applied in place to each remapped frame.
+    """
+
+    def __init__(
+        self,
+        source: FrameSource,
+        calibration: RemapCalibration,
+        display_size: tuple[int, int],
+        size: int,
+        intensity: IntensityCorrection | None = None,
+    ):
+        self._source = source
+        lut, mask = build_lut(
+            calibration, display_size, (source.width, source.height), size, source.prescaled
+        )
+        self._remap = FrameRemap(lut, mask, display_size)
+        self._intensity = intensity
+        self.width, self.height = display_size
+        self.fps = source.fps
+        self.frame_count = source.frame_count
+        self.frames_per_rev = source.frames_per_rev
+        self.prescaled = True
+        self._out: np.ndarray | None = None
+
+    @override
+    def read(self, index: int) -> np.ndarray:
+        frame = self._source.read(index)
+        self.frame_count = self._source.frame_count
+        self.pending = self._source.pending
+        if self._out is None or self._out.shape[2:] != frame.shape[2:]:
+            self._out = np.empty((self.height, self.width, *frame.shape[2:]), dtype=np.uint8)
+        out = self._remap.apply(np.ascontiguousarray(frame), self._out)
+        if self._intensity is not None:
+            _ = self._intensity.apply(out)
+        return out
+
+    @override
+    def close(self) -> None:
+        self._source.close()
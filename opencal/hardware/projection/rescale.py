@@ -0,0 +1,42 @@
+from typing import final
+
+import numpy as np
+
+from .player import fit_size
+
+
+@final
+class FrameRescaler:
+    """Crops, scales and centres frames for the projector with precomputed index maps.
+
+    The source is fitted to the display keeping its aspect ratio and scaled by
+    `size` percent, as FramePlayer does live. Only the part that lands on the
+    display is produced: above 100% the overflow is cropped, below it the
+    output is smaller than the display and `offset` says where it goes.
+
+    Resampling is nearest-neighbour through two integer index maps, so every
+    output pixel is an exact source value and a whole block of frames is done
+    with two np.take calls.
+    """
+
+    def __init__(self, source_size: tuple[int, int], display_size: tuple[int, int], size: int):
+        sw, sh = source_size
+        dw, dh = display_size
+        w, h = fit_size(display_size, source_size, size)
+        x0, y0 = (dw - w) // 2, (dh - h) // 2
+
+        vx0, vy0 = max(x0, 0), max(y0, 0)
+        vx1, vy1 = min(x0 + w, dw), min(y0 + h, dh)
+        xs = np.arange(vx0, vx1) - x0
+        ys = np.arange(vy0, vy1) - y0
+        self.cols = np.minimum(((xs + 0.5) * (sw / w)).astype(np.intp), sw - 1)
+        self.rows = np.minimum(((ys + 0.5) * (sh / h)).astype(np.intp), sh - 1)
+
+        self.dest_size = (w, h)
+        self.out_size = (vx1 - vx0, vy1 - vy0)
+        self.offset = (vx0, vy0)
+
+    def apply(self, frames: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Rescale a (n, h, w, c) block, or a single (h, w, c) frame."""
+        rows = np.take(frames, self.rows, axis=-3)
+        return np.take(rows, self.cols, axis=-2, out=out)
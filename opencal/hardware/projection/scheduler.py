@@ -0,0 +1,213 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, final, override
+
+import numpy as np
+
+from .timing import FrameTimingLog
+
+
+class AnglePhase(ABC):
+    """Unwrapped rotation of the vial since start(), in encoder counts."""
+
+    counts_per_rev: int
+
+    @abstractmethod
+    def start(self) -> None: ...
+
+    @abstractmethod
+    def read(self) -> float: ...
+
+
+@final
+class EncoderPhase(AnglePhase):
+    """Unwraps a modulo-cpr encoder reading such as StepperMotorInterface.angle_in_steps().
+
+    Must be polled at least twice per revolution; the display loop does that
+    at any printable RPM. `direction` is +1 if the counts increase while printing.
+    """
+
+    def __init__(self, read_angle: Callable[[], int], counts_per_rev: int, direction: int = 1):
+        self.counts_per_rev = counts_per_rev
+        self._read_angle = read_angle
+        self._direction = 1 if direction >= 0 else -1
+        self._last = 0
+        self._unwrapped = 0
+
+    @override
+    def start(self) -> None:
+        self._last = self._read_angle()
+        self._unwrapped = 0
+
+    @override
+    def read(self) -> float:
+        angle = self._read_angle()
+        half = self.counts_per_rev // 2
+        delta = (angle - self._last + half) % self.counts_per_rev - half
+        self._last = angle
+        self._unwrapped += delta
+        return float(self._unwrapped * self._direction)
+
+
+@final
+class CommandedPhase(AnglePhase):
+    """Integrates the commanded RPM over time, for drivers without an encoder."""
+
+    def __init__(self, get_rpm: Callable[[], float], counts_per_rev: int):
+        self.counts_per_rev = counts_per_rev
+        self._get_rpm = get_rpm
+        self._t_last = 0.0
+        self._position = 0.0
+
+    @override
+    def start(self) -> None:
+        self._t_last = time.perf_counter()
+        self._position = 0.0
+
+    @override
+    def read(self) -> float:
+        now = time.perf_counter()
+        self._position += (now - self._t_last) * self._get_rpm() / 60 * self.counts_per_rev
+        self._t_last = now
+        return self._position
+
+
+@final
+class AngleErrorMeter:
+    """Accumulates the angle between the vial and the frame on screen at each present.
+
+    The error of a presented frame is the phase the vial has actually reached
+    minus the phase the frame was rendered for, wrapped to ±half the video.
+    """
+
+    def __init__(self, phase: AnglePhase, frame_count: int, frames_per_rev: float):
+        self._phase = phase
+        self._frame_count = frame_count
+        self._frames_per_rev = frames_per_rev
+        self._deg_per_frame = 360 / frames_per_rev
+        self.reset()
+
+    def start(self) -> None:
+        self._phase.start()
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.last_error_deg = 0.0
+        self.last_angle_deg = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._max_abs = 0.0
+
+    def record(self, index: int) -> float:
+        """Read the phase now and record the error against the frame just presented."""
+        revs = self._phase.read() / self._phase.counts_per_rev
+        position = revs * self._frames_per_rev
+        half = self._frame_count / 2
+        error_frames = (position - index + half) % self._frame_count - half
+        error = error_frames * self._deg_per_frame
+
+        self.count += 1
+        self.last_error_deg = error
+        self.last_angle_deg = revs * 360
+        self._sum += error
+        self._sum_sq += error * error
+        self._max_abs = max(self._max_abs, abs(error))
+        return error
+
+    def summary(self) -> dict[str, float]:
+        """Mean, RMS and worst-case angle error in degrees over all presented frames."""
+        n = max(self.count, 1)
+        return {
+            "frames": self.count,
+            "mean_deg": self._sum / n,
+            "rms_deg": math.sqrt(self._sum_sq / n),
+            "max_abs_deg": self._max_abs,
+        }
+
+
+class FrameScheduler(ABC):
+    """Chooses the frame index for each display refresh."""
+
+    meter: AngleErrorMeter | None = None
+    timing: FrameTimingLog | None = None
+
+    def start(self) -> None:
+        """Called when playback (re)starts, right before the first frame_index()."""
+        pass
+
+    @abstractmethod
+    def frame_index(self) -> int: ...
+
+    def presented(self, index: int) -> None:
+        """Called after the flip that put `index` on screen."""
+        t = time.perf_counter()
+        angle = error = math.nan
+        if self.meter is not None:
+            error = self.meter.record(index)
+            angle = self.meter.last_angle_deg
+        if self.timing is not None:
+            self.timing.record(t, index, angle, error)
+
+
+@final
+class WallClockScheduler(FrameScheduler):
+    """Plays at the source frame rate by wall clock, the way cvlc --loop does."""
+
+    def __init__(
+        self, fps: float, frame_count: int, loop: bool = True, meter: AngleErrorMeter | None = None
+    ):
+        self._fps = fps
+        self._frame_count = frame_count
+        self._loop = loop
+        self._t_start = 0.0
+        self.meter = meter
+
+    @override
+    def start(self) -> None:
+        self._t_start = time.perf_counter()
+        if self.meter is not None:
+            self.meter.start()
+
+    @override
+    def frame_index(self) -> int:
+        if self._frame_count <= 1 or self._fps <= 0:
+            return 0
+        index = int((time.perf_counter() - self._t_start) * self._fps)
+        if self._loop:
+            return index % self._frame_count
+        return min(index, self._frame_count - 1)
+
+
+@final
+class AngleScheduler(FrameScheduler):
+    """Picks the frame from the vial angle, so projection stays phase-locked.
+
+    A lookup table maps each encoder count within a revolution to its fractional
+    frame position; whole revolutions advance by frames_per_rev. Because the
+    index is derived from the measured angle every refresh, RPM error and
+    dropped refreshes never accumulate into drift.
+    """
+
+    def __init__(self, phase: AnglePhase, frame_count: int, frames_per_rev: float):
+        if frames_per_rev <= 0:
+            raise ValueError("frames_per_rev must be positive")
+        self._phase = phase
+        self._frame_count = frame_count
+        self._frames_per_rev = frames_per_rev
+        cpr = phase.counts_per_rev
+        self._lut = np.arange(cpr, dtype=np.float64) * (frames_per_rev / cpr)
+        self.meter = AngleErrorMeter(phase, frame_count, frames_per_rev)
+
+    @override
+    def start(self) -> None:
+        self._phase.start()
+        if self.meter is not None:
+            self.meter.reset()
+
+    @override
+    def frame_index(self) -> int:
+        revs, count = divmod(self._phase.read(), self._phase.counts_per_rev)
+        position = revs * self._frames_per_rev + self._lut[int(count)]
+        return int(position) % self._frame_count
@@ -0,0 +1,155 @@
+"""
+sinogram.py — Project sinogram arrays (.npy / .npz) without encoding an mp4.
+
+Arrays are memory-mapped and converted one frame at a time into a reused RGB
+buffer, so files larger than RAM stream straight from disk and no lossy video
+codec sits between the optimised dose and the projector.
+
+Accepted layouts
+----------------
+frames      (n_angles, height, width) or (n_angles, height, width, 3). Default.
+vamtoolbox  (n_r, n_angles, n_z) as held by a VAMToolbox Sinogram; frame i is
+            array[:, i, :].T, i.e. z runs down the rows and r across.
+
+A .npy holds the array alone, in "frames" layout. A .npz (saved with np.savez,
+not savez_compressed, so it can be mapped) holds it under "sinogram" plus
+optional "layout" (one of the above) and "angles" (degrees, one per frame).
+
+Integer arrays use their full dtype range; float arrays are taken to be
+normalised to [0, 1], as VAMToolbox produces them, and are clipped.
+"""
+
+import threading
+import zipfile
+from pathlib import Path
+from typing import final, override
+
+import numpy as np
+
+from .frame_source import FrameSource
+
+SINOGRAM_SUFFIXES = (".npy", ".npz")
+
+
+def is_sinogram(path: Path) -> bool:
+    return path.suffix.lower() in SINOGRAM_SUFFIXES
+
+
+def _mmap_npz_member(path: Path, name: str) -> np.ndarray:
+    """Memory-map one array of an uncompressed .npz in place."""
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(f"{name}.npy")
+        if info.compress_type != zipfile.ZIP_STORED:
+            print(f"WARNING: {path.name} is compressed and will be loaded into RAM; "
+                  "save it with np.savez to stream it from disk.")
+            with zf.open(info) as f:
+                return np.load(f)
+
+    with open(path, "rb") as f:
+        # Skip the zip local file header: 30 fixed bytes + name + extra field.
+        f.seek(info.header_offset)
+        local = f.read(30)
+        name_len = int.from_bytes(local[26:28], "little")
+        extra_len = int.from_bytes(local[28:30], "little")
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        if np.lib.format.read_magic(f) == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    order = "F" if fortran_order else "C"
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order=order)
+
+
+def load_sinogram(path: Path) -> tuple[np.ndarray, str, np.ndarray | None]:
+    """Return (memory-mapped array, layout, angles in degrees or None)."""
+    if path.suffix.lower() == ".npy":
+        return np.load(path, mmap_mode="r"), "frames", None
+
+    with np.load(path) as npz:
+        layout = str(npz["layout"]) if "layout" in npz.files else "frames"
+        angles = np.asarray(npz["angles"], dtype=np.float64) if "angles" in npz.files else None
+    return _mmap_npz_member(path, "sinogram"), layout, angles
+
+
+@final
+class SinogramFrameSource(FrameSource):
+    """Streams frames of a memory-mapped sinogram, one angle per frame.
+
+    `frames_per_rev` is the number of angles in 360°, so the angle scheduler
+    maps encoder angle to frame without any notion of fps; `fps` is derived
+    from `rpm` for wall-clock playback.
+    """
+
+    def __init__(self, path: Path, rpm: float = 1.0):
+        self._array, self._layout, angles = load_sinogram(path)
+        arr = self._array
+        if self._layout == "frames":
+            if arr.ndim not in (3, 4):
+                raise ValueError(f"Expected (angles, h, w[, 3]) sinogram, got shape {arr.shape}")
+            self.frame_count, self.height, self.width = arr.shape[:3]
+        elif self._layout == "vamtoolbox":
+            if arr.ndim != 3:
+                raise ValueError(f"Expected (r, angles, z) sinogram, got shape {arr.shape}")
+            self.width, self.frame_count, self.height = arr.shape
+        else:
+            raise ValueError(f"Unknown sinogram layout {self._layout!r}")
+
+        if angles is not None and len(angles) > 1:
+            step = (angles[-1] - angles[0]) / (len(angles) - 1)
+            self.frames_per_rev = 360 / step
+        else:
+            self.frames_per_rev = float(self.frame_count)
+        self.fps = self.frames_per_rev * rpm / 60
+        self.dtype = arr.dtype
+
+        if np.issubdtype(arr.dtype, np.integer):
+            self._scale = 255 / np.iinfo(arr.dtype).max
+        else:
+            self._scale = 255.0
+        self._gray = np.empty((self.height, self.width), dtype=np.float32)
+        self._rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._last_index = -1
+
+    @override
+    def read(self, index: int) -> np.ndarray:
+        index %= self.frame_count
+        if index == self._last_index:
+            return self._rgb
+
+        if self._layout == "frames":
+            frame = self._array[index]
+        else:
+            frame = self._array[:, index, :].T
+
+        if frame.ndim == 3:
+            if frame.dtype == np.uint8:
+                self._rgb[...] = frame
+            else:
+                np.clip(frame * self._scale, 0, 255, out=self._rgb, casting="unsafe")
+        else:
+            if frame.dtype == np.uint8:
+                self._rgb[...] = frame[..., None]
+            else:
+                np.multiply(frame, self._scale, out=self._gray, casting="unsafe")
+                np.clip(self._gray, 0, 255, out=self._gray)
+                self._rgb[...] = self._gray[..., None]
+        self._last_index = index
+        return self._rgb
+
+    @override
+    def read_block(self, start: int, stop: int, cancel: threading.Event | None = None) -> np.ndarray:
+        # One array copy; nothing to cancel part way through
+        if self._layout == "frames":
+            block = np.asarray(self._array[start:stop])
+        else:
+            block = np.asarray(self._array[:, start:stop, :]).transpose(1, 2, 0)
+        if block.dtype != np.uint8:
+            block = np.clip(block * self._scale, 0, 255).astype(np.uint8)
+        if block.ndim == 3:
+            block = np.repeat(block[..., None], 3, axis=-1)
+        return block
+
+    @override
+    def close(self) -> None:
+        del self._array
@@ -0,0 +1,88 @@
+"""
+timing.py — Per-frame timing log for projection.
+
+FrameTimingLog keeps one record per presented frame (time, frame index, vial
+angle and angle error) in a preallocated NumPy structured ring, so recording
+costs a few stores on the pygame thread and never allocates. At the end of a
+print the log is summarised and saved next to the camera recording.
+
+Summary fields
+--------------
+jitter_ms   standard deviation of the time between presents
+dropped     frames skipped between consecutive presents (index jumped by > 1)
+repeated    presents that showed the previous frame again although the vial
+            had already turned into the next frame's range (stale frames)
+angle error mean, RMS and worst-case error in degrees
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, final
+
+import numpy as np
+
+FRAME_RECORD = np.dtype(
+    [
+        ("t", np.float64),  # perf_counter seconds at present
+        ("frame", np.int64),  # frame index put on screen
+        ("angle_deg", np.float64),  # unwrapped vial angle, NaN without a phase
+        ("error_deg", np.float64),  # vial angle minus the frame's angle, NaN without a phase
+    ]
+)
+
+
+@final
+class FrameTimingLog:
+    """Ring of the last `capacity` presented frames; the default holds ~36 min at 60 Hz."""
+
+    def __init__(self, frame_count: int, frames_per_rev: float, capacity: int = 1 << 17):
+        self.frame_count = frame_count
+        self.frames_per_rev = frames_per_rev
+        self._records = np.zeros(capacity, dtype=FRAME_RECORD)
+        self._next = 0
+        self.total = 0
+
+    def record(self, t: float, frame: int, angle_deg: float, error_deg: float) -> None:
+        self._records[self._next] = (t, frame, angle_deg, error_deg)
+        self._next = (self._next + 1) % len(self._records)
+        self.total += 1
+
+    def records(self) -> np.ndarray:
+        """The retained records, oldest first (a copy)."""
+        if self.total < len(self._records):
+            return self._records[: self.total].copy()
+        return np.roll(self._records, -self._next)
+
+    def summary(self) -> dict[str, float]:
+        rec = self.records()
+        n = len(rec)
+        out: dict[str, float] = {"presents": self.total, "retained": n}
+        if n < 2:
+            return out
+
+        dt = np.diff(rec["t"])
+        out["interval_ms"] = float(np.median(dt) * 1e3)
+        out["jitter_ms"] = float(np.std(dt) * 1e3)
+        out["max_interval_ms"] = float(dt.max() * 1e3)
+
+        step = np.diff(rec["frame"]) % self.frame_count
+        out["dropped"] = int(np.maximum(step - 1, 0).sum())
+        # The frame the vial angle called for at each present
+        ideal = np.floor(rec["angle_deg"] / 360 * self.frames_per_rev) % self.frame_count
+        stale = (step == 0) & (ideal[1:] != rec["frame"][1:])
+        out["repeated"] = int(np.count_nonzero(stale & ~np.isnan(ideal[1:])))
+
+        err = rec["error_deg"][~np.isnan(rec["error_deg"])]
+        if len(err):
+            out["error_mean_deg"] = float(err.mean())
+            out["error_rms_deg"] = float(math.sqrt(float(np.mean(err * err))))
+            out["error_max_abs_deg"] = float(np.abs(err).max())
+        return out
+
+    def save(self, stem: Path) -> dict[str, Any]:
+        """Write `<stem>.npy` (the records) and `<stem>.json` (the summary). Returns the summary."""
+        summary = self.summary()
+        np.save(stem.with_name(stem.name + ".npy"), self.records())
+        _ = stem.with_name(stem.name + ".json").write_text(json.dumps(summary, indent=2))
+        return summary
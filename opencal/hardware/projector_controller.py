@@ -10,6 +10,22 @@ import numpy as np
 from PIL import Image
 
 from opencal.utils.config import ProjectorConfig
+from .projection import ArrayFrameSource, FramePlayer, FrameSource, ImageFrameSource, patterns
+from .projection.decoder import DecodedFrameSource, open_print_file
+from .projection.frame_cache import FrameCache
+from .projection.mpv_ipc import MpvController, MpvError
+from .projection.intensity import IntensityCorrection, load_gain_map
+from .projection.remap import RemapCalibration, RemappedFrameSource
+from .projection.sinogram import is_sinogram
+from .projection.timing import FrameTimingLog
+from .usb_manager import MP4Driver
+from .projection.scheduler import (
+    AngleErrorMeter,
+    AnglePhase,
+    AngleScheduler,
+    FrameScheduler,
+    WallClockScheduler,
+)
 
 
 class ProjectorOrientation(Enum):
@@ -53,10 +69,45 @@ class Projector:
         self.calibration_dir_path = Path(config.calibration_dir_path)
         # FIXME: Figure out where to put vial width config
         self.vial_width = 384  # Measured for small vial
+        self.frame_sync = config.frame_sync
+        self.decode_ring_frames = config.decode_ring_frames
+        self.refractive_index = config.refractive_index
+        self.keystone = None if config.keystone is None else np.asarray(config.keystone, dtype=float)
+        self.gamma = config.gamma
+        self.gain_map_path = None
+        if config.gain_map_path is not None:
+            self.gain_map_path = Path(config.gain_map_path).expanduser()
+        self._intensity: IntensityCorrection | None = None
+        self.camera_homography = None
+        if config.camera_homography is not None:
+            self.camera_homography = np.asarray(config.camera_homography, dtype=float)
+        self.pixel_pitch_mm = config.pixel_pitch_mm
+        self.frame_cache = FrameCache(
+            Path(config.frame_cache_dir).expanduser(),
+            int(config.frame_cache_budget_gb * 1e9),
+        )
 
         self.process = None
         self.thread = None  # We'll use this to keep track of the playback thread.
         self._orientation = None
+        self._player: FramePlayer | None = None
+        self._mpv = MpvController()
+        self._media: MP4Driver | None = None
+        # Set to stop the background frame cache build started by prepare_video()
+        self._prepare_cancel = threading.Event()
+
+    def attach_player(self, player: FramePlayer) -> None:
+        """Route playback through the in-process pygame player instead of cvlc/mpv."""
+        self._player = player
+
+    def attach_media(self, media: MP4Driver) -> None:
+        """Take video dimensions and hashes from the drive's metadata index."""
+        self._media = media
+
+    @property
+    def in_process(self) -> bool:
+        """True if playback currently goes through the in-process player."""
+        return self._player is not None and self._player.available
 
     def get_projector_orientation(self) -> ProjectorOrientation:
         """Query display orientation from wlr-randr, so that it cannot silently be changed in the background."""
@@ -92,9 +143,15 @@ class Projector:
 
     def get_video_dimensions(self, video_path: Path):
         """
-        Uses ffprobe to retrieve the video dimensions (width and height) dynamically.
-        Expects ffprobe to output a single line like: widthxheight (e.g., 1920x1080).
+        Returns the video dimensions (width, height) from the USB metadata index.
+        Files that aren't indexed fall back to ffprobe, which is expected to output
+        a single line like: widthxheight (e.g., 1920x1080).
         """
+        if self._media is not None:
+            info = self._media.video_info(video_path)
+            if info is not None and info.width is not None and info.height is not None:
+                return info.width, info.height
+
         cmd = [
             "/usr/bin/ffprobe",
             "-v",
@@ -114,6 +171,125 @@ class Projector:
             raise ValueError(f"Unable to parse video dimensions from output: {output}") from e
         return width, height
 
+    def play_video(
+        self, video_path: Path, phase: AnglePhase | None = None, rpm: float | None = None
+    ) -> FrameScheduler | None:
+        """
+        Loop the print file on the projector. Uses the in-process player when one is
+        attached and has a display, otherwise falls back to cvlc. Sinogram arrays
+        (.npy/.npz) are streamed directly and need the in-process player.
+
+        With `phase` and the `rpm` the video was rendered for, in-process playback
+        is scheduled according to `frame_sync` and measures the angle error of every
+        presented frame into `scheduler.timing`. Returns the scheduler, or None when
+        cvlc is used.
+        """
+        # A cache build still running would decode the whole file alongside playback.
+        self._prepare_cancel.set()
+        if self._player is None or not self._player.available:
+            if is_sinogram(video_path):
+                print(f"ERROR: {video_path.name} is a sinogram and needs the pygame display.")
+                return None
+            self.play_video_with_vlc(video_path)
+            return None
+
+        self._stop_process()
+        display_size = self._player.display_size
+        source: FrameSource | None = None
+        if display_size is not None:
+            source = self.frame_cache.lookup(video_path, display_size, self.size)
+        if source is None and display_size is not None and self.decode_ring_frames > 0:
+            try:
+                source = DecodedFrameSource(
+                    video_path, display_size, self.size, self.decode_ring_frames
+                )
+            except Exception as e:
+                print(f"WARNING: Decoder process unavailable, decoding in the display loop: {e}")
+        if source is None:
+            source = open_print_file(video_path)
+        if source.frames_per_rev is not None and rpm:
+            source.fps = source.frames_per_rev * rpm / 60
+        if display_size is not None:
+            calibration = self.remap_calibration()
+            intensity = self.intensity_correction(display_size)
+            if not calibration.is_identity or intensity is not None:
+                source = RemappedFrameSource(
+                    source, calibration, display_size, self.size, intensity
+                )
+        scheduler = None
+        if phase is not None and rpm:
+            frames_per_rev = source.frames_per_rev or source.fps * 60 / rpm
+            if self.frame_sync == "angle":
+                scheduler = AngleScheduler(phase, source.frame_count, frames_per_rev)
+            else:
+                meter = AngleErrorMeter(phase, source.frame_count, frames_per_rev)
+                scheduler = WallClockScheduler(source.fps, source.frame_count, meter=meter)
+            scheduler.timing = FrameTimingLog(source.frame_count, frames_per_rev)
+        self._player.play(source, size=self.size, loop=True, scheduler=scheduler)
+        print("Video playback started.")
+        return scheduler
+
+    def remap_calibration(self) -> RemapCalibration:
+        """Keystone and vial refraction correction for print frames, from the config."""
+        vial_radius = None
+        if self.refractive_index != 1.0:
+            vial_radius = self.vial_width / 2
+        return RemapCalibration(self.keystone, self.refractive_index, vial_radius)
+
+    def intensity_correction(self, display_size: tuple[int, int]) -> IntensityCorrection | None:
+        """Gamma and flat-field correction from the config, or None if there is nothing to do.
+
+        Built once per display size; the gain map is loaded from disk at that point.
+        """
+        cached = self._intensity
+        if cached is not None and cached.display_size == display_size:
+            return None if cached.is_identity else cached
+        gain = None
+        if self.gain_map_path is not None:
+            try:
+                gain = load_gain_map(self.gain_map_path, display_size)
+            except (OSError, ValueError) as e:
+                print(f"WARNING: Ignoring gain map {self.gain_map_path}: {e}")
+        self._intensity = IntensityCorrection(self.gamma, gain, display_size)
+        return None if self._intensity.is_identity else self._intensity
+
+    def set_intensity_calibration(self, gamma: float, gain_map_path: Path | None) -> None:
+        """Use a new gamma and gain map from the next played file on."""
+        self.gamma = gamma
+        self.gain_map_path = gain_map_path
+        self._intensity = None
+
+    def set_geometry_calibration(self, homography: np.ndarray, pixel_pitch_mm: float | None) -> None:
+        """Use a new camera homography and pixel pitch."""
+        self.camera_homography = homography
+        if pixel_pitch_mm is not None:
+            self.pixel_pitch_mm = pixel_pitch_mm
+
+    def set_keystone(self, keystone: np.ndarray | None) -> None:
+        """Correct every file played from now on for `keystone` (None for none)."""
+        self.keystone = keystone
+
+    def prepare_video(self, video_path: Path) -> None:
+        """
+        Decode `video_path` into the frame cache in the background so that playing it
+        later needs no decoding. Does nothing if it is cached already. Playing or
+        stopping anything cancels the build.
+        """
+        self._prepare_cancel.set()
+        self._prepare_cancel = threading.Event()
+        threading.Thread(
+            target=self._prepare_video, args=(video_path, self._prepare_cancel), daemon=True
+        ).start()
+
+    def _prepare_video(self, video_path: Path, cancel: threading.Event) -> None:
+        if self._player is None or self._player.display_size is None:
+            return
+        if self._media is not None:
+            digest = self._media.content_hash(video_path)
+            if digest is not None:
+                self.frame_cache.remember_hash(video_path, digest)
+        _ = self.frame_cache.build(video_path, self._player.display_size, self.size, cancel)
+
     def play_video_with_vlc(self, video_path: Path):
         """
         Play the video using cvlc (VLC command-line interface) with the window positioned
@@ -162,8 +338,19 @@ class Projector:
 
     def stop_video(self):
         """
-        Stop the video playback by terminating the cvlc process.
+        Stop the video playback, whether in-process or in a cvlc/mpv process.
         """
+        if self._player is not None:
+            self._player.stop()
+        if self._mpv.running:
+            try:
+                self._mpv.stop()
+            except MpvError as e:
+                print(f"WARNING: {e}")
+        self._stop_process()
+
+    def _stop_process(self):
+        self._prepare_cancel.set()
         if self.process is not None:
             self.process.terminate()
             _ = self.process.wait()
@@ -178,7 +365,7 @@ class Projector:
             raise ValueError("start_video_thread() requires a `video_path` argument")
 
         # Create a new thread for playing the video.
-        self.thread = threading.Thread(target=self.play_video_with_vlc, args=(video_path,))
+        self.thread = threading.Thread(target=self.play_video, args=(video_path,))
         self.thread.start()
 
     def show_vial_width(self, width: int):
@@ -186,48 +373,65 @@ class Projector:
         Display a rectangle to calibrate the vial width.
         """
         self.vial_width = width
-        # FIXME: Screen dimensions are hardcoded. Query them dynamically using
-        # e.g. `xrandr --query` (X11) or `wlr-randr` (Wayland) so the
-        # calibration rectangle scales correctly on any projector resolution.
-        # See wayfire.ini in rootfs-overlay for display configuration notes.
-        w, h = 1920, 1080
-        arr = np.zeros((h, w), dtype=np.uint8)
+        w, h = self.display_size
         cx, cy = w // 2, h // 2
         dy, dx = self.vial_width // 2, 400
-        arr[cy - dy : cy + dy, cx - dx : cx + dx] = 255
-        im = Image.fromarray(arr, "L")
-        p = Path.cwd() / "opencal/utils/calibration/vial_width.png"
-        im.save(p)
-        self.display_image(p)
+        self.display_frame(patterns.box((w, h), cx - dx, cy - dy, cx + dx, cy + dy))
 
     def display_image(self, image_path: Path | None = None):
         """
         Display a still image fullscreen until stop_video() is called.
-        Uses mpv with infinite loop on the single frame.
+        Uses the in-process player if available, otherwise a persistent mpv
+        controlled over IPC.
         """
         if image_path is None:
             image_path = self.calibration_img_path
-        # If something’s already playing, stop it.
-        if self.process:
-            self.stop_video()
 
-        env = os.environ.copy()
-        env["DISPLAY"] = ":0"
-        # env["XAUTHORITY"] = "/home/opencal/.Xauthority"
+        if self._player is not None and self._player.available:
+            self._stop_process()
+            self._player.show(ImageFrameSource(image_path))
+            print(f"Image displayed: {image_path}")
+            return
 
-        # mpv will loop the single image forever (until we terminate it)
-        command = [
-            "/usr/bin/mpv",
-            "--fs",  # fullscreen
-            "--loop-file=inf",  # loop indefinitely
-            "--no-audio",  # no sound
-            "--image-display-duration=inf",  # keep image up forever
-            image_path,
-        ]
+        # If a video is already playing, stop it.
+        self._stop_process()
 
-        self.process = subprocess.Popen(command, env=env)
+        # One long-lived mpv loops the single image forever; swapping is a loadfile.
+        try:
+            _ = self._mpv.loadfile(Path(image_path))
+        except MpvError as e:
+            print(f"ERROR: Failed to display {image_path}: {e}")
+            return
         print(f"Image displayed: {image_path}")
 
+    @property
+    def display_size(self) -> tuple[int, int]:
+        """(width, height) of the projector display."""
+        if self._player is not None and self._player.display_size is not None:
+            return self._player.display_size
+        # FIXME: Screen dimensions are hardcoded when cvlc/mpv owns the display. Query them
+        # dynamically using e.g. `xrandr --query` (X11) or `wlr-randr` (Wayland).
+        # See wayfire.ini in rootfs-overlay for display configuration notes.
+        return 1920, 1080
+
+    def display_frame(self, frame: np.ndarray):
+        """
+        Display an in-memory (h, w[, 3]) uint8 frame fullscreen until stop_video() is called.
+        Without the in-process player the frame goes to mpv through a scratch PNG
+        next to the frame cache, replaced whole so mpv never loads a partial file.
+        """
+        if self._player is not None and self._player.available:
+            self._stop_process()
+            self._player.show(ArrayFrameSource(frame))
+            return
+
+        p = self.frame_cache.root.parent / "projected_frame.png"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".partial")
+        Image.fromarray(frame).save(tmp, format="PNG")
+        _ = tmp.replace(p)
+        self.display_image(p)
+
     def start_image_thread_for_image(self, image_path: Path):
         """
         Same as display_image(), but in a background thread.
@@ -0,0 +1,169 @@
+"""
+encoder.py — Quadrature encoder decoded from timestamped lgpio edges.
+
+gpiozero's RotaryEncoder runs a chain of Python event handling for every
+edge and keeps only a step count. QuadratureEncoder registers one lgpio
+callback per channel that decodes the transition from a 16-entry table and
+stores the edge's kernel timestamp and the running count in a preallocated
+NumPy ring; nothing else runs per edge and nothing allocates. Because every
+edge carries the time it happened, not the time Python got to it, position,
+velocity and acceleration can be estimated at any moment by fitting the
+recent edges, independently of callback latency.
+
+Counts are x4 (every edge of both channels); `steps` divides by four so it
+is in the same full-cycle units as RotaryEncoder.steps and encoder_cpr.
+Timestamps are CLOCK_MONOTONIC nanoseconds, as lgpio reports them.
+"""
+
+import importlib
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import final
+
+import numpy as np
+from gpiozero import RotaryEncoder
+
+from opencal.utils.config import StepperConfigBase
+
+# Count change for (previous AB << 2) | current AB; 0 for no change or an impossible double step
+_TRANSITIONS = (0, -1, 1, 0, 1, 0, 0, -1, -1, 0, 0, 1, 0, 1, -1, 0)
+
+
+@dataclass(frozen=True)
+class MotionEstimate:
+    """Encoder motion at `t_ns`; zero velocity and acceleration when it has not moved for a window."""
+
+    t_ns: int
+    revs: float
+    rpm: float
+    rpm_per_s: float
+    edges: int  # edges the estimate was fitted to
+
+
+@final
+class QuadratureEncoder:
+    """Encoder on `a_pin`/`b_pin` decoded from lgpio alerts; `backend` is "lgpio" or "fake_lgpio"."""
+
+    def __init__(
+        self,
+        a_pin: int,
+        b_pin: int,
+        counts_per_rev: int,
+        backend: str = "lgpio",
+        chip: int = 0,
+        capacity: int = 1 << 16,
+    ):
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        module = "opencal.hardware.stepper.fake_lgpio" if backend == "fake_lgpio" else "lgpio"
+        self.lgpio: ModuleType = importlib.import_module(module)
+        self.a_pin = a_pin
+        self.b_pin = b_pin
+        # x4 edges per revolution
+        self.counts_per_rev = counts_per_rev * 4
+
+        self._t = np.zeros(capacity, dtype=np.int64)
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._mask = capacity - 1
+        self._next = 0
+        self.total = 0
+        self.count = 0
+        # Edges whose transition skipped a state, i.e. an edge was lost
+        self.errors = 0
+
+        lg = self.lgpio
+        self._handle: int = lg.gpiochip_open(chip)
+        for pin in (a_pin, b_pin):
+            _ = lg.gpio_claim_alert(self._handle, pin, lg.BOTH_EDGES)
+        self._state = (lg.gpio_read(self._handle, a_pin) << 1) | lg.gpio_read(self._handle, b_pin)
+        self._callbacks = [
+            lg.callback(self._handle, a_pin, lg.BOTH_EDGES, self._on_edge),
+            lg.callback(self._handle, b_pin, lg.BOTH_EDGES, self._on_edge),
+        ]
+
+    @property
+    def steps(self) -> int:
+        """Full quadrature cycles since start, like RotaryEncoder.steps."""
+        return self.count >> 2
+
+    def _on_edge(self, _chip: int, gpio: int, level: int, timestamp: int) -> None:
+        if level > 1:  # watchdog report, not an edge
+            return
+        state = (level << 1) | (self._state & 1) if gpio == self.a_pin else (self._state & 2) | level
+        delta = _TRANSITIONS[(self._state << 2) | state]
+        if state != self._state and delta == 0:
+            self.errors += 1
+        self._state = state
+        if delta == 0:
+            return
+        self.count += delta
+        i = self._next
+        self._t[i] = timestamp
+        self._counts[i] = self.count
+        self._next = (i + 1) & self._mask
+        self.total += 1
+
+    def edges(
+        self, since_ns: int | None = None, until_ns: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(timestamps, counts) of the retained edges in [`since_ns`, `until_ns`], oldest first (copies)."""
+        i, total = self._next, self.total
+        if total <= self._mask:
+            t, counts = self._t[:i].copy(), self._counts[:i].copy()
+        else:
+            t, counts = np.roll(self._t, -i), np.roll(self._counts, -i)
+        if since_ns is not None:
+            first = int(np.searchsorted(t, since_ns))
+            t, counts = t[first:], counts[first:]
+        if until_ns is not None:
+            last = int(np.searchsorted(t, until_ns, side="right"))
+            t, counts = t[:last], counts[:last]
+        return t, counts
+
+    def estimate(self, window_s: float = 0.5, at_ns: int | None = None) -> MotionEstimate:
+        """Position, velocity and acceleration at `at_ns` (default now).
+
+        Fitted as a quadratic to the edges of the `window_s` before it, so the
+        estimate is as of that instant, however late it is asked for.
+        """
+        now = time.monotonic_ns() if at_ns is None else at_ns
+        t, counts = self.edges(now - int(window_s * 1e9), now)
+        revs_per_count = 1 / self.counts_per_rev
+        if len(t) < 2:
+            count = int(counts[-1]) if len(t) else self.count
+            return MotionEstimate(now, count * revs_per_count, 0.0, 0.0, len(t))
+        dt = (t - now) / 1e9
+        if len(t) < 4:
+            slope = (counts[-1] - counts[0]) / (dt[-1] - dt[0]) if dt[-1] > dt[0] else 0.0
+            coeffs = (0.0, slope, float(counts[-1]))
+        else:
+            coeffs = np.polyfit(dt, counts.astype(np.float64), 2)
+        c2, c1, c0 = (float(c) for c in coeffs)
+        return MotionEstimate(
+            now, c0 * revs_per_count, c1 * revs_per_count * 60, 2 * c2 * revs_per_count * 60, len(t)
+        )
+
+    def rpm(self, window_s: float = 0.5) -> float:
+        """Speed magnitude over the last `window_s`."""
+        return abs(self.estimate(window_s).rpm)
+
+    def close(self) -> None:
+        for cb in self._callbacks:
+            cb.cancel()
+        for pin in (self.a_pin, self.b_pin):
+            _ = self.lgpio.gpio_free(self._handle, pin)
+        _ = self.lgpio.gpiochip_close(self._handle)
+
+
+def make_encoder(config: StepperConfigBase) -> RotaryEncoder | QuadratureEncoder:
+    """The motor encoder decoded by `config.encoder_backend`."""
+    if config.encoder_backend == "gpiozero":
+        return RotaryEncoder(config.encoder_a_pin, config.encoder_b_pin, max_steps=0)
+    return QuadratureEncoder(
+        config.encoder_a_pin,
+        config.encoder_b_pin,
+        config.encoder_cpr,
+        config.encoder_backend,
+        config.gpio_chip,
+    )
@@ -0,0 +1,204 @@
+"""
+fake_lgpio.py — Stand-in for the subset of lgpio used by LgpioStepOutput and QuadratureEncoder.
+
+Same module-level API as lgpio, so it can be passed wherever the real module
+is expected: step_generator = "fake_lgpio" in config.json selects it, for
+running the step/dir driver and benchmarks/step_timing.py off the printer.
+
+tx_pwm() is emulated by a Python thread per GPIO that records the time of
+every rising edge in `edges[gpio]` (perf_counter_ns). Its timing is only as
+good as any other Python thread's; it checks behaviour, not jitter.
+
+Inputs claimed with gpio_claim_alert() change only when drive() is called,
+which runs the callbacks registered for the edge synchronously, with the
+given timestamp, as lgpio's callback thread would.
+"""
+
+import threading
+import time
+from typing import Callable
+
+TX_PWM = 0
+TX_WAVE = 1
+RISING_EDGE = 1
+FALLING_EDGE = 2
+BOTH_EDGES = 3
+
+edges: dict[int, list[int]] = {}
+
+_lock = threading.Lock()
+_claimed: set[tuple[int, int]] = set()
+_pwm: dict[int, "_PWM"] = {}
+_next_handle = 0
+_levels: dict[int, int] = {}
+_callbacks: dict[int, list["_Callback"]] = {}
+
+
+class error(Exception):
+    pass
+
+
+class _PWM:
+    def __init__(self, gpio: int):
+        self.gpio = gpio
+        self.frequency = 0.0
+        self.cycles = 0  # 0: until changed
+        self.command = 0  # tx_pwm() calls so far
+        self.changed = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        last_edge: float | None = None
+        period = 0.0  # of the cycle in progress, fixed when it started
+        while True:
+            with _lock:
+                frequency, command = self.frequency, self.command
+            if frequency <= 0:
+                last_edge = None
+                _ = self.changed.wait()
+                self.changed.clear()
+                continue
+            # As in lgpio, new settings take effect from the start of the next
+            # cycle: the one in progress runs to its end at the rate it began with.
+            now = time.perf_counter()
+            next_edge = now if last_edge is None else max(last_edge + period, now)
+            if self.changed.wait(max(0.0, next_edge - now)):
+                self.changed.clear()
+                continue
+            with _lock:
+                if self.command != command:
+                    continue
+                period = 1 / frequency
+                final = self.cycles == 1
+                if self.cycles:
+                    self.cycles -= 1
+            edges.setdefault(self.gpio, []).append(time.perf_counter_ns())
+            last_edge = next_edge
+            if final:
+                # A counted train ends with its last cycle, not its last edge.
+                if self.changed.wait(max(0.0, last_edge + period - time.perf_counter())):
+                    self.changed.clear()
+                    continue
+                with _lock:
+                    if self.command == command:
+                        self.frequency = 0.0
+
+
+class _Callback:
+    def __init__(self, gpio: int, edge: int, func: Callable[[int, int, int, int], None]):
+        self.gpio = gpio
+        self.edge = edge
+        self.func = func
+
+    def cancel(self) -> None:
+        with _lock:
+            if self in _callbacks.get(self.gpio, []):
+                _callbacks[self.gpio].remove(self)
+
+
+def gpiochip_open(gpiochip: int) -> int:
+    global _next_handle
+    with _lock:
+        _next_handle += 1
+        return _next_handle
+
+
+def gpiochip_close(handle: int) -> int:
+    with _lock:
+        for claimed in [c for c in _claimed if c[0] == handle]:
+            _claimed.discard(claimed)
+    return 0
+
+
+def gpio_claim_output(handle: int, gpio: int, level: int = 0, lFlags: int = 0) -> int:
+    with _lock:
+        if any(g == gpio for _, g in _claimed):
+            raise error("GPIO busy")
+        _claimed.add((handle, gpio))
+    return 0
+
+
+def gpio_free(handle: int, gpio: int) -> int:
+    if gpio in _pwm:
+        _ = tx_pwm(handle, gpio, 0, 0)
+    with _lock:
+        _claimed.discard((handle, gpio))
+    return 0
+
+
+def gpio_write(handle: int, gpio: int, level: int) -> int:
+    return 0
+
+
+def gpio_claim_alert(
+    handle: int, gpio: int, eFlags: int, lFlags: int = 0, notify_handle: int | None = None
+) -> int:
+    with _lock:
+        if any(g == gpio for _, g in _claimed):
+            raise error("GPIO busy")
+        _claimed.add((handle, gpio))
+        _ = _levels.setdefault(gpio, 0)
+    return 0
+
+
+def gpio_set_debounce_micros(handle: int, gpio: int, debounce_micros: int) -> int:
+    return 0
+
+
+def gpio_read(handle: int, gpio: int) -> int:
+    with _lock:
+        return _levels.get(gpio, 0)
+
+
+def callback(
+    handle: int, gpio: int, edge: int = RISING_EDGE, func: Callable[[int, int, int, int], None] | None = None
+) -> _Callback:
+    if func is None:
+        raise error("a callback function is required")
+    cb = _Callback(gpio, edge, func)
+    with _lock:
+        _callbacks.setdefault(gpio, []).append(cb)
+    return cb
+
+
+def drive(gpio: int, level: int, timestamp_ns: int | None = None) -> None:
+    """Set an alert input to `level`, running its callbacks if that is an edge."""
+    with _lock:
+        if _levels.get(gpio) == level:
+            return
+        _levels[gpio] = level
+        callbacks = list(_callbacks.get(gpio, []))
+    timestamp_ns = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+    for cb in callbacks:
+        if cb.edge & (RISING_EDGE if level else FALLING_EDGE):
+            cb.func(0, gpio, level, timestamp_ns)
+
+
+def tx_pwm(
+    handle: int,
+    gpio: int,
+    pwm_frequency: float,
+    pwm_duty_cycle: float,
+    pulse_offset: int = 0,
+    pulse_cycles: int = 0,
+) -> int:
+    with _lock:
+        if (handle, gpio) not in _claimed:
+            raise error("GPIO not allocated")
+        if pwm_frequency != 0 and not 0.1 <= pwm_frequency <= 10000:
+            raise error("bad PWM frequency")
+        pwm = _pwm.get(gpio)
+        if pwm is None:
+            pwm = _pwm[gpio] = _PWM(gpio)
+        pwm.frequency = pwm_frequency if pwm_duty_cycle > 0 else 0.0
+        pwm.cycles = pulse_cycles
+        pwm.command += 1
+    pwm.changed.set()
+    return 0
+
+
+def tx_busy(handle: int, gpio: int, kind: int) -> int:
+    with _lock:
+        pwm = _pwm.get(gpio)
+        return int(kind == TX_PWM and pwm is not None and pwm.frequency > 0)
@@ -0,0 +1,110 @@
+"""
+fake_tmc2209.py — A TMC2209 on the far side of a pseudo-terminal.
+
+Behaves like the driver on a single-wire UART: echoes every byte, accepts
+write datagrams for its address (counting them in IFCNT), answers read
+requests, and silently drops datagrams with a bad CRC, as the chip does.
+Point UARTStepperMotor (or TMC2209UART over serial.Serial) at `port`:
+
+    fake = FakeTMC2209()
+    tmc = TMC2209UART(serial.Serial(fake.port, timeout=0.5))
+
+or run it standalone and put the printed path in config.json's uart_port:
+
+    python -m opencal.hardware.stepper.fake_tmc2209 [--address 0] [--drop-every N]
+
+`drop_every` makes it ignore every Nth valid write, to exercise IFCNT checks.
+"""
+
+import argparse
+import os
+import threading
+import tty
+from typing import final
+
+from opencal.hardware.stepper.tmc2209 import (
+    MASTER_ADDRESS,
+    REG_IFCNT,
+    SYNC_BYTE,
+    crc8,
+)
+
+
+@final
+class FakeTMC2209:
+    def __init__(self, address: int = 0, drop_every: int = 0):
+        self.address = address
+        self.drop_every = drop_every
+        self.registers: dict[int, int] = {}
+        self.writes: list[tuple[int, int]] = []
+        self.ifcnt = 0
+        self._valid_writes = 0
+        self._master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave  # held open so the pty survives clients closing it
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _serve(self) -> None:
+        buf = bytearray()
+        while True:
+            try:
+                data = os.read(self._master, 256)
+            except OSError:
+                return
+            _ = os.write(self._master, data)  # single-wire echo
+            buf += data
+            while buf:
+                if buf[0] != SYNC_BYTE:
+                    del buf[0]
+                    continue
+                if len(buf) < 3:
+                    break
+                size = 8 if buf[2] & 0x80 else 4
+                if len(buf) < size:
+                    break
+                datagram = bytes(buf[:size])
+                if crc8(datagram[:-1]) != datagram[-1]:
+                    del buf[0]  # resynchronise on the next sync byte
+                    continue
+                del buf[:size]
+                if datagram[1] == self.address:
+                    self._handle(datagram)
+
+    def _handle(self, datagram: bytes) -> None:
+        reg = datagram[2] & 0x7F
+        if len(datagram) == 8:
+            self._valid_writes += 1
+            if self.drop_every and self._valid_writes % self.drop_every == 0:
+                return
+            value = int.from_bytes(datagram[3:7], "big")
+            self.registers[reg] = value
+            self.writes.append((reg, value))
+            self.ifcnt = (self.ifcnt + 1) & 0xFF
+            return
+        value = self.ifcnt if reg == REG_IFCNT else self.registers.get(reg, 0)
+        reply = bytes([SYNC_BYTE, MASTER_ADDRESS, reg]) + value.to_bytes(4, "big")
+        _ = os.write(self._master, reply + bytes([crc8(reply)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--address", type=int, default=0)
+    _ = parser.add_argument("--drop-every", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeTMC2209(args.address, args.drop_every)
+    print(fake.port, flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.close()
+
+
+if __name__ == "__main__":
+    main()
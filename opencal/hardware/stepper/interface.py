@@ -1,9 +1,16 @@
 from abc import ABC, abstractmethod
 
+from opencal.hardware.stepper.speed_control import SpeedController
+
 
 class StepperMotorInterface(ABC):
     default_rpm: float
     default_direction: str
+    encoder_cpr: int
+    # False for drivers whose angle_in_steps() is not backed by a real encoder
+    has_encoder: bool = True
+    # Corrects the speed from the encoder when stepper_motor.speed_control is enabled
+    speed_controller: SpeedController | None = None
 
     @property
     @abstractmethod
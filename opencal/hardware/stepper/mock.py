@@ -9,6 +9,7 @@ class MockStepperMotor(StepperMotorInterface):
         self.default_rpm = config.default_rpm
         self.default_direction = config.default_direction
         self.encoder_cpr = config.encoder_cpr
+        self.has_encoder = False
         self._speed_rpm: float = config.default_rpm
         self._running = False
         self._steps = 0
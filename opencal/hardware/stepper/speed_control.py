@@ -0,0 +1,225 @@
+"""
+speed_control.py — Closed-loop RPM correction from the motor encoder.
+
+The drivers run open loop: the speed they command is only as right as their
+clock (the TMC2209's internal oscillator is off by over 1 %) and the step
+count per revolution. SpeedController closes the loop at a fixed rate:
+
+measured   encoder counts differenced over the last `window_s` seconds, or
+           with a QuadratureEncoder, a fit to its timestamped edges
+error      (target - measured) / target, the target being the driver's speed_rpm
+command    target * (1 + kp * error + integral of ki * error), clamped to
+           ±max_correction, handed to the driver as the speed to run at
+
+While the target changes (a ramp, a new speed) and for one window after, the
+controller neither corrects nor integrates, so the learned correction carries
+over to the new speed instead of winding up on the lag of the measurement.
+
+Every tick is recorded in a SpeedLog ring; print_controller saves it next to
+the camera recording with a summary of the tracking error.
+"""
+
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, final
+
+import numpy as np
+from gpiozero import RotaryEncoder
+
+from opencal.hardware.stepper.encoder import QuadratureEncoder
+from opencal.utils.config import SpeedControlConfig
+
+SPEED_RECORD = np.dtype(
+    [
+        ("t", np.float64),  # perf_counter seconds
+        ("target_rpm", np.float64),  # the driver's speed_rpm
+        ("measured_rpm", np.float64),  # from the encoder, NaN until a window has passed
+        ("command_rpm", np.float64),  # speed handed to the driver, NaN when not correcting
+        ("settled", np.bool_),  # target steady for a full window; only these count as tracking
+    ]
+)
+
+
+@final
+class SpeedLog:
+    """Ring of the last `capacity` controller ticks; the default holds ~1.8 h at 10 Hz."""
+
+    def __init__(self, capacity: int = 1 << 16):
+        self._records = np.zeros(capacity, dtype=SPEED_RECORD)
+        self._next = 0
+        self.total = 0
+
+    def reset(self) -> None:
+        self._next = 0
+        self.total = 0
+
+    def record(self, t: float, target: float, measured: float, command: float, settled: bool) -> None:
+        self._records[self._next] = (t, target, measured, command, settled)
+        self._next = (self._next + 1) % len(self._records)
+        self.total += 1
+
+    def records(self) -> np.ndarray:
+        """The retained records, oldest first (a copy)."""
+        if self.total < len(self._records):
+            return self._records[: self.total].copy()
+        return np.roll(self._records, -self._next)
+
+    def summary(self) -> dict[str, float]:
+        rec = self.records()
+        rec = rec[rec["settled"]]
+        out: dict[str, float] = {"ticks": self.total, "settled": len(rec)}
+        if len(rec) == 0:
+            return out
+        err = rec["measured_rpm"] - rec["target_rpm"]
+        out["error_mean_rpm"] = float(err.mean())
+        out["error_rms_rpm"] = float(math.sqrt(float(np.mean(err * err))))
+        out["error_max_abs_rpm"] = float(np.abs(err).max())
+        out["error_rms_pct"] = float(math.sqrt(float(np.mean((err / rec["target_rpm"]) ** 2))) * 100)
+        out["correction_mean_pct"] = float(np.mean(rec["command_rpm"] / rec["target_rpm"] - 1) * 100)
+        return out
+
+    def save(self, stem: Path) -> dict[str, Any]:
+        """Write `<stem>.npy` (the records) and `<stem>.json` (the summary). Returns the summary."""
+        summary = self.summary()
+        np.save(stem.with_name(stem.name + ".npy"), self.records())
+        _ = stem.with_name(stem.name + ".json").write_text(json.dumps(summary, indent=2))
+        return summary
+
+
+@final
+class SpeedController:
+    """PI loop from encoder counts to the speed a driver runs at.
+
+    `read_count` returns the raw, unwrapped encoder count; `get_target` the
+    speed the driver was asked for; `apply` makes the driver run at a
+    corrected speed without changing that target. `measure_rpm`, if given,
+    replaces differencing `read_count` over the window.
+    """
+
+    def __init__(
+        self,
+        config: SpeedControlConfig,
+        counts_per_rev: int,
+        read_count: Callable[[], int],
+        get_target: Callable[[], float],
+        apply: Callable[[float], None],
+        measure_rpm: Callable[[], float] | None = None,
+    ):
+        self.config = config
+        self.counts_per_rev = counts_per_rev
+        self._read_count = read_count
+        self._get_target = get_target
+        self._apply = apply
+        self._measure_rpm = measure_rpm
+        self.log = SpeedLog()
+
+        size = max(2, math.ceil(config.window_s * config.rate_hz) + 1)
+        self._t = np.zeros(size)
+        self._counts = np.zeros(size, dtype=np.int64)
+        self._next = 0
+        self._filled = 0
+        self._integral = 0.0
+        self._last_target = math.nan
+        self._hold_until = 0.0
+        self._warned_saturated = False
+
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    @property
+    def correction(self) -> float:
+        """The learned (integral) correction, as a fraction of the target speed."""
+        return self._integral
+
+    def start(self) -> None:
+        """Start correcting; the learned correction is kept from the previous run."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._filled = 0
+        self._next = 0
+        self._last_target = math.nan
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self) -> None:
+        period = 1 / self.config.rate_hz
+        next_tick = time.perf_counter()
+        while not self._stop_event.wait(max(0.0, next_tick - time.perf_counter())):
+            now = time.perf_counter()
+            self._tick(now)
+            next_tick += period
+            if next_tick < now:  # fell behind; do not make up ticks
+                next_tick = now + period
+
+    def _measure(self, t: float, count: int) -> float:
+        """Record a sample; RPM over the window, or NaN until the window has filled."""
+        self._t[self._next] = t
+        self._counts[self._next] = count
+        self._next = (self._next + 1) % len(self._t)
+        self._filled = min(self._filled + 1, len(self._t))
+        if self._filled < len(self._t):
+            return math.nan
+        oldest = self._next  # the slot written longest ago
+        dt = t - self._t[oldest]
+        revs = abs(int(count - self._counts[oldest])) / self.counts_per_rev
+        return revs / dt * 60 if dt > 0 else math.nan
+
+    def _tick(self, t: float) -> None:
+        if self._measure_rpm is not None:
+            measured = self._measure_rpm()
+        else:
+            measured = self._measure(t, self._read_count())
+        target = self._get_target()
+        if target != self._last_target:
+            self._last_target = target
+            self._hold_until = t + self.config.window_s
+
+        settled = t >= self._hold_until and target > 0 and not math.isnan(measured)
+        command = math.nan
+        if settled:
+            c = self.config
+            error = (target - measured) / target
+            self._integral = min(max(self._integral + c.ki * error / c.rate_hz, -c.max_correction), c.max_correction)
+            correction = min(max(c.kp * error + self._integral, -c.max_correction), c.max_correction)
+            if abs(self._integral) >= c.max_correction and not self._warned_saturated:
+                print(
+                    f"WARNING: Speed correction saturated at {correction * 100:+.1f} %; "
+                    "check steps_per_revolution and encoder_cpr."
+                )
+                self._warned_saturated = True
+            command = target * (1 + correction)
+            self._apply(command)
+        self.log.record(t, target, measured, command, settled)
+
+
+def make_speed_controller(
+    config: SpeedControlConfig,
+    encoder: RotaryEncoder | QuadratureEncoder,
+    counts_per_rev: int,
+    get_target: Callable[[], float],
+    apply: Callable[[float], None],
+) -> SpeedController | None:
+    """A SpeedController on `encoder` if `config` enables one, else None."""
+    if not config.enabled:
+        return None
+
+    def read_count() -> int:
+        return encoder.steps
+
+    if not isinstance(encoder, QuadratureEncoder):
+        return SpeedController(config, counts_per_rev, read_count, get_target, apply)
+    edge_encoder = encoder
+
+    def measure_rpm() -> float:
+        return edge_encoder.rpm(config.window_s)
+
+    return SpeedController(config, counts_per_rev, read_count, get_target, apply, measure_rpm)
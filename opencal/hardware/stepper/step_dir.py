@@ -2,18 +2,30 @@ import time
 import threading
 from typing import final, override
 
-from gpiozero import OutputDevice, RotaryEncoder
+from gpiozero import OutputDevice
 
+from opencal.hardware.stepper import motion
+from opencal.hardware.stepper.encoder import make_encoder
 from opencal.hardware.stepper.interface import StepperMotorInterface
+from opencal.hardware.stepper.speed_control import make_speed_controller
+from opencal.hardware.stepper.step_output import LgpioStepOutput
 from opencal.utils.config import StepDirStepperConfig
 
+# Rate updates during a ramp when lgpio times the steps
+_RATE_PERIOD_S = 0.005
+
 
 @final
 class StepDirStepperMotor(StepperMotorInterface):
     def __init__(self, config: StepDirStepperConfig):
-        self.step = OutputDevice(config.step_pin)
+        # Steps come from a Python thread toggling `step`, or from lgpio timing them itself.
+        self._step_output: LgpioStepOutput | None = None
+        if config.step_generator == "software":
+            self.step = OutputDevice(config.step_pin)
+        else:
+            self._step_output = LgpioStepOutput(config.step_pin, config.step_generator, config.gpio_chip)
         self.direction = OutputDevice(config.dir_pin)
-        self.encoder = RotaryEncoder(config.encoder_a_pin, config.encoder_b_pin, max_steps=0)
+        self.encoder = make_encoder(config)
         self.enable = OutputDevice(config.enable_pin, active_high=False)
         self.enable.off()
 
@@ -21,11 +33,28 @@ class StepDirStepperMotor(StepperMotorInterface):
         self.default_direction = config.default_direction
         self.steps_per_rev = config.steps_per_revolution
         self.encoder_cpr = config.encoder_cpr
+        self.ramp_profile = config.ramp_profile
+        self.jerk_fraction = config.jerk_fraction
 
         self._speed_rpm: float = self.default_rpm
         self.step_delay = 60.0 / (self._speed_rpm * self.steps_per_rev)
         self._rotation_thread: threading.Thread | None = None
         self._finish_event = threading.Event()
+        # Ramp for the rotation thread to play next; _ramp_generation moves on with every
+        # set_rpm() so a ramp in progress knows it has been superseded. Both change together
+        # under _ramp_lock, since set_rpm() runs on the caller's thread.
+        self._pending_ramp: motion.VelocityProfile | None = None
+        self._ramp_generation = 0
+        self._ramp_lock = threading.Lock()
+        # Wakes the lgpio rate thread for a new speed, ramp or stop
+        self._rate_changed = threading.Event()
+        self.speed_controller = make_speed_controller(
+            config.speed_control,
+            self.encoder,
+            self.encoder_cpr,
+            lambda: self._speed_rpm,
+            self._apply_rpm,
+        )
 
     @property
     @override
@@ -39,30 +68,36 @@ class StepDirStepperMotor(StepperMotorInterface):
         if rpm <= 0:
             raise ValueError("RPM must be positive. Use stop() to halt the stepper.")
 
-        if ramp_time == 0:
-            self._speed_rpm = rpm
-            self.step_delay = 60.0 / (self._speed_rpm * self.steps_per_rev)
-        else:
-            thread = threading.Thread(target=self._ramp_rpm, args=(rpm, ramp_time), daemon=True)
-            thread.start()
+        ramp = None
+        if ramp_time > 0 and self.is_running():
+            ramp = self._make_ramp(self._speed_rpm, rpm, ramp_time)
+        with self._ramp_lock:
+            self._ramp_generation += 1
+            self._pending_ramp = ramp
+            if ramp is None:
+                self._set_speed(rpm)
+        self._rate_changed.set()
 
-    def _ramp_rpm(self, target: float, ramp_time: float) -> None:
-        if ramp_time <= 0:
-            raise ValueError("ramp_time must be positive")
+    def _set_speed(self, rpm: float) -> None:
+        self._speed_rpm = rpm
+        self.step_delay = 60.0 / (self._speed_rpm * self.steps_per_rev)
 
-        TIMESTEPS = 100
-        dt = ramp_time / TIMESTEPS
-        start_rpm = max(self._speed_rpm, 1)
+    def _apply_rpm(self, rpm: float) -> None:
+        """Run at `rpm` without changing the target speed; used by the speed controller."""
+        if self._step_output is not None:
+            self._step_output.set_rate(self._steps_per_s(rpm))
+        else:
+            self.step_delay = 60.0 / (rpm * self.steps_per_rev)
 
-        for i in range(TIMESTEPS):
-            if self._finish_event.is_set():
-                return
-            self._speed_rpm = start_rpm + (target - start_rpm) * ((i + 1) / TIMESTEPS)
-            self.step_delay = 60.0 / (self._speed_rpm * self.steps_per_rev)
-            time.sleep(dt)
+    def _make_ramp(self, start_rpm: float, target: float, ramp_time: float) -> motion.VelocityProfile:
+        # lgpio plays a ramp as rate updates on a fixed tick; the software loop needs it finely sampled.
+        period = _RATE_PERIOD_S if self._step_output is not None else None
+        return motion.ramp(
+            start_rpm, target, ramp_time, self.ramp_profile, self.jerk_fraction, period=period
+        )
 
-        self._speed_rpm = target
-        self.step_delay = 60.0 / (self._speed_rpm * self.steps_per_rev)
+    def _steps_per_s(self, rpm: float) -> float:
+        return rpm * self.steps_per_rev / 60.0
 
     @override
     def rotate_steps(self, steps: int, direction: str | None = None) -> None:
@@ -74,6 +109,10 @@ class StepDirStepperMotor(StepperMotorInterface):
         else:
             self.direction.off()
 
+        if self._step_output is not None:
+            self._step_output.pulses(steps, self._steps_per_s(self._speed_rpm))
+            return
+
         prev_time = time.perf_counter()
         for _ in range(steps):
             self.step.on()
@@ -108,27 +147,132 @@ class StepDirStepperMotor(StepperMotorInterface):
 
         self.enable.on()
 
-        if ramp_time > 0:
-            target_rpm, self._speed_rpm = self._speed_rpm, 0
-            self.set_rpm(target_rpm, ramp_time)
+        ramp = self._make_ramp(0, self._speed_rpm, ramp_time) if ramp_time > 0 else None
+        with self._ramp_lock:
+            self._ramp_generation += 1
+            self._pending_ramp = ramp
 
         self._finish_event.clear()
-        self._rotation_thread = threading.Thread(target=self._rotate_motor, daemon=True)
+        if self._step_output is None:
+            self._rotation_thread = threading.Thread(target=self._rotate_motor, daemon=True)
+        else:
+            self._rotation_thread = threading.Thread(
+                target=self._drive_step_output, args=(self._step_output,), daemon=True
+            )
         self._rotation_thread.start()
+        if self.speed_controller is not None:
+            self.speed_controller.start()
 
     def _rotate_motor(self) -> None:
-        next_time = time.perf_counter()
+        last_step = time.perf_counter()
         while not self._finish_event.is_set():
+            pending = self._take_ramp()
+            if pending is not None:
+                last_step = self._play_ramp(*pending, last_step)
+                continue
+
+            next_time = last_step + self.step_delay
+            sleep_time = next_time - time.perf_counter()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+            else:
+                next_time = time.perf_counter()
+
             self.step.on()
             self.step.off()
+            last_step = next_time
 
-            next_time += self.step_delay
-            sleep_time = next_time - time.perf_counter()
+    def _take_ramp(self) -> tuple[motion.VelocityProfile, int] | None:
+        """Clear and return the pending ramp with the generation it was set in, if any."""
+        with self._ramp_lock:
+            ramp, self._pending_ramp = self._pending_ramp, None
+            return None if ramp is None else (ramp, self._ramp_generation)
+
+    def _play_ramp(self, ramp: motion.VelocityProfile, generation: int, start: float) -> float:
+        """Step through `ramp` from `start`; return the time of the last step taken.
 
+        Every step is due at its own precomputed time, so the ramp keeps its
+        shape however late any one sleep returns. A step that cannot be made on
+        time delays the rest of the ramp rather than being caught up in a burst.
+        """
+        times = ramp.step_times(self.steps_per_rev)[1:]
+        rpms = ramp.rpm_at(times)
+        last_step = start
+        slip = 0.0
+        for t, rpm in zip((start + times).tolist(), rpms.tolist()):
+            if self._ramp_superseded(generation):
+                return last_step
+            due = t + slip
+            sleep_time = due - time.perf_counter()
             if sleep_time > 0:
                 time.sleep(sleep_time)
+                # set_rpm() or stop() may have come in while asleep; its speed must not be overwritten.
+                if self._ramp_superseded(generation):
+                    return last_step
             else:
-                next_time = time.perf_counter()
+                slip -= sleep_time
+                due -= sleep_time
+            self.step.on()
+            self.step.off()
+            self._speed_rpm = rpm
+            last_step = due
+        self._set_speed(ramp.target_rpm)
+        return last_step
+
+    def _ramp_superseded(self, generation: int) -> bool:
+        return self._finish_event.is_set() or self._ramp_generation != generation
+
+    def _drive_step_output(self, output: LgpioStepOutput) -> None:
+        """Keep the lgpio pulse train at the current speed; lgpio times the steps themselves."""
+        try:
+            while True:
+                self._rate_changed.clear()
+                if self._finish_event.is_set():
+                    return
+                pending = self._take_ramp()
+                if pending is not None:
+                    self._play_rate_ramp(output, *pending)
+                    continue
+                output.set_rate(self._steps_per_s(self._speed_rpm))
+                _ = self._rate_changed.wait()
+        finally:
+            output.set_rate(0)
+
+    def _play_rate_ramp(
+        self, output: LgpioStepOutput, ramp: motion.VelocityProfile, generation: int
+    ) -> None:
+        """Step the pulse rate through `ramp`, one update per sample interval at absolute deadlines.
+
+        Each interval runs at the mean of the speeds at its ends, so the steps
+        taken over the ramp match the profile's integral. An interval slower
+        than a step per update is not sent as a rate, since lgpio would keep
+        that rate for a whole cycle; its steps are added up and sent as
+        counted pulses once at least one is due. Returns early when set_rpm()
+        or stop() changes the plan.
+        """
+        rpms = (ramp.rpm[:-1] + ramp.rpm[1:]) / 2
+        intervals = ramp.t[1:] - ramp.t[:-1]
+        start = time.perf_counter()
+        owed = 0.0
+        for t, dt, rpm in zip((start + ramp.t[:-1]).tolist(), intervals.tolist(), rpms.tolist()):
+            if self._rate_changed.wait(max(0.0, t - time.perf_counter())):
+                return
+            if self._ramp_superseded(generation):
+                return
+            rate = self._steps_per_s(rpm)
+            if rate * _RATE_PERIOD_S < 1:
+                owed += rate * dt
+                if owed >= 1:
+                    count = int(owed)
+                    # Spread over the interval, so they are done by the next update
+                    _ = output.start_pulses(count, count / dt)
+                    owed -= count
+            else:
+                output.set_rate(rate)
+            self._speed_rpm = rpm
+        if self._rate_changed.wait(max(0.0, start + ramp.duration - time.perf_counter())):
+            return
+        self._set_speed(ramp.target_rpm)
 
     @override
     def is_running(self) -> bool:
@@ -137,10 +281,14 @@ class StepDirStepperMotor(StepperMotorInterface):
     @override
     def stop(self) -> None:
         print("INFO: Stopping the motor.")
+        if self.speed_controller is not None:
+            self.speed_controller.stop()
         self._finish_event.set()
+        self._rate_changed.set()
 
         if self._rotation_thread is not None:
             self._rotation_thread.join()
 
-        self.step.off()
+        if self._step_output is None:
+            self.step.off()
         self.enable.off()
@@ -0,0 +1,69 @@
+"""
+step_output.py — Step pulses timed by lgpio instead of a Python loop.
+
+lgpio's tx_pwm() runs the pulse train from its own thread in C, outside the
+GIL, so camera or GUI work in Python no longer shows up as velocity ripple.
+Python only changes the rate: once per speed change, and on a 5 ms tick
+during a ramp (see StepDirStepperMotor). A new rate takes effect from the
+start of the next cycle, so an update neither drops nor adds a step, but
+also waits out the cycle in progress: a rate of a step every few seconds
+holds off the next update for as long. Ramps therefore send their slowest
+part as counted pulses (start_pulses()) instead.
+"""
+
+import importlib
+import time
+from types import ModuleType
+from typing import final
+
+# tx_pwm() accepts 0.1 Hz to 10 kHz; 10 kHz is 187 RPM at 3200 steps/rev.
+MIN_RATE_HZ = 0.1
+MAX_RATE_HZ = 10_000.0
+# Step drivers latch on the rising edge; a 50 % duty cycle keeps both levels well over their minimum.
+_DUTY_PCT = 50
+
+
+@final
+class LgpioStepOutput:
+    """Step pin driven by lgpio tx_pwm(); `backend` is "lgpio" or "fake_lgpio"."""
+
+    def __init__(self, pin: int, backend: str = "lgpio", chip: int = 0):
+        module = "opencal.hardware.stepper.fake_lgpio" if backend == "fake_lgpio" else "lgpio"
+        self.lgpio: ModuleType = importlib.import_module(module)
+        self.pin = pin
+        self.rate_hz = 0.0
+        self._handle: int = self.lgpio.gpiochip_open(chip)
+        _ = self.lgpio.gpio_claim_output(self._handle, pin, 0)
+
+    def set_rate(self, rate_hz: float) -> None:
+        """Run the pulse train at `rate_hz` steps per second until changed; below MIN_RATE_HZ stops it."""
+        if rate_hz > MAX_RATE_HZ:
+            print(f"WARNING: Step rate {rate_hz:.0f} Hz is above {MAX_RATE_HZ:.0f} Hz; clamping.")
+            rate_hz = MAX_RATE_HZ
+        if rate_hz < MIN_RATE_HZ:
+            rate_hz = 0.0
+        if rate_hz == self.rate_hz:
+            return
+        self.rate_hz = rate_hz
+        _ = self.lgpio.tx_pwm(self._handle, self.pin, rate_hz, _DUTY_PCT if rate_hz else 0)
+
+    def start_pulses(self, count: int, rate_hz: float) -> float:
+        """Start sending exactly `count` steps at `rate_hz`, then stop; returns the rate used."""
+        rate_hz = min(max(rate_hz, MIN_RATE_HZ), MAX_RATE_HZ)
+        self.rate_hz = 0.0
+        _ = self.lgpio.tx_pwm(self._handle, self.pin, rate_hz, _DUTY_PCT, 0, count)
+        return rate_hz
+
+    def pulses(self, count: int, rate_hz: float) -> None:
+        """Send exactly `count` steps at `rate_hz` and wait for them to finish."""
+        if count <= 0:
+            return
+        rate_hz = self.start_pulses(count, rate_hz)
+        time.sleep(count / rate_hz)
+        while self.lgpio.tx_busy(self._handle, self.pin, self.lgpio.TX_PWM):
+            time.sleep(1 / rate_hz)
+
+    def close(self) -> None:
+        self.set_rate(0)
+        _ = self.lgpio.gpio_free(self._handle, self.pin)
+        _ = self.lgpio.gpiochip_close(self._handle)
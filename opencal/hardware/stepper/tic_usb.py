@@ -4,10 +4,11 @@ import threading
 from pathlib import Path
 from typing import final, override
 
-from gpiozero import RotaryEncoder
 from ticlib import TicUSB
 
+from opencal.hardware.stepper.encoder import make_encoder
 from opencal.hardware.stepper.interface import StepperMotorInterface
+from opencal.hardware.stepper.speed_control import make_speed_controller
 from opencal.utils.config import TicUSBStepperConfig
 
 _HEARTBEAT_INTERVAL = 0.2  # seconds — Tic default command timeout is 1000ms
@@ -39,7 +40,7 @@ class TicUSBStepperMotor(StepperMotorInterface):
     def __init__(self, config: TicUSBStepperConfig):
         _apply_tic_settings()
         self.tic = TicUSB()
-        self.encoder = RotaryEncoder(config.encoder_a_pin, config.encoder_b_pin, max_steps=0)
+        self.encoder = make_encoder(config)
 
         self.default_rpm = config.default_rpm
         self.default_direction = config.default_direction
@@ -50,6 +51,13 @@ class TicUSBStepperMotor(StepperMotorInterface):
         self._speed_rpm: float = self.default_rpm
         self._heartbeat_thread: threading.Thread | None = None
         self._finish_event = threading.Event()
+        self.speed_controller = make_speed_controller(
+            config.speed_control,
+            self.encoder,
+            self.encoder_cpr,
+            lambda: self._speed_rpm,
+            self._apply_rpm,
+        )
 
         self.tic.deenergize()
 
@@ -64,6 +72,10 @@ class TicUSBStepperMotor(StepperMotorInterface):
         velocity = int(steps_per_sec * 10000)
         return -velocity if direction == "CCW" else velocity
 
+    def _apply_rpm(self, rpm: float) -> None:
+        """Run at `rpm` without changing the target speed; used by the speed controller."""
+        self.tic.set_target_velocity(self._rpm_to_tic_velocity(rpm, self._current_direction))
+
     @override
     def is_running(self) -> bool:
         return self._heartbeat_thread is not None and self._heartbeat_thread.is_alive()
@@ -125,6 +137,8 @@ class TicUSBStepperMotor(StepperMotorInterface):
         self._finish_event.clear()
         self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
         self._heartbeat_thread.start()
+        if self.speed_controller is not None:
+            self.speed_controller.start()
 
     def _heartbeat_loop(self) -> None:
         """Periodically reset the Tic command timeout to keep the motor running."""
@@ -135,6 +149,8 @@ class TicUSBStepperMotor(StepperMotorInterface):
     @override
     def stop(self) -> None:
         print("INFO: Stopping the motor.")
+        if self.speed_controller is not None:
+            self.speed_controller.stop()
         self._finish_event.set()
         if self._heartbeat_thread is not None:
             self._heartbeat_thread.join()
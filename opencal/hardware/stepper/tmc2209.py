@@ -0,0 +1,162 @@
+"""
+tmc2209.py — TMC2209 single-wire UART transport.
+
+Write datagram (8 bytes): sync, node address, register | 0x80, 4 data bytes MSB first, CRC.
+Read request   (4 bytes): sync, node address, register, CRC.
+Read reply     (8 bytes): sync, 0xFF, register, 4 data bytes, CRC.
+
+PDN_UART is a single wire, so every byte sent is echoed back on RX before any
+reply. The driver counts the writes it accepts in IFCNT (8 bits, wrapping),
+which is what flush(verify=True) checks a batch against.
+
+The transport keeps a shadow of every register value written, so writing a
+value the driver already holds costs nothing; a failed verification clears
+the shadow, since the driver may have reset.
+"""
+
+import threading
+from typing import Protocol, final
+
+SYNC_BYTE = 0x05
+MASTER_ADDRESS = 0xFF
+
+REG_GCONF = 0x00
+REG_IFCNT = 0x02
+REG_VACTUAL = 0x22
+REG_CHOPCONF = 0x6C
+
+
+def _crc_table() -> bytes:
+    # The datasheet CRC shifts left with polynomial 0x07 but feeds each byte LSB
+    # first; the bit-reversed register is a plain reflected CRC-8 with polynomial
+    # 0xE0, which takes one table lookup per byte.
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xE0 if crc & 1 else crc >> 1
+        table[i] = crc
+    return bytes(table)
+
+
+_CRC_TABLE = _crc_table()
+_REVERSE = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def crc8(data: bytes) -> int:
+    """CRC8 with polynomial 0x07, as required by the TMC2209 UART protocol."""
+    crc = 0
+    for byte in data:
+        crc = _CRC_TABLE[crc ^ byte]
+    return _REVERSE[crc]
+
+
+def write_datagram(address: int, reg: int, value: int) -> bytes:
+    datagram = bytes([SYNC_BYTE, address, reg | 0x80]) + (value & 0xFFFFFFFF).to_bytes(4, "big")
+    return datagram + bytes([crc8(datagram)])
+
+
+def read_datagram(address: int, reg: int) -> bytes:
+    datagram = bytes([SYNC_BYTE, address, reg & 0x7F])
+    return datagram + bytes([crc8(datagram)])
+
+
+class TMC2209Error(IOError):
+    pass
+
+
+class SerialPort(Protocol):
+    def write(self, data: bytes, /) -> int | None: ...
+    def read(self, size: int = 1, /) -> bytes: ...
+    def reset_input_buffer(self) -> None: ...
+
+
+@final
+class TMC2209UART:
+    """Register access to one TMC2209 at `address` on `port` (a serial.Serial). Thread-safe."""
+
+    def __init__(self, port: SerialPort, address: int = 0):
+        self.port = port
+        self.address = address
+        self.shadow: dict[int, int] = {}
+        self._queue: dict[int, int] = {}
+        self._lock = threading.Lock()
+        # Writes the driver has accepted since IFCNT was last read, or None when it was not.
+        self._ifcnt: int | None = None
+        self._unverified = 0
+
+    def write(self, reg: int, value: int, verify: bool = False) -> None:
+        """Write `value` to `reg` unless the driver already holds it."""
+        self.queue(reg, value)
+        _ = self.flush(verify)
+
+    def queue(self, reg: int, value: int) -> None:
+        """Add a write to the next flush(); a later value for the same register replaces it."""
+        with self._lock:
+            self._queue[reg] = value & 0xFFFFFFFF
+
+    def flush(self, verify: bool = False) -> int:
+        """Send the queued writes that change a register in one burst; return how many were sent.
+
+        With `verify`, IFCNT is read back afterwards and the batch is sent once
+        more if the driver did not count every datagram (and every write before
+        it since the last check); TMC2209Error if it still does not.
+        """
+        with self._lock:
+            batch = {reg: v for reg, v in self._queue.items() if self.shadow.get(reg) != v}
+            self._queue.clear()
+            if not batch:
+                return 0
+            if verify and self._ifcnt is None:
+                self._ifcnt = self._read(REG_IFCNT)
+                self._unverified = 0
+            for attempt in range(2 if verify else 1):
+                self._send(batch)
+                if not verify:
+                    return len(batch)
+                expected = (self._ifcnt + self._unverified) & 0xFF
+                self._ifcnt, self._unverified = self._read(REG_IFCNT), 0
+                if self._ifcnt == expected:
+                    return len(batch)
+                print(
+                    f"WARNING: TMC2209 counted {(self._ifcnt - expected + len(batch)) & 0xFF} "
+                    f"of {len(batch)} writes; {'retrying' if attempt == 0 else 'giving up'}."
+                )
+                self.shadow.clear()
+            raise TMC2209Error(f"TMC2209 at address {self.address} did not accept register writes")
+
+    def read(self, reg: int) -> int:
+        """Read `reg` from the driver (not the shadow)."""
+        with self._lock:
+            return self._read(reg)
+
+    def invalidate(self) -> None:
+        """Forget what the driver holds, e.g. after it lost power; the next writes are all sent."""
+        with self._lock:
+            self.shadow.clear()
+            self._ifcnt = None
+
+    def _send(self, batch: dict[int, int]) -> None:
+        data = b"".join(write_datagram(self.address, reg, value) for reg, value in batch.items())
+        self._transfer(data, 0)
+        self.shadow.update(batch)
+        self._unverified += len(batch)
+
+    def _read(self, reg: int) -> int:
+        reply = self._transfer(read_datagram(self.address, reg), 8)
+        if len(reply) != 8:
+            raise TMC2209Error(f"No reply reading register {reg:#04x}")
+        if reply[0] != SYNC_BYTE or reply[1] != MASTER_ADDRESS or reply[2] != reg:
+            raise TMC2209Error(f"Malformed reply reading register {reg:#04x}: {reply.hex()}")
+        if crc8(reply[:7]) != reply[7]:
+            raise TMC2209Error(f"CRC error reading register {reg:#04x}")
+        return int.from_bytes(reply[3:7], "big")
+
+    def _transfer(self, data: bytes, reply_size: int) -> bytes:
+        """Send `data`, consume its echo, and read `reply_size` reply bytes."""
+        self.port.reset_input_buffer()
+        _ = self.port.write(data)
+        echo = self.port.read(len(data))
+        if echo != data:
+            raise TMC2209Error(f"UART echo mismatch ({len(echo)} of {len(data)} bytes); check PDN_UART wiring")
+        return self.port.read(reply_size) if reply_size else b""
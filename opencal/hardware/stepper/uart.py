@@ -3,30 +3,29 @@ import threading
 from typing import final, override
 
 import serial
+from gpiozero import RotaryEncoder
 import math
+import numpy as np
 
+from opencal.hardware.stepper import motion
+from opencal.hardware.stepper.encoder import QuadratureEncoder, make_encoder
 from opencal.hardware.stepper.interface import StepperMotorInterface
+from opencal.hardware.stepper.speed_control import make_speed_controller
+from opencal.hardware.stepper.tmc2209 import (
+    REG_CHOPCONF,
+    REG_GCONF,
+    REG_VACTUAL,
+    TMC2209Error,
+    TMC2209UART,
+)
 from opencal.utils.config import UARTStepperConfig
 
 # TMC2209 internal oscillator; verify against hardware (typically 12 MHz)
 _TMC_CLK_HZ = 12_000_000
-_REG_VACTUAL = 0x22
-_REG_GCONF = 0x00
-_REG_CHOPCONF = 0x6C
-_SYNC_BYTE = 0x05
-
-
-def _crc8(data: bytes) -> int:
-    """CRC8 with polynomial 0x07, as required by the TMC2209 UART protocol."""
-    crc = 0
-    for byte in data:
-        for _ in range(8):
-            if (crc >> 7) ^ (byte & 0x01):
-                crc = ((crc << 1) ^ 0x07) & 0xFF
-            else:
-                crc = (crc << 1) & 0xFF
-            byte >>= 1
-    return crc
+# Measured against the TMC2209 clock; 0.9849 was an earlier estimate
+_CORRECTION_FACTOR = 0.988375
+# Shortest interval between VACTUAL writes during a ramp; a write and its echo take ~1.4 ms at 115200 baud
+_RAMP_PERIOD_S = 0.005
 
 
 @final
@@ -36,15 +35,34 @@ class UARTStepperMotor(StepperMotorInterface):
         self.default_direction = config.default_direction
         self.steps_per_rev = config.steps_per_revolution
         self.encoder_cpr = config.encoder_cpr
+        self.has_encoder = False
         self.uart_address = config.uart_address
         self.microsteps = config.microsteps
+        self.ramp_profile = config.ramp_profile
+        self.jerk_fraction = config.jerk_fraction
 
         self._speed_rpm: float = config.default_rpm
         self._current_direction: str = config.default_direction
         self._rotation_thread: threading.Thread | None = None
         self._finish_event = threading.Event()
+        self._ramp_thread: threading.Thread | None = None
+        self._ramp_cancel = threading.Event()
+
+        # The encoder is only wired up for closed-loop speed control.
+        self.encoder: RotaryEncoder | QuadratureEncoder | None = None
+        if config.speed_control.enabled:
+            self.encoder = make_encoder(config)
+            self.has_encoder = True
+            self.speed_controller = make_speed_controller(
+                config.speed_control,
+                self.encoder,
+                self.encoder_cpr,
+                lambda: self._speed_rpm,
+                self._apply_rpm,
+            )
 
         self._serial: serial.Serial | None = None
+        self._tmc: TMC2209UART | None = None
 
         try:
             self._serial = serial.Serial(
@@ -52,6 +70,7 @@ class UARTStepperMotor(StepperMotorInterface):
                 baudrate=config.baud_rate,
                 timeout=0.5,
             )
+            self._tmc = TMC2209UART(self._serial, self.uart_address)
             self.initialize()
 
             print("INFO: TMC2209 UART driver initialized.")
@@ -59,39 +78,38 @@ class UARTStepperMotor(StepperMotorInterface):
             print(f"WARNING: UARTStepperMotor init failed: {e}")
 
     def initialize(self):
-        self._write_register(_REG_GCONF, 0x000001C5)
+        if self._tmc is None:
+            return
+        self._tmc.invalidate()
+        self._tmc.queue(REG_GCONF, 0x000001C5)
         mres = 8 - int(math.log2(self.microsteps))
         chopconf = ((0x10 | mres) << 24) | 0x00020055
-        self._write_register(_REG_CHOPCONF, chopconf)
+        self._tmc.queue(REG_CHOPCONF, chopconf)
+        _ = self._tmc.flush(verify=True)
 
-    def _write_register(self, reg: int, value: int) -> None:
-        """Send a TMC2209 UART write datagram (8 bytes: sync, addr, reg|0x80, 4 data, CRC)."""
-        if self._serial is None:
+    def _write_register(self, reg: int, value: int, verify: bool = False) -> None:
+        """Write `reg` unless the driver already holds `value`; `verify` checks IFCNT afterwards."""
+        if self._tmc is None:
             return
-        datagram = bytes(
-            [
-                _SYNC_BYTE,
-                self.uart_address,
-                reg | 0x80,
-                (value >> 24) & 0xFF,
-                (value >> 16) & 0xFF,
-                (value >> 8) & 0xFF,
-                value & 0xFF,
-            ]
-        )
-        self._serial.write(datagram + bytes([_crc8(datagram)]))
-        # Single-wire UART echoes TX back on RX; read and discard the 8-byte echo.
-        self._serial.read(8)
-
-    def _write_vactual(self, vactual: int) -> None:
+        try:
+            self._tmc.write(reg, value, verify)
+        except TMC2209Error as e:
+            print(f"WARNING: {e}")
+
+    def _write_vactual(self, vactual: int, verify: bool = False) -> None:
         # Encode as 24-bit (handles sign via two's complement masking).
-        self._write_register(_REG_VACTUAL, vactual & 0xFFFFFF)
+        self._write_register(REG_VACTUAL, vactual & 0xFFFFFF, verify)
 
     def _signed_vactual(self, rpm: float) -> int:
         """Return VACTUAL with sign encoding direction (positive=CW, negative=CCW)."""
         magnitude = self._rpm_to_vactual(abs(rpm), self.steps_per_rev)
         return magnitude if self._current_direction == "CW" else -magnitude
 
+    def _apply_rpm(self, rpm: float) -> None:
+        """Run at `rpm` without changing the target speed; used by the speed controller."""
+        sign = 1 if self._current_direction == "CW" else -1
+        self._write_vactual(sign * round(abs(rpm) * self._vactual_per_rpm()))
+
     @property
     @override
     def speed_rpm(self) -> float:
@@ -104,27 +122,56 @@ class UARTStepperMotor(StepperMotorInterface):
         if rpm <= 0:
             raise ValueError("RPM must be positive. Use stop() to halt the stepper.")
 
+        self._cancel_ramp()
         if ramp_time == 0:
             self._speed_rpm = rpm
             self._write_vactual(self._signed_vactual(rpm))
+        elif not self.is_running():
+            # Writing VACTUAL would start the motor; start_rotation() ramps up to this speed.
+            self._speed_rpm = rpm
         else:
-            thread = threading.Thread(target=self._ramp_rpm, args=(rpm, ramp_time), daemon=True)
-            thread.start()
-
-    def _ramp_rpm(self, target: float, ramp_time: float) -> None:
-        TIMESTEPS = 100
-        dt = ramp_time / TIMESTEPS
-        start_rpm = max(self._speed_rpm, 1)
-
-        for i in range(TIMESTEPS):
-            if self._finish_event.is_set():
+            ramp = motion.ramp(
+                self._speed_rpm,
+                rpm,
+                ramp_time,
+                self.ramp_profile,
+                self.jerk_fraction,
+                period=_RAMP_PERIOD_S,
+            )
+            self._ramp_cancel = threading.Event()
+            self._ramp_thread = threading.Thread(
+                target=self._play_ramp, args=(ramp, self._ramp_cancel), daemon=True
+            )
+            self._ramp_thread.start()
+
+    def _cancel_ramp(self) -> None:
+        self._ramp_cancel.set()
+        if self._ramp_thread is not None and self._ramp_thread is not threading.current_thread():
+            self._ramp_thread.join()
+        self._ramp_thread = None
+
+    def _play_ramp(self, ramp: motion.VelocityProfile, cancel: threading.Event) -> None:
+        """Write each distinct VACTUAL of `ramp` at its precomputed time from now.
+
+        A value whose successor is already due when the thread gets to it is
+        skipped, so a late wake-up costs one write, not a backlog of them.
+        """
+        sign = 1 if self._current_direction == "CW" else -1
+        vactual = sign * np.rint(np.abs(ramp.rpm) * self._vactual_per_rpm()).astype(np.int64)
+        times, values = ramp.changes(vactual)
+        rpms = ramp.rpm_at(times).tolist()
+        values = values.tolist()
+
+        start = time.perf_counter()
+        deadlines = (start + times).tolist() + [math.inf]
+        for i, value in enumerate(values):
+            if cancel.wait(max(0.0, deadlines[i] - time.perf_counter())):
                 return
-            self._speed_rpm = start_rpm + (target - start_rpm) * ((i + 1) / TIMESTEPS)
-            self._write_vactual(self._signed_vactual(self._speed_rpm))
-            time.sleep(dt)
-
-        self._speed_rpm = target
-        self._write_vactual(self._signed_vactual(self._speed_rpm))
+            if deadlines[i + 1] <= time.perf_counter():
+                continue
+            self._write_vactual(value)
+            self._speed_rpm = rpms[i]
+        self._speed_rpm = ramp.target_rpm
 
     @override
     def start_rotation(self, direction: str | None = None, ramp_time: float = 0) -> None:
@@ -148,6 +195,8 @@ class UARTStepperMotor(StepperMotorInterface):
             self._write_vactual(self._signed_vactual(self._speed_rpm))
             self._rotation_thread = threading.Thread(target=self._run_until_stopped, daemon=True)
             self._rotation_thread.start()
+        if self.speed_controller is not None:
+            self.speed_controller.start()
 
     def _run_until_stopped(self) -> None:
         _ = self._finish_event.wait()
@@ -160,7 +209,10 @@ class UARTStepperMotor(StepperMotorInterface):
     def stop(self) -> None:
         """Stop the motor. Blocks until motor stops and rotation thread exits."""
         print("INFO: Stopping the motor.")
-        self._write_vactual(0)
+        if self.speed_controller is not None:
+            self.speed_controller.stop()
+        self._cancel_ramp()
+        self._write_vactual(0, verify=True)
         self._finish_event.set()
 
         if self._rotation_thread is not None:
@@ -172,27 +224,27 @@ class UARTStepperMotor(StepperMotorInterface):
 
     @override
     def angle_in_steps(self) -> int:
-        return 0
+        if self.encoder is None:
+            return 0
+        return self.encoder.steps % self.encoder_cpr
 
     @override
     def angle_in_degrees(self) -> float:
-        return 0.0
+        return self.angle_in_steps() / self.encoder_cpr * 360
 
     def _rpm_to_vactual(self, rpm: float, steps_per_rev: int) -> int:
         """Convert RPM to unsigned VACTUAL magnitude for the TMC2209."""
 
+        fstep = rpm * self._microsteps_per_rev(steps_per_rev) / 60.0
+        # With correction factor, use this value if interpolating
+        frac_vactual = _CORRECTION_FACTOR * fstep * (2**24) / _TMC_CLK_HZ
+        return round(frac_vactual)
+
+    def _microsteps_per_rev(self, steps_per_rev: int) -> float:
         # FIXME: Make this formula and config more clear
         # steps per rev is based on microstepping being 8; convert to actual steps per rev
-        steps_per_rev: float = steps_per_rev * (self.microsteps / 8)
-
-        fstep = rpm * steps_per_rev / 60.0
-        print(f"fstep is {fstep}")
-        # CORRECTION_FACTOR = 0.9849  # From the TMC2209 clock
-        CORRECTION_FACTOR = 0.988375
-        bad_vactual = round(fstep * (2**24) / _TMC_CLK_HZ)  # Without correction factor
-        # With correction factor, use this value if interpolating
-        frac_vactual = CORRECTION_FACTOR * fstep * (2**24) / _TMC_CLK_HZ
-        vactual = round(frac_vactual)
+        return steps_per_rev * (self.microsteps / 8)
 
-        print(f"{bad_vactual=}\n{frac_vactual=}\n{vactual=}")
-        return vactual
+    def _vactual_per_rpm(self) -> float:
+        """Unrounded VACTUAL magnitude for 1 RPM, as used by _rpm_to_vactual."""
+        return _CORRECTION_FACTOR * self._microsteps_per_rev(self.steps_per_rev) / 60.0 * (2**24) / _TMC_CLK_HZ
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from .print_index import PRINT_SUFFIXES, PrintFileInfo, PrintIndex, parse_rpm as parse_rpm
+
 
 def unique_path(path: Path) -> Path:
     """Return a unique path, appending (1), (2), etc. if the file already exists."""
@@ -17,6 +19,8 @@ def unique_path(path: Path) -> Path:
 class MP4Driver:
     def __init__(self, mount_point: Path = Path("/media/opencal/")):
         self.mount_point = mount_point
+        self._indexes: dict[Path, PrintIndex] = {}
+        self._listing: list[Path] = []
 
     def _mounted_drive(self) -> Path | None:
         """Return the subdirectory that has an active filesystem mount, or None."""
@@ -27,6 +31,23 @@ class MP4Driver:
                 return entry
         return None
 
+    def _mounted_drives(self) -> list[Path]:
+        if not self.mount_point.exists():
+            return []
+        return [e for e in self.mount_point.iterdir() if e.is_dir() and os.path.ismount(e)]
+
+    def _index_for(self, drive: Path) -> PrintIndex:
+        index = self._indexes.get(drive)
+        if index is None:
+            index = self._indexes[drive] = PrintIndex(drive)
+        return index
+
+    def _index_containing(self, path: Path) -> PrintIndex | None:
+        for drive, index in self._indexes.items():
+            if path.is_relative_to(drive):
+                return index
+        return None
+
     def is_mounted(self) -> bool:
         """Return True if a USB drive is currently mounted."""
         return self._mounted_drive() is not None
@@ -40,8 +61,10 @@ class MP4Driver:
 
     def list_mp4_files(self) -> list[Path]:
         """
-        List all MP4 files in the USB storage device directory.
-        Returns a list of file names (strings).
+        List all print files (MP4 videos and .npy/.npz sinograms) in the USB
+        storage device directory.
+        Mounted drives are listed through their metadata index, which only
+        re-stats the tree; anything else under the mount point is walked.
         """
 
         mp4_paths = []
@@ -49,12 +72,18 @@ class MP4Driver:
         if not self.mount_point.exists():
             raise FileNotFoundError(f"USB mount point {self.mount_point} does not exist")
 
-        for dir_path, _dirs, files in os.walk(self.mount_point):
-            for file in files:
-                file_path = Path(dir_path) / file
-                if file_path.suffix == ".mp4":
-                    mp4_paths.append(file_path)
+        drives = self._mounted_drives()
+        if drives:
+            for drive in drives:
+                mp4_paths.extend(self._index_for(drive).refresh())
+        else:
+            for dir_path, _dirs, files in os.walk(self.mount_point):
+                for file in files:
+                    file_path = Path(dir_path) / file
+                    if file_path.suffix.lower() in PRINT_SUFFIXES:
+                        mp4_paths.append(file_path)
 
+        self._listing = mp4_paths
         return mp4_paths
 
     def get_file_names(self) -> list[str]:
@@ -82,12 +111,25 @@ class MP4Driver:
         Raises FileNotFoundError if the file is not found.
         """
 
-        # Search for the full path of the specified file name
+        # The menu was just built from list_mp4_files(), so try that listing first.
+        for full_path in self._listing:
+            if full_path.name == filename and full_path.exists():
+                return full_path
         for full_path in self.list_mp4_files():
             if full_path.name == filename:
                 return full_path
         raise FileNotFoundError(f"File {filename} not found in {self.mount_point}")
 
+    def video_info(self, path: Path) -> PrintFileInfo | None:
+        """Indexed metadata for a file on a mounted drive, or None if it isn't indexed."""
+        index = self._index_containing(path)
+        return index.get(path) if index is not None else None
+
+    def content_hash(self, path: Path) -> str | None:
+        """SHA-256 of an indexed file; computed once and then kept in the index."""
+        index = self._index_containing(path)
+        return index.ensure_hash(path) if index is not None else None
+
 
 # Example Usage:
 if __name__ == "__main__":
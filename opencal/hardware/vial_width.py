@@ -0,0 +1,169 @@
+"""
+vial_width.py — Measure the vial width with the camera instead of by eye.
+
+A narrow white bar is stepped across the display while the camera, at fixed
+exposure, watches the vial. The resin scatters the bar's light only while the
+bar passes through the vial, so the dark-subtracted brightness of each capture
+against the bar position is a plateau whose edges are the vial walls. Since
+the bar is symmetric, each wall lies where the profile crosses half-way
+between its floor and its plateau; crossings are found for the whole profile
+at once and interpolated linearly between samples.
+
+A coarse sweep over the widest bar VialWidthMode allows finds both walls, then
+a fine sweep around each wall refines them. Capture and reduction are
+pipelined: while a capture is reduced on a worker thread the next bar is
+already being projected and left to settle.
+
+Run from the command line on the printer:
+
+    python -m opencal.hardware.vial_width [--exposure 20000] [--step 16] [--fine-step 2]
+"""
+
+import argparse
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .camera_controller import CameraController
+from .projection import patterns
+from .projector_controller import Projector
+
+# Plateau must stand this far above the floor, relative to the sample noise, to count
+_MIN_CONTRAST = 5.0
+
+
+@dataclass
+class VialWidthResult:
+    left: float  # display x of the left wall
+    right: float  # display x of the right wall
+    positions: np.ndarray  # bar centres swept, display x
+    profile: np.ndarray  # dark-subtracted brightness per bar
+
+    @property
+    def width(self) -> float:
+        return self.right - self.left
+
+    @property
+    def centre(self) -> float:
+        return (self.left + self.right) / 2
+
+
+def brightness(capture: np.ndarray, dark: np.ndarray) -> float:
+    """Mean light in a capture above the dark frame."""
+    gray = capture.astype(np.float32)
+    if gray.ndim == 3:
+        gray = gray[..., :3].mean(axis=2)
+    return float(np.maximum(gray - dark, 0).mean())
+
+
+def detect_edges(positions: np.ndarray, profile: np.ndarray) -> tuple[float, float]:
+    """(left, right) display x where the brightness profile rises and falls through half maximum.
+
+    Samples need not be evenly spaced; they are sorted by position first.
+    """
+    order = np.argsort(positions, kind="stable")
+    x = positions[order].astype(np.float64)
+    y = profile[order].astype(np.float64)
+
+    floor = np.percentile(y, 10)
+    peak = np.percentile(y, 95)
+    # Neighbouring samples differ only by noise except at the two walls.
+    noise = max(float(np.median(np.abs(np.diff(y)))), 1e-6)
+    if peak - floor < _MIN_CONTRAST * noise:
+        raise RuntimeError("No vial found: the bar sweep shows no plateau")
+
+    above = y >= (floor + peak) / 2
+    step = np.diff(above.astype(np.int8))
+    rising = np.flatnonzero(step == 1)
+    falling = np.flatnonzero(step == -1)
+    if len(rising) == 0 or len(falling) == 0 or falling[-1] < rising[0]:
+        raise RuntimeError("Vial edge outside the sweep; widen it or centre the vial")
+
+    # Linear interpolation of the half-maximum crossing between samples i and i + 1.
+    i = np.array([rising[0], falling[-1]])
+    t = ((floor + peak) / 2 - y[i]) / (y[i + 1] - y[i])
+    left, right = x[i] + t * (x[i + 1] - x[i])
+    return float(left), float(right)
+
+
+def measure_vial_width(
+    projector: Projector,
+    camera: CameraController,
+    exposure_us: int = 20000,
+    step: int = 16,
+    fine_step: int = 2,
+    settle_s: float = 0.15,
+) -> VialWidthResult:
+    """Sweep a bar across the vial, find both walls and store the width in projector.vial_width."""
+    display_size = projector.display_size
+    dw, dh = display_size
+    half = min(dw, dh) // 2
+
+    def show_and_capture(frame: np.ndarray) -> np.ndarray:
+        projector.display_frame(frame)
+        time.sleep(settle_s)
+        capture = camera.capture_array()
+        if capture is None:
+            raise RuntimeError("Camera capture failed")
+        return capture
+
+    def sweep(positions: np.ndarray, width: int, dark: np.ndarray) -> np.ndarray:
+        # Reduce capture i on the worker while bar i + 1 is shown and settles.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            values: list[Future[float]] = []
+            for x in positions:
+                capture = show_and_capture(patterns.bar(display_size, float(x), width))
+                values.append(pool.submit(brightness, capture, dark))
+            return np.array([v.result() for v in values])
+
+    camera.start_camera()
+    camera.set_exposure(exposure_us)
+    try:
+        dark = show_and_capture(patterns.dark(display_size)).astype(np.float32)
+        if dark.ndim == 3:
+            dark = dark[..., :3].mean(axis=2)
+
+        positions = np.arange(dw // 2 - half + step // 2, dw // 2 + half, step, dtype=np.float64)
+        profile = sweep(positions, step, dark)
+        left, right = detect_edges(positions, profile)
+
+        if 0 < fine_step < step:
+            # Bars as narrow as the fine step: coarse samples at this width are not comparable.
+            offsets = np.arange(-step, step + 1, fine_step, dtype=np.float64)
+            positions = np.concatenate([left + offsets, right + offsets])
+            profile = sweep(positions, fine_step, dark)
+            left, right = detect_edges(positions, profile)
+    finally:
+        camera.set_exposure(None)
+        projector.display_frame(patterns.dark(display_size))
+
+    result = VialWidthResult(left, right, positions, profile)
+    projector.vial_width = int(round(result.width))
+    print(
+        f"INFO: Vial walls at x = {left:.1f} and {right:.1f}: width {result.width:.1f} px, "
+        f"centre {result.centre - dw / 2:+.1f} px from the display centre"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("--exposure", type=int, default=20000, help="camera exposure in us")
+    _ = parser.add_argument("--step", type=int, default=16, help="coarse sweep step and bar width, px")
+    _ = parser.add_argument("--fine-step", type=int, default=2, help="fine sweep step, px (0 to skip)")
+    _ = parser.add_argument("--settle", type=float, default=0.15, help="seconds per bar")
+    args = parser.parse_args()
+
+    from opencal.utils.config import Config
+
+    cfg = Config()
+    projector = Projector(cfg.projector)
+    camera = CameraController(cfg.camera)
+    result = measure_vial_width(projector, camera, args.exposure, args.step, args.fine_step, args.settle)
+    print(f"Vial width {result.width:.1f} px ({result.left:.1f} .. {result.right:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,15 @@ generate_alignment_image.py
 
 Renders the cross strut alignment tool DXF as a 1920×1080 projector image.
 
-At 90 µm/pixel the DXF geometry (in mm) is converted to pixels and centred
+At the projected pixel size the DXF geometry (in mm) is converted to pixels and centred
 on the canvas.  All VISIBLE-layer entities (LINEs, ARCs, CIRCLEs) are drawn
 in white on black so the projected image can be overlaid on the physical tool
 to verify alignment.
 
+The pixel size is read from "pixel_pitch_mm" in config.json, which
+`python -m opencal.hardware.homography --save` measures with the camera;
+until then the caliper measurement below is used.
+
 Usage
 -----
     pip install ezdxf          # once
@@ -17,6 +21,7 @@ The output PNG is written next to this script as  alignment_tool.png
 and is automatically picked up by the Calibration menu in the LCD GUI.
 """
 
+import json
 import math
 import sys
 from pathlib import Path
@@ -31,7 +36,19 @@ from PIL import Image, ImageDraw
 
 # ── Configuration ────────────────────────────────────────────────────────────
 
-PIXEL_SIZE_MM = 0.0801        # 80.1 µm per pixel — measured: 86.47mm / 1080px
+CALIPER_PIXEL_SIZE_MM = 0.0801  # 80.1 µm per pixel — measured: 86.47mm / 1080px
+CONFIG_PATH   = Path(__file__).parent.parent / "config.json"
+
+
+def _pixel_size_mm() -> float:
+    try:
+        pitch = json.loads(CONFIG_PATH.read_text())["projector"].get("pixel_pitch_mm")
+    except (OSError, KeyError, ValueError):
+        pitch = None
+    return pitch or CALIPER_PIXEL_SIZE_MM
+
+
+PIXEL_SIZE_MM = _pixel_size_mm()
 PX_PER_MM     = 1.0 / PIXEL_SIZE_MM
 
 # Projector is mounted 90° on its side — generate on portrait canvas, rotate for output.
@@ -10,6 +10,18 @@ def load_config() -> "Config":
     return Config()
 
 
+def update_config(section: str, values: dict[str, Any], path: Path = CFG_PATH) -> None:
+    """Write `values` into one section of the config file, keeping everything else."""
+    with open(path) as f:
+        config: dict[str, dict[str, Any]] = json.load(f)
+    config[section].update(values)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(config, f, indent=2)
+        _ = f.write("\n")
+    _ = tmp.replace(path)
+
+
 @final
 class Config:
     def __init__(self, path: Path = CFG_PATH):
@@ -28,6 +40,8 @@ class Config:
 class PygameConfig:
     def __init__(self, config: dict[str, Any]):
         self.active: bool = config["active"]
+        # Memory for calibration/alignment images kept scaled to the display
+        self.surface_cache_mb: float = config.get("surface_cache_mb", 256)
 
 
 class StepperConfigBase:
@@ -39,6 +53,29 @@ class StepperConfigBase:
         self.default_direction: str = config["default_direction"]
         self.steps_per_revolution: int = config["steps_per_revolution"]
         self.encoder_cpr: int = config["encoder_cpr"]
+        # Who decodes the encoder: "gpiozero" (RotaryEncoder), "lgpio" (timestamped edges) or "fake_lgpio"
+        self.encoder_backend: str = config.get("encoder_backend", "gpiozero")
+        # lgpio chip of the header GPIOs: 0 on current Pi OS kernels, 4 on Pi 5 kernels before 6.6.45
+        self.gpio_chip: int = config.get("gpio_chip", 0)
+        # Shape of speed ramps: "s_curve" (jerk-limited) or "trapezoid" (constant acceleration)
+        self.ramp_profile: str = config.get("ramp_profile", "s_curve")
+        # Share of an S-curve ramp spent changing acceleration; 0 is a trapezoid ramp
+        self.jerk_fraction: float = config.get("jerk_fraction", 1.0)
+        self.speed_control = SpeedControlConfig(config.get("speed_control", {}))
+
+
+class SpeedControlConfig:
+    """Closed-loop RPM correction from the motor encoder (see stepper/speed_control.py)."""
+
+    def __init__(self, config: dict[str, Any]):
+        self.enabled: bool = config.get("enabled", False)
+        self.rate_hz: float = config.get("rate_hz", 10.0)
+        # Encoder counts are differenced over this window; longer is finer but slower
+        self.window_s: float = config.get("window_s", 1.0)
+        self.kp: float = config.get("kp", 0.2)
+        self.ki: float = config.get("ki", 0.3)
+        # Largest correction, as a fraction of the target speed
+        self.max_correction: float = config.get("max_correction", 0.05)
 
 
 # Alias so existing imports of StepperConfig still work
@@ -56,6 +93,8 @@ class StepDirStepperConfig(StepperConfigBase):
         config = config["step_dir"]
         self.step_pin: int = config["step_pin"]
         self.dir_pin: int = config["dir_pin"]
+        # Who times the step pulses: "software" (a Python thread), "lgpio" (tx_pwm) or "fake_lgpio"
+        self.step_generator: str = config.get("step_generator", "software")
         self.encoder_a_pin: int = config["A_pin"]
         self.encoder_b_pin: int = config["B_pin"]
 
@@ -88,6 +127,11 @@ class CameraConfig:
         self.type: str = config["type"]
         self.index: int = config["index"]
         self.save_path: str = config["save_path"]
+        # Size of one camera pixel on the calibration target, for the projector pixel pitch
+        self.mm_per_px: float | None = config.get("mm_per_px")
+        # 3x3 homography from camera pixels to mm on the calibration target, measured from a
+        # printed checkerboard (python -m opencal.hardware.homography --camera-board); None = not measured
+        self.plane_homography: list[list[float]] | None = config.get("plane_homography")
 
 
 class LedArrayConfig:
@@ -116,6 +160,24 @@ class ProjectorConfig:
         self.default_print_size: int = config["default_print_size"]
         self.calibration_img_path: str = config["calibration_img_path"]
         self.calibration_dir_path: str = config["calibration_dir_path"]
+        # "angle": pick frames from the vial angle; "clock": play at the video fps
+        self.frame_sync: str = config.get("frame_sync", "angle")
+        self.frame_cache_dir: str = config.get("frame_cache_dir", "~/.cache/opencal/frames")
+        self.frame_cache_budget_gb: float = config.get("frame_cache_budget_gb", 8)
+        # Frames buffered by the decoder process for uncached files; 0 decodes in the display loop
+        self.decode_ring_frames: int = config.get("decode_ring_frames", 16)
+        # Frame remap: refractive index of the resin (1.0 = no vial lens correction) and
+        # a 3x3 homography from display pixels to the undistorted image (None = square-on)
+        self.refractive_index: float = config.get("refractive_index", 1.0)
+        self.keystone: list[list[float]] | None = config.get("keystone")
+        # Intensity correction: projector gamma (1.0 = linear) and an optional per-pixel
+        # flat-field gain map (.npy, 0..1) in display pixels
+        self.gamma: float = config.get("gamma", 1.0)
+        self.gain_map_path: str | None = config.get("gain_map_path")
+        # Projector-camera calibration: 3x3 homography from display to camera pixels and
+        # the projected pixel size in mm (None = not calibrated)
+        self.camera_homography: list[list[float]] | None = config.get("camera_homography")
+        self.pixel_pitch_mm: float | None = config.get("pixel_pitch_mm")
 
 
 class UIConfig:
@@ -0,0 +1,247 @@
+"""
+dose_sim.py — Preflight simulation of the light dose a print file delivers.
+
+Every frame is back-projected through the vial rotation into a voxel grid:
+while frame k is on screen the vial stands at
+
+    angle_k = 360 * rpm / 60 * k / fps
+
+and a voxel at (x, y) (vial coordinates, rotation axis at the origin) sits
+under projector column r = x cos(angle) + y sin(angle) from the image centre.
+The voxel collects that column's intensity for the frame's display time, so
+the dose is in seconds of full projector intensity. Frames are mapped to the
+display exactly as the projector does it (fitted, scaled by the print size,
+centred), then sampled every `voxel_px` display pixels.
+
+The work is batched over angles (one np.take_along_axis per batch) and
+chunked over z so the temporary (angles, z, y, x) gather stays within a
+memory bound. With workers > 1 the frames are split across a process pool and
+the partial volumes summed.
+
+Command line:
+
+    python -m opencal.utils.dose_sim print.mp4 --rpm 12 [--size 100] [--workers 4] [--out dose.npy]
+"""
+
+import argparse
+import math
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from opencal.hardware.projection.decoder import open_print_file
+from opencal.hardware.projection.rescale import FrameRescaler
+
+_BATCH_ANGLES = 16
+# Elements in one (angles, z, y, x) gather; 32M float32 is 128 MB
+_GATHER_BUDGET = 32 << 20
+
+
+@dataclass
+class DoseResult:
+    """Dose volume (z, y, x) in full-intensity seconds and summary statistics."""
+
+    dose: np.ndarray
+    voxel_px: int
+    stats: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Geometry:
+    rows: np.ndarray  # source row per voxel z
+    cols: np.ndarray  # source column per projected image column (sampled)
+    centre: float  # image column of the rotation axis
+    radius: int  # voxels from the axis to the grid edge
+    fps: float
+    rpm: float
+    absorbance: float  # per voxel of path, Beer-Lambert
+
+
+def _geometry(
+    path: Path,
+    size: int,
+    rpm: float,
+    display_size: tuple[int, int],
+    voxel_px: int,
+    vial_width_px: int | None,
+    absorbance: float,
+) -> tuple[_Geometry, int]:
+    source = open_print_file(path)
+    try:
+        rescaler = FrameRescaler((source.width, source.height), display_size, size)
+        frame_count = source.frame_count
+        fps = source.fps
+        if source.frames_per_rev is not None:
+            # Sinograms define their angles; play them back at the given RPM.
+            fps = source.frames_per_rev * rpm / 60
+    finally:
+        source.close()
+
+    cols = rescaler.cols[::voxel_px]
+    rows = rescaler.rows[::voxel_px]
+    # The rotation axis is the display centre, wherever the image was cropped.
+    centre = (display_size[0] / 2 - rescaler.offset[0]) / voxel_px
+    width = vial_width_px if vial_width_px else rescaler.out_size[0]
+    radius = max(int(width / voxel_px / 2), 1)
+    return _Geometry(rows, cols, centre, radius, fps, rpm, absorbance), frame_count
+
+
+def _back_project(
+    path: Path, geo: _Geometry, frames: range, progress: Callable[[float], None] | None = None
+) -> np.ndarray:
+    """Dose from `frames` of `path` into a (z, y, x) volume."""
+    n = 2 * geo.radius
+    nz, nw = len(geo.rows), len(geo.cols)
+    dose = np.zeros((nz, n * n), dtype=np.float32)
+
+    coords = np.arange(n, dtype=np.float32) - geo.radius + 0.5
+    y, x = np.meshgrid(coords, coords, indexing="ij")
+    x, y = x.ravel(), y.ravel()
+    inside = x * x + y * y <= geo.radius * geo.radius
+    dt = 1.0 / geo.fps
+    deg_per_frame = 360 * geo.rpm / 60 * dt
+
+    batch = _BATCH_ANGLES
+    z_chunk = max(1, min(nz, _GATHER_BUDGET // (batch * n * n)))
+    # Column nw is an always-dark pad for rays that miss the image.
+    slab = np.zeros((batch, nz, nw + 1), dtype=np.float32)
+    source = open_print_file(path)
+    try:
+        for start in range(frames.start, frames.stop, batch):
+            ks = np.arange(start, min(start + batch, frames.stop))
+            b = len(ks)
+            for j, k in enumerate(ks):
+                frame = source.read(int(k))
+                sampled = frame[geo.rows][:, geo.cols]
+                if sampled.ndim == 3:
+                    sampled = sampled.mean(axis=2)
+                slab[j, :, :nw] = sampled * (dt / 255)
+
+            theta = np.deg2rad(ks * deg_per_frame).astype(np.float32)[:, None]
+            cos, sin = np.cos(theta), np.sin(theta)
+            u = x * cos + y * sin  # across the beam
+            idx = np.floor(u + geo.centre).astype(np.intp)
+            idx[(idx < 0) | (idx >= nw) | ~inside] = nw
+            weight = None
+            if geo.absorbance > 0:
+                # Light enters the vial wall at s = -sqrt(R^2 - u^2) and travels along +s.
+                s = -x * sin + y * cos
+                depth = np.sqrt(np.maximum(geo.radius**2 - u * u, 0)) + s
+                weight = np.exp(-geo.absorbance * depth).astype(np.float32)
+
+            for z0 in range(0, nz, z_chunk):
+                z1 = min(z0 + z_chunk, nz)
+                gathered = np.take_along_axis(slab[:b, z0:z1], idx[:, None, :], axis=2)
+                if weight is not None:
+                    gathered *= weight[:, None, :]
+                dose[z0:z1] += gathered.sum(axis=0)
+            if progress is not None:
+                progress((ks[-1] + 1 - frames.start) / len(frames))
+    finally:
+        source.close()
+    return dose.reshape(nz, n, n)
+
+
+def dose_stats(dose: np.ndarray) -> dict[str, float]:
+    """Statistics over the voxels inside the vial cylinder."""
+    n = dose.shape[1]
+    c = np.arange(n) - n / 2 + 0.5
+    inside = (c[:, None] ** 2 + c[None, :] ** 2) <= (n / 2) ** 2
+    values = dose[:, inside]
+    mean = float(values.mean())
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": mean,
+        "p5": float(p5),
+        "median": float(p50),
+        "p95": float(p95),
+        # Coefficient of variation; lower means a more even dose
+        "cv": float(values.std() / mean) if mean > 0 else math.nan,
+    }
+
+
+def simulate_dose(
+    path: Path,
+    size: int,
+    rpm: float,
+    display_size: tuple[int, int] = (1920, 1080),
+    voxel_px: int = 4,
+    vial_width_px: int | None = None,
+    absorbance: float = 0.0,
+    workers: int = 1,
+    progress: Callable[[float], None] | None = None,
+) -> DoseResult:
+    """Simulate one pass through `path` projected at `size` percent while turning at `rpm`.
+
+    `vial_width_px` (display pixels, e.g. Projector.vial_width) limits the grid
+    to the vial; by default it spans the projected image. `absorbance` is the
+    resin's attenuation per voxel of path length. `progress` is called with the
+    completed fraction.
+    """
+    t0 = time.perf_counter()
+    geo, frame_count = _geometry(
+        path, size, rpm, display_size, voxel_px, vial_width_px, absorbance
+    )
+
+    if workers <= 1:
+        dose = _back_project(path, geo, range(frame_count), progress)
+    else:
+        per = math.ceil(frame_count / workers)
+        ranges = [range(i, min(i + per, frame_count)) for i in range(0, frame_count, per)]
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+            futures = [pool.submit(_back_project, path, geo, r) for r in ranges]
+            dose = futures[0].result()
+            for done, future in enumerate(futures[1:], 2):
+                dose += future.result()
+                if progress is not None:
+                    progress(done / len(futures))
+
+    stats = dose_stats(dose)
+    stats["frames"] = frame_count
+    stats["revolutions"] = frame_count / geo.fps * rpm / 60
+    stats["seconds"] = time.perf_counter() - t0
+    return DoseResult(dose, voxel_px, stats)
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    _ = parser.add_argument("print_file", type=Path)
+    _ = parser.add_argument("--rpm", type=float, required=True)
+    _ = parser.add_argument("--size", type=int, default=100, help="print size in percent")
+    _ = parser.add_argument("--display", default="1920x1080")
+    _ = parser.add_argument("--voxel", type=int, default=4, help="display pixels per voxel")
+    _ = parser.add_argument("--vial-width", type=int, default=None, help="vial width in display pixels")
+    _ = parser.add_argument("--absorbance", type=float, default=0.0, help="attenuation per voxel")
+    _ = parser.add_argument("--workers", type=int, default=1)
+    _ = parser.add_argument("--out", type=Path, default=None, help="save the dose volume as .npy")
+    args = parser.parse_args(argv)
+
+    width, height = map(int, args.display.split("x"))
+    result = simulate_dose(
+        args.print_file,
+        args.size,
+        args.rpm,
+        (width, height),
+        voxel_px=args.voxel,
+        vial_width_px=args.vial_width,
+        absorbance=args.absorbance,
+        workers=args.workers,
+    )
+    print(f"Dose volume {result.dose.shape} (z, y, x), {args.voxel} px voxels")
+    for key, value in result.stats.items():
+        print(f"  {key:<12} {value:.4g}")
+    if args.out is not None:
+        np.save(args.out, result.dose)
+        print(f"Saved {args.out}")
+    return result.stats
+
+
+if __name__ == "__main__":
+    _ = main()